@@ -7,19 +7,21 @@ from app.logging_config import get_logger
 from app.schemas.agent import Agent
 from app.services import agent_service
 from app.utils.db import get_db
+from app.utils.rate_limit import rate_limit
+from app.utils.serialization import json_response, serialize_agents
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
-@router.get("", response_model=List[Agent])
+@router.get("", response_model=List[Agent], dependencies=[Depends(rate_limit("read"))])
 def list_agents(db: Session = Depends(get_db)):
     """Get all available agents."""
     try:
         logger.info("Fetching all available agents")
         agents = agent_service.get_agents(db)
         logger.info(f"Retrieved {len(agents)} agents")
-        return agents
+        return json_response(serialize_agents(agents))
     except Exception as e:
         logger.error(f"Error fetching agents: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,46 +1,250 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import AsyncIterator, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.logging_config import get_logger
-from app.schemas.chat import Message, MessageCreate
-from app.services import chat_service
+from app.repositories import chat_repo, job_repo
+from app.schemas.chat import Message, MessageBatchCreate, MessageCreate
+from app.services import batch_service, chat_service
+from app.services.job_stats import job_stats
+from app.services.job_worker import job_workers
+from app.utils.admission import AdmissionRejectedError
 from app.utils.db import get_async_db, get_db
+from app.utils.idempotency import fingerprint, run_idempotent
+from app.utils.log_context import bind_session, loggable_content
+from app.utils.rate_limit import (
+    enforce_rate_limit,
+    rate_limit,
+    rate_limiter,
+    request_identities,
+)
+from app.utils.serialization import (
+    json_response,
+    serialize_job,
+    serialize_message,
+    serialize_messages,
+)
 
 logger = get_logger(__name__)
 router = APIRouter()
 
 
-@router.post("/messages", response_model=dict)
+@router.post("/messages")
 async def send_message(
-    message: MessageCreate, db: AsyncSession = Depends(get_async_db)
+    message: MessageCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None),
+    mode: Optional[str] = None,
 ):
-    """Send a message to an agent."""
+    """Send a message to an agent.
+
+    Clients may send an ``Idempotency-Key`` header so that retries of the
+    same request replay the original response instead of calling the agent
+    again.
+
+    With ``?mode=async`` (or ``Prefer: respond-async``) the user message is
+    stored and 202 is returned straight away with a job id; the reply is
+    generated by the background job workers.
+    """
+    async_mode = mode == "async" or "respond-async" in request.headers.get("prefer", "")
+    handler = _enqueue_message if async_mode else _send_message
+
+    async def charged_handler():
+        # Charged here rather than as a route dependency so that replays of a
+        # stored idempotent response do not use up the client's allowance
+        await enforce_rate_limit(request, "llm", message.session_id)
+        return await handler(message, db)
+
+    if idempotency_key is None:
+        return await charged_handler()
+
+    scope = "POST /chat/messages?mode=async" if async_mode else "POST /chat/messages"
+    return await run_idempotent(
+        idempotency_key, fingerprint(scope, message.model_dump()), charged_handler
+    )
+
+
+async def _enqueue_message(message: MessageCreate, db: AsyncSession):
+    bind_session(message.session_id)
+    logger.info("Queueing message for session: %s", message.session_id)
+    try:
+        job = await chat_service.enqueue_message_async(db, message)
+    except ValueError as e:
+        logger.warning(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error queueing message: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    job_workers.notify()
+    return json_response(
+        job,
+        status_code=202,
+        headers={
+            "Location": f"/api/v1/chat/jobs/{job['id']}",
+            "Preference-Applied": "respond-async",
+        },
+    )
+
+
+async def _send_message(message: MessageCreate, db: AsyncSession):
+    bind_session(message.session_id)
     logger.info(
-        f"Received message: '{message.content}' for session: {message.session_id}"
+        "Received message for session %s: %s",
+        message.session_id,
+        loggable_content(message.content),
+    )
+    logger.debug(
+        "Message agent_id: %s, mentions: %s", message.agent_id, message.mentions
     )
-    logger.info(f"Message agent_id: {message.agent_id}, mentions: {message.mentions}")
 
     try:
         # Use the full chat service with LLM integration
         result = await chat_service.create_message_async(db, message)
 
-        logger.info(f"Message processed successfully for session: {message.session_id}")
-        return result
+        logger.info(
+            "Message processed successfully for session: %s", message.session_id
+        )
+        return json_response(result)
     except ValueError as e:
         logger.warning(f"Validation error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Agents are busy right now. Please retry shortly.",
+            headers={"Retry-After": e.retry_after_header},
+        )
     except Exception as e:
         logger.error(f"Error processing message: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/sessions/{session_id}/messages", response_model=list[Message])
+async def _charge_batch_items(
+    request: Request, messages: list[MessageCreate]
+) -> tuple[list[dict], list[tuple[int, MessageCreate]]]:
+    """Split batch items into rate-limit rejections and indexed accepted items.
+
+    Each item is a provider call, so it is charged to the "llm" policy as well
+    as "batch", all or nothing. Once an item is rejected the rest of its
+    session is skipped, since later turns would otherwise run without it.
+    """
+    rejected: list[dict] = []
+    accepted: list[tuple[int, MessageCreate]] = []
+    blocked: dict[str, float] = {}
+    for index, message in enumerate(messages):
+        retry_after = blocked.get(message.session_id)
+        if retry_after is None:
+            limited = await rate_limiter.hit_all(
+                ("batch", "llm"), request_identities(request, message.session_id)
+            )
+            if limited is None or limited.allowed:
+                accepted.append((index, message))
+                continue
+            retry_after = blocked[message.session_id] = limited.retry_after
+        rejected.append(
+            {
+                "index": index,
+                "status": 429,
+                "error": "Rate limit exceeded. Please slow down.",
+                "retry_after": retry_after,
+            }
+        )
+    return rejected, accepted
+
+
+@router.post("/messages/batch")
+async def send_message_batch(
+    batch: MessageBatchCreate, request: Request, stream: bool = False
+):
+    """Send several messages in one request.
+
+    Messages within a session are processed in order; sessions run in
+    parallel. Every item reports its own status. With ``stream=true`` results
+    are written as NDJSON lines in completion order, otherwise they are
+    returned together in submission order.
+    """
+    if len(batch.messages) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.batch_max_items} messages",
+        )
+
+    rejected, accepted = await _charge_batch_items(request, batch.messages)
+    logger.info(
+        "Received batch of %d messages (%d rate limited)",
+        len(batch.messages),
+        len(rejected),
+    )
+
+    async def results() -> AsyncIterator[dict]:
+        for result in rejected:
+            yield result
+        async for result in batch_service.run_batch_async(
+            accepted, settings.batch_max_concurrency
+        ):
+            yield result
+
+    if stream:
+
+        async def ndjson() -> AsyncIterator[bytes]:
+            async for result in results():
+                yield orjson.dumps(result) + b"\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    collected = [result async for result in results()]
+    collected.sort(key=lambda result: result["index"])
+    return json_response({"results": collected})
+
+
+@router.get("/jobs/{job_id}", dependencies=[Depends(rate_limit("read"))])
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get the status of a message submitted in async mode.
+
+    Completed jobs include the agent reply under ``result``.
+    """
+    try:
+        job = await job_repo.get_job_async(db, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        payload = serialize_job(job)
+        payload["result"] = None
+        if job.response_message_id is not None:
+            reply = await chat_repo.get_message_by_id_async(db, job.response_message_id)
+            payload["result"] = serialize_message(reply) if reply else None
+        return json_response(payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get(
+    "/sessions/{session_id}/messages",
+    response_model=list[Message],
+    dependencies=[Depends(rate_limit("read"))],
+)
 def get_messages(session_id: str, db: Session = Depends(get_db)):
-    """Get message history for a session."""
+    """Get message history for a session.
+
+    ``X-Pending-Jobs`` reports replies still being generated for async-mode
+    messages; clients polling for a reply can stop once it reaches zero.
+    """
     try:
         messages = chat_service.get_messages_by_session(db, session_id)
-        return messages
+        pending = job_stats.pending_in_session(db, session_id)
+        return json_response(
+            serialize_messages(messages), headers={"X-Pending-Jobs": str(pending)}
+        )
     except Exception as e:
         logger.error(f"Error retrieving messages: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
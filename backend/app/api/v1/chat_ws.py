@@ -0,0 +1,285 @@
+"""
+WebSocket chat channel.
+
+One connection can follow several chat sessions at once. All frames are JSON
+objects with a ``type`` field.
+
+Client -> server:
+    {"type": "subscribe", "session_id": "...", "after_id": 123}
+    {"type": "unsubscribe", "session_id": "..."}
+    {"type": "send", "session_id": "...", "content": "@Agent ...",
+     "request_id": "..."}
+    {"type": "typing", "session_id": "...", "state": "start" | "stop"}
+    {"type": "ping"} / {"type": "pong"} (answer to a server ping)
+
+Server -> client:
+    subscribed / unsubscribed, message (persisted messages, replayed after
+    ``after_id`` on subscribe and pushed live afterwards), progress, token and
+    done for the client's own sends, typing, error, ping / pong.
+
+Live events may overlap with the replay that follows a subscribe, so clients
+should de-duplicate ``message`` events by message id. A client that cannot
+keep up is disconnected with close code 1013 and should reconnect and
+resubscribe with the id of the last message it saw.
+"""
+
+import asyncio
+import time
+from contextlib import aclosing
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.config import settings
+from app.logging_config import get_logger
+from app.repositories import chat_repo
+from app.schemas.chat import MessageCreate
+from app.services import chat_service
+from app.services.session_hub import Subscriber, session_hub
+from app.utils import metrics
+from app.utils.admission import AdmissionRejectedError
+from app.utils.db import async_session_scope
+from app.utils.log_context import bind_session
+from app.utils.rate_limit import rate_limiter, request_identities
+from app.utils.serialization import serialize_message
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+CLOSE_IDLE = 1000
+CLOSE_SLOW_CONSUMER = 1013
+
+
+class ChatConnection:
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.subscriber = Subscriber(settings.ws_send_queue_size)
+        self.sends: set[asyncio.Task] = set()
+        self.last_seen = time.monotonic()
+
+    @property
+    def sessions(self) -> set[str]:
+        return self.subscriber.sessions
+
+    async def run(self) -> None:
+        reader = asyncio.create_task(self._reader())
+        writer = asyncio.create_task(self._writer())
+        heartbeat = asyncio.create_task(self._heartbeat())
+        overflow = asyncio.create_task(self.subscriber.overflowed.wait())
+        tasks = {reader, writer, heartbeat, overflow}
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            session_hub.unsubscribe_all(self.subscriber)
+            for task in tasks | self.sends:
+                task.cancel()
+            await asyncio.gather(*tasks, *self.sends, return_exceptions=True)
+
+        if overflow in done:
+            await self._close(CLOSE_SLOW_CONSUMER, "slow consumer")
+        elif heartbeat in done:
+            await self._close(CLOSE_IDLE, "idle timeout")
+
+    async def _close(self, code: int, reason: str) -> None:
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except RuntimeError:
+            pass  # Already closed by the client
+
+    async def _reader(self) -> None:
+        try:
+            while True:
+                raw = await self.websocket.receive_text()
+                self.last_seen = time.monotonic()
+                try:
+                    frame = orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    await self.error(None, 400, "Frames must be JSON objects")
+                    continue
+                if not isinstance(frame, dict):
+                    await self.error(None, 400, "Frames must be JSON objects")
+                    continue
+                await self.handle(frame)
+        except WebSocketDisconnect:
+            pass
+
+    async def _writer(self) -> None:
+        while True:
+            frame = await self.subscriber.queue.get()
+            await self.websocket.send_text(frame)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(settings.ws_heartbeat_interval)
+            if time.monotonic() - self.last_seen > settings.ws_idle_timeout:
+                return
+            self.subscriber.offer('{"type":"ping"}', droppable=True)
+
+    async def error(
+        self,
+        request_id: Optional[str],
+        status: int,
+        detail: str,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        event = {
+            "type": "error",
+            "request_id": request_id,
+            "status": status,
+            "detail": detail,
+        }
+        if retry_after is not None:
+            event["retry_after"] = retry_after
+        await self.subscriber.send(event)
+
+    async def handle(self, frame: dict) -> None:
+        frame_type = frame.get("type")
+        session_id = frame.get("session_id")
+        if frame_type == "ping":
+            await self.subscriber.send({"type": "pong"})
+        elif frame_type == "pong":
+            pass  # Answer to our heartbeat; _reader already marked us alive
+        elif frame_type == "subscribe" and isinstance(session_id, str):
+            await self.subscribe(session_id, frame.get("after_id"))
+        elif frame_type == "unsubscribe" and isinstance(session_id, str):
+            session_hub.unsubscribe(session_id, self.subscriber)
+            await self.subscriber.send(
+                {"type": "unsubscribed", "session_id": session_id}
+            )
+        elif frame_type == "typing" and session_id in self.sessions:
+            session_hub.publish(
+                session_id,
+                {
+                    "type": "typing",
+                    "session_id": session_id,
+                    "actor": "user",
+                    "state": "stop" if frame.get("state") == "stop" else "start",
+                },
+                droppable=True,
+                exclude=self.subscriber,
+            )
+        elif frame_type == "send":
+            await self.start_send(frame)
+        else:
+            await self.error(
+                frame.get("request_id"), 400, f"Unsupported frame: {frame_type}"
+            )
+
+    async def subscribe(self, session_id: str, after_id) -> None:
+        if (
+            session_id not in self.sessions
+            and len(self.sessions) >= settings.ws_max_sessions
+        ):
+            await self.error(None, 400, "Too many subscribed sessions")
+            return
+
+        # Subscribe before replaying so nothing falls between the two
+        session_hub.subscribe(session_id, self.subscriber)
+
+        last_id = after_id if isinstance(after_id, int) else None
+        if last_id is not None:
+            async with async_session_scope() as db:
+                rows = await chat_repo.get_messages_after_async(
+                    db, session_id, last_id, limit=settings.ws_replay_limit
+                )
+            for row in rows:
+                await self.subscriber.send(
+                    {
+                        "type": "message",
+                        "session_id": session_id,
+                        "message": serialize_message(row),
+                    }
+                )
+                last_id = row.id
+
+        await self.subscriber.send(
+            {"type": "subscribed", "session_id": session_id, "last_id": last_id}
+        )
+
+    async def start_send(self, frame: dict) -> None:
+        request_id = frame.get("request_id")
+        if len(self.sends) >= settings.ws_max_concurrent_sends:
+            await self.error(request_id, 429, "Too many messages in progress")
+            return
+
+        try:
+            message = MessageCreate(
+                content=frame.get("content"), session_id=frame.get("session_id")
+            )
+        except ValidationError:
+            await self.error(request_id, 422, "send requires content and session_id")
+            return
+
+        result = await rate_limiter.hit(
+            "llm", request_identities(self.websocket, message.session_id)
+        )
+        if result is not None and not result.allowed:
+            await self.error(
+                request_id, 429, "Rate limit exceeded", retry_after=result.retry_after
+            )
+            return
+
+        task = asyncio.create_task(self.generate(message, request_id))
+        self.sends.add(task)
+        task.add_done_callback(self.sends.discard)
+
+    async def generate(self, message: MessageCreate, request_id) -> None:
+        session_id = message.session_id
+        bind_session(session_id)
+        agent_name = None
+        try:
+            async with async_session_scope() as db:
+                async with aclosing(
+                    chat_service.stream_message_async(db, message)
+                ) as events:
+                    async for event in events:
+                        if event["type"] == "progress":
+                            agent_name = event["agent_name"]
+                            self._publish_agent_typing(session_id, agent_name, "start")
+                        event.update(request_id=request_id, session_id=session_id)
+                        await self.subscriber.send(event)
+        except ValueError as e:
+            await self.error(request_id, 400, str(e))
+        except AdmissionRejectedError as e:
+            await self.error(
+                request_id,
+                503,
+                "Agents are busy right now. Please retry shortly.",
+                retry_after=e.retry_after,
+            )
+        except Exception as e:
+            logger.error(f"Error streaming message over WebSocket: {str(e)}")
+            await self.error(request_id, 500, "Internal server error")
+        finally:
+            if agent_name is not None:
+                self._publish_agent_typing(session_id, agent_name, "stop")
+
+    def _publish_agent_typing(self, session_id: str, agent_name: str, state: str):
+        session_hub.publish(
+            session_id,
+            {
+                "type": "typing",
+                "session_id": session_id,
+                "actor": "agent",
+                "agent_name": agent_name,
+                "state": state,
+            },
+            droppable=True,
+            # The sender already sees progress and token events
+            exclude=self.subscriber,
+        )
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    """Bidirectional chat channel with streaming replies and live updates."""
+    await websocket.accept()
+    logger.info("WebSocket connection opened")
+    metrics.ws_connections.inc()
+    try:
+        await ChatConnection(websocket).run()
+    finally:
+        metrics.ws_connections.dec()
+    logger.info("WebSocket connection closed")
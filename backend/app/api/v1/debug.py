@@ -0,0 +1,55 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from app.utils import memory, profiling
+from app.utils.memory import memory_tracker
+from app.utils.serialization import json_response
+
+router = APIRouter()
+
+
+def debug_routes_active() -> bool:
+    """Mount these routes when profiling or memory tracking is enabled."""
+    return profiling.profiling_active() or memory.tracking_active()
+
+
+def _bearer(authorization: Optional[str]) -> str:
+    return (authorization or "").removeprefix("Bearer ").strip()
+
+
+def require_debug_token(authorization: Optional[str] = Header(None)) -> None:
+    if not profiling.check_token(_bearer(authorization)):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+def require_memory_token(authorization: Optional[str] = Header(None)) -> None:
+    if not memory.check_token(_bearer(authorization)):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+@router.get("/profiles", dependencies=[Depends(require_debug_token)])
+def list_profiles():
+    """Saved request profiles, newest first."""
+    return json_response({"profiles": profiling.list_profiles()})
+
+
+@router.get("/profiles/{name}", dependencies=[Depends(require_debug_token)])
+def get_profile(name: str):
+    """Download a saved profile report."""
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name)
+
+
+@router.get("/memory", dependencies=[Depends(require_memory_token)])
+def get_memory(limit: int = Query(20, ge=1, le=200), reset: bool = False):
+    """Top allocation sites of this worker and their growth since the baseline.
+
+    ``reset=true`` makes this snapshot the baseline for the next call.
+    """
+    if not memory_tracker.tracing:
+        raise HTTPException(status_code=404, detail="Memory tracking is disabled")
+    return json_response(memory_tracker.report(limit, reset_baseline=reset))
@@ -1,6 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 
 from app.logging_config import get_logger
+from app.services.health_monitor import health_monitor
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -8,5 +9,20 @@ logger = get_logger(__name__)
 
 @router.get("/health")
 def health_check():
-    logger.info("Health check endpoint accessed")
+    logger.debug("Health check endpoint accessed")
     return {"status": "ok"}
+
+
+@router.get("/health/live")
+def liveness_check():
+    """The process is up and serving requests; touches no dependencies."""
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def readiness_check(response: Response):
+    """Cached dependency probes plus current saturation; 503 when not ready."""
+    ready, report = await health_monitor.readiness()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
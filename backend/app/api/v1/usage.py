@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.logging_config import get_logger
+from app.repositories import usage_repo
+from app.schemas.chat import AgentUsage, SessionUsage
+from app.utils.db import get_async_db
+from app.utils.rate_limit import rate_limit
+from app.utils.serialization import json_response
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+@router.get(
+    "/agents",
+    response_model=List[AgentUsage],
+    dependencies=[Depends(rate_limit("read"))],
+)
+async def get_agent_usage(
+    since: Optional[datetime] = None, db: AsyncSession = Depends(get_async_db)
+):
+    """Token usage and provider latency per agent, optionally since a time."""
+    try:
+        return json_response(await usage_repo.get_usage_by_agent_async(db, since))
+    except Exception as e:
+        logger.error(f"Error retrieving agent usage: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get(
+    "/sessions/{session_id}",
+    response_model=SessionUsage,
+    dependencies=[Depends(rate_limit("read"))],
+)
+async def get_session_usage(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Token usage and provider latency for a session, with a per-agent split."""
+    try:
+        totals = await usage_repo.get_usage_for_session_async(db, session_id)
+        agents = await usage_repo.get_usage_by_agent_async(db, session_id=session_id)
+        return json_response(
+            {"session_id": session_id, "totals": totals, "agents": agents}
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving session usage: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -25,6 +25,14 @@ class Settings(BaseSettings):
     azure_openai_api_key: Optional[str] = None
     azure_openai_deployment: Optional[str] = None
     azure_openai_api_version: str = "2024-12-01-preview"
+    llm_provider: str = "openai"  # openai (incl. Azure) or mock, for load tests
+
+    # Mock LLM provider (LLM_PROVIDER=mock)
+    mock_llm_latency: float = 0.5  # Seconds until the first token
+    mock_llm_token_interval: float = 0.02  # Seconds between further tokens
+    mock_llm_reply_tokens: int = 60
+    mock_llm_jitter: float = 0.1  # Latencies vary by up to this fraction
+    mock_llm_error_rate: float = 0.0  # Fraction of calls that fail
 
     # Application configuration
     environment: str = "development"
@@ -39,6 +47,135 @@ class Settings(BaseSettings):
     log_dir: str = "logs"
     log_max_files: int = 30
     log_enable_console: bool = True
+    log_queue_enabled: bool = True  # Write logs from a background thread
+    log_queue_size: int = 10000
+    log_queue_policy: str = "drop_new"  # drop_new, drop_oldest or block
+    log_format: str = "text"  # text or json
+    # Fraction of sub-WARNING records kept per logger, e.g. {"app.api.v1.health": 0.01}
+    log_sample_rates: dict[str, float] = {}
+    log_access_exclude_paths: list[str] = [
+        "/api/v1/health",
+        "/api/v1/health/live",
+        "/api/v1/health/ready",
+    ]
+    log_message_content: str = "truncate"  # full, truncate or redact
+    log_content_max_chars: int = 200
+
+    # Response compression (brotli/zstd are used only when installed)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5
+    compression_zstd_level: int = 3
+    compression_exclude_paths: list[str] = []
+
+    # Rate limiting (token buckets per session, client IP and user)
+    rate_limit_enabled: bool = True
+    rate_limit_llm_capacity: int = 10
+    rate_limit_llm_refill_rate: float = 0.2  # tokens per second
+    rate_limit_read_capacity: int = 120
+    rate_limit_read_refill_rate: float = 4.0
+    # Charged per item of a batch submission, on top of the llm policy
+    rate_limit_batch_capacity: int = 200
+    rate_limit_batch_refill_rate: float = 1.0
+    rate_limit_max_keys: int = 10000
+    rate_limit_trust_forwarded_for: bool = False
+    # Optional shared backend, e.g. redis://localhost:6379/0
+    rate_limit_backend_url: Optional[str] = None
+
+    # LLM admission control (process-wide cap on provider calls)
+    llm_max_concurrency: int = 8
+    llm_max_queue: int = 32
+    llm_queue_timeout: float = 10.0  # seconds a call may wait for a slot
+
+    # WebSocket chat channel
+    ws_heartbeat_interval: float = 20.0
+    ws_idle_timeout: float = 60.0
+    ws_send_queue_size: int = 256
+    ws_max_sessions: int = 20
+    ws_max_concurrent_sends: int = 4
+    ws_replay_limit: int = 200
+
+    # Idempotency-Key support for POST /chat/messages
+    idempotency_ttl: int = 86400  # Seconds a completed response is replayed
+    idempotency_lock_timeout: float = 120.0  # Pending keys older are abandoned
+    idempotency_wait_timeout: float = 30.0  # Max wait on a duplicate in flight
+    idempotency_poll_interval: float = 0.25
+
+    # @mention resolution against the agents table
+    mention_index_ttl: float = 60.0  # Seconds between re-reads of the agent list
+
+    # Batch message submission
+    batch_max_items: int = 100
+    batch_max_concurrency: int = 4
+
+    # Async job mode for POST /chat/messages (?mode=async)
+    job_workers: int = 2  # In-process workers; 0 to run them elsewhere
+    job_poll_interval: float = 1.0
+    job_lease_timeout: float = 300.0  # Running jobs past this are re-queued
+    job_max_attempts: int = 5
+    job_retry_base_delay: float = 2.0
+    job_retry_max_delay: float = 60.0
+    job_stats_ttl: float = 30.0  # Seconds job counts are cached (metrics, history)
+
+    # Health probes behind /api/v1/health/ready (run in the background, cached)
+    health_monitor_enabled: bool = True
+    health_probe_interval: float = 15.0
+    health_probe_timeout: float = 3.0
+    health_llm_probe_interval: float = 60.0  # Provider probes are rate limited
+    health_llm_required: bool = False  # Not ready while the provider is unreachable
+    health_saturation_threshold: float = 0.95  # Not ready at this pool/queue usage
+
+    # SQL statement instrumentation
+    db_slow_query_ms: float = 200.0  # Log statements slower than this
+    db_query_headers: bool = True  # X-DB-Query-Count/-Time-Ms, never in production
+
+    # Event-loop lag monitoring
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval: float = 0.5
+    loop_block_detection: bool = False  # Log the loop thread's stack on stalls
+    loop_block_threshold: float = 0.1  # Seconds the loop may go without running
+
+    # Prometheus metrics endpoint
+    metrics_enabled: bool = True
+    metrics_token: Optional[str] = None  # Require "Authorization: Bearer <token>"
+
+    # Tracing (W3C traceparent propagation, local export)
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 1.0  # Fraction of new traces to record
+    tracing_exporter: str = "file"  # file, otlp or memory
+    tracing_file_path: str = "logs/traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_service_name: str = "multimind-api"
+    tracing_queue_size: int = 2048  # Spans beyond this are dropped, not awaited
+    tracing_batch_size: int = 256
+    tracing_export_interval: float = 2.0
+
+    # Request profiling (never active when ENVIRONMENT=production)
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None  # Required: X-Profile header / Bearer token
+    profiling_sample_rate: float = 0.0  # Also profile this fraction of requests
+    profiling_dir: str = "profiles"
+    profiling_interval: float = 0.001  # pyinstrument sampling interval (seconds)
+    profiling_max_files: int = 200
+
+    # Allocation tracking behind /api/v1/debug/memory (never in production)
+    memory_tracking_enabled: bool = False  # Starts tracemalloc; slows allocations
+    memory_trace_frames: int = 1  # Stack frames kept per allocation site
+    memory_token: Optional[str] = None  # Required: Bearer token for the report
+
+    # Production server (python -m app.serve)
+    web_host: str = "0.0.0.0"
+    web_port: int = 8000  # PORT, when set by the platform, takes precedence
+    web_workers: int = 0  # 0 = one worker per available CPU
+    web_preload: bool = True
+    web_keepalive: int = 75  # Longer than the usual 60s load-balancer idle timeout
+    web_graceful_timeout: int = 90  # Time for in-flight LLM calls on shutdown
+    web_worker_timeout: int = 120
+    web_max_requests: int = 10000  # Recycle workers to contain memory growth
+    web_max_requests_jitter: int = 1000
+    web_forwarded_allow_ips: str = "127.0.0.1"
+    web_access_log: bool = True
 
     class Config:
         env_file = ".env"
@@ -87,6 +224,9 @@ class Settings(BaseSettings):
                 return self.database_url.replace(
                     "postgresql://", "postgresql+asyncpg://", 1
                 )
+            # Likewise aiosqlite for local SQLite databases
+            if self.database_url.startswith("sqlite://"):
+                return self.database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
             return self.database_url
 
         # Check for Supabase configuration
@@ -0,0 +1,121 @@
+"""
+Local stand-in for the OpenAI chat API, for load tests and benchmarks.
+
+Selected with ``LLM_PROVIDER=mock``. ``MockAsyncOpenAI`` answers
+``chat.completions.create`` (plain and streaming) and ``models.list`` with
+the same shapes the SDK returns, so admission control, metrics, tracing and
+the usage ledger behave as they do against a real provider. Timing follows
+the ``MOCK_LLM_*`` settings: the first token after ``MOCK_LLM_LATENCY``,
+then one token every ``MOCK_LLM_TOKEN_INTERVAL``.
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+from typing import AsyncIterator, Optional
+
+from app.config import settings
+
+MODEL_NAME = "mock-llm"
+
+_WORDS = (
+    "Here is a considered answer that walks through the question step by "
+    "step and closes with a short summary"
+).split()
+
+
+def _jittered(seconds: float) -> float:
+    spread = seconds * settings.mock_llm_jitter
+    return max(0.0, seconds + random.uniform(-spread, spread))
+
+
+def reply_tokens(count: int) -> list[str]:
+    """Deterministic reply text, one word per token."""
+    return [(" " if i else "") + _WORDS[i % len(_WORDS)] for i in range(max(1, count))]
+
+
+def _usage(messages: list, completion_tokens: int) -> SimpleNamespace:
+    prompt_tokens = sum(
+        len(str(message.get("content", "")).split()) for message in messages
+    )
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+    )
+
+
+def _chunk(content: Optional[str] = None, usage=None) -> SimpleNamespace:
+    choices = (
+        [SimpleNamespace(delta=SimpleNamespace(content=content))]
+        if content is not None
+        else []
+    )
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class _Completions:
+    async def create(
+        self,
+        *,
+        model: str,
+        messages: list,
+        stream: bool = False,
+        max_tokens: Optional[int] = None,
+        extra_body: Optional[dict] = None,
+        **kwargs,
+    ):
+        if random.random() < settings.mock_llm_error_rate:
+            await asyncio.sleep(_jittered(settings.mock_llm_latency))
+            raise RuntimeError("Mock LLM provider error")
+
+        count = settings.mock_llm_reply_tokens
+        if max_tokens is not None:
+            count = min(count, max_tokens)
+        tokens = reply_tokens(count)
+
+        if stream:
+            include_usage = bool(
+                (extra_body or {}).get("stream_options", {}).get("include_usage")
+            )
+            return self._stream(tokens, messages, include_usage)
+
+        await asyncio.sleep(
+            _jittered(
+                settings.mock_llm_latency
+                + settings.mock_llm_token_interval * (len(tokens) - 1)
+            )
+        )
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content="".join(tokens)))],
+            usage=_usage(messages, len(tokens)),
+        )
+
+    async def _stream(
+        self, tokens: list[str], messages: list, include_usage: bool
+    ) -> AsyncIterator[SimpleNamespace]:
+        await asyncio.sleep(_jittered(settings.mock_llm_latency))
+        for index, token in enumerate(tokens):
+            if index:
+                await asyncio.sleep(_jittered(settings.mock_llm_token_interval))
+            yield _chunk(token)
+        if include_usage:
+            yield _chunk(usage=_usage(messages, len(tokens)))
+
+
+class _Models:
+    async def list(self) -> SimpleNamespace:
+        return SimpleNamespace(data=[SimpleNamespace(id=MODEL_NAME)])
+
+
+class MockAsyncOpenAI:
+    """The subset of ``openai.AsyncOpenAI`` the application uses."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=_Completions())
+        self.models = _Models()
+
+    def with_options(self, **kwargs) -> "MockAsyncOpenAI":
+        return self
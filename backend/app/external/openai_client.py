@@ -1,9 +1,17 @@
+import asyncio
 import logging
+import time
+import weakref
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Optional
 
 import openai
 from openai import AzureOpenAI, OpenAI
 
 from app.config import settings
+from app.utils import metrics
+from app.utils.admission import llm_admission
+from app.utils.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +28,14 @@ def get_openai_client():
         return OpenAI(api_key=settings.effective_openai_api_key)
 
 
-def get_async_openai_client():
-    """Get the appropriate async OpenAI client based on configuration."""
+# Async clients by event loop, then by configuration. Each client builds an
+# SSL context and connection pool (tens of milliseconds, and about a megabyte
+# of native memory that lingers until it is collected), so one is shared per
+# loop rather than built per call; httpx pools cannot cross loops.
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _new_async_openai_client():
     if settings.is_using_azure_openai:
         return openai.AsyncAzureOpenAI(
             api_key=settings.azure_openai_api_key,
@@ -32,8 +46,50 @@ def get_async_openai_client():
         return openai.AsyncOpenAI(api_key=settings.effective_openai_api_key)
 
 
+def get_async_openai_client():
+    """Get the appropriate async OpenAI client based on configuration.
+
+    Inside a running event loop the client is shared by every call on that
+    loop; outside one a new client is returned.
+    """
+    if settings.llm_provider == "mock":
+        from app.external.mock_llm import MockAsyncOpenAI
+
+        return MockAsyncOpenAI()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _new_async_openai_client()
+
+    key = (
+        settings.is_using_azure_openai,
+        settings.azure_openai_endpoint,
+        settings.azure_openai_api_version,
+        settings.effective_openai_api_key,
+    )
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = _new_async_openai_client()
+    return client
+
+
+async def close_async_openai_client() -> None:
+    """Close the clients shared on the running loop (at shutdown)."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning("Failed to close OpenAI client: %s", e)
+
+
 def get_model_name():
     """Get the appropriate model name based on configuration."""
+    if settings.llm_provider == "mock":
+        from app.external.mock_llm import MODEL_NAME
+
+        return MODEL_NAME
     if settings.is_using_azure_openai:
         return settings.azure_openai_deployment
     else:
@@ -86,26 +142,208 @@ async def get_openai_response_async(prompt: str) -> str:
         )
 
 
-async def get_openai_response_with_messages_async(messages: list) -> str:
-    """Async OpenAI response with proper message format for better conversation handling."""  # noqa: E501
-    try:
-        client = get_async_openai_client()
-        model_name = get_model_name()
+@dataclass
+class LLMCompletion:
+    """Generated text plus the usage and timing the provider reported."""
 
-        response = await client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-            max_tokens=500,  # Increased for more detailed responses
-            temperature=0.8,  # Slightly higher for more personality
-            presence_penalty=0.1,  # Encourage diverse responses
-            frequency_penalty=0.1,  # Reduce repetition
-        )
+    content: str
+    model: Optional[str] = None
+    mode: str = "complete"  # "complete" or "stream"
+    outcome: str = "ok"  # "ok", "error" or "cancelled"
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None  # Prompt tokens served from cache
+    latency_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None
 
-        return response.choices[0].message.content.strip()
+    @property
+    def cache_hit(self) -> bool:
+        return bool(self.cached_tokens)
 
-    except Exception as e:
-        logger.error("OpenAI API error: %s", str(e))
-        return (
-            "I apologize, but I'm experiencing technical difficulties. "
-            "Please try again later."
+    def usage_fields(self) -> dict:
+        """Columns for the ``message_usage`` ledger row."""
+        fields = asdict(self)
+        del fields["content"]
+        return fields
+
+
+_FALLBACK_REPLY = (
+    "I apologize, but I'm experiencing technical difficulties. "
+    "Please try again later."
+)
+
+
+def _record_usage(completion: LLMCompletion, usage, span=None) -> None:
+    for kind in ("prompt", "completion"):
+        tokens = getattr(usage, f"{kind}_tokens", None)
+        if isinstance(tokens, int):
+            setattr(completion, f"{kind}_tokens", tokens)
+            metrics.llm_tokens.inc(completion.model, kind, amount=tokens)
+            if span is not None:
+                span.set_attribute(f"llm.{kind}_tokens", tokens)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None)
+    if isinstance(cached, int):
+        completion.cached_tokens = cached
+
+
+def _trace_options() -> dict:
+    """Extra request options carrying the current trace to the provider."""
+    headers = tracer.inject({})
+    return {"extra_headers": headers} if headers else {}
+
+
+async def get_openai_response_with_messages_async(
+    messages: list, agent_name: Optional[str] = None
+) -> str:
+    """Async OpenAI response with proper message format for better conversation handling.
+
+    Raises AdmissionRejectedError when the provider call cannot be admitted.
+    """  # noqa: E501
+    completion = await get_openai_completion_with_messages_async(
+        messages, agent_name=agent_name
+    )
+    return completion.content
+
+
+async def get_openai_completion_with_messages_async(
+    messages: list, agent_name: Optional[str] = None
+) -> LLMCompletion:
+    """Like ``get_openai_response_with_messages_async``, with usage and timing.
+
+    Provider errors produce the fallback reply with ``outcome="error"``.
+    Raises AdmissionRejectedError when the provider call cannot be admitted.
+    """
+    async with llm_admission.slot():
+        completion = LLMCompletion(content=_FALLBACK_REPLY, outcome="error")
+        started = time.perf_counter()
+        with tracer.span("llm.chat_completion", {"llm.agent": agent_name}) as span:
+            try:
+                client = get_async_openai_client()
+                completion.model = get_model_name()
+                span.set_attribute("llm.model", completion.model)
+
+                response = await client.chat.completions.create(
+                    model=completion.model,
+                    messages=messages,
+                    max_tokens=500,  # Increased for more detailed responses
+                    temperature=0.8,  # Slightly higher for more personality
+                    presence_penalty=0.1,  # Encourage diverse responses
+                    frequency_penalty=0.1,  # Reduce repetition
+                    **_trace_options(),
+                )
+                _record_usage(completion, getattr(response, "usage", None), span)
+
+                completion.content = response.choices[0].message.content.strip()
+                completion.outcome = "ok"
+
+            except Exception as e:
+                span.record_exception(e)
+                logger.error("OpenAI API error: %s", str(e))
+            finally:
+                elapsed = time.perf_counter() - started
+                completion.latency_ms = round(elapsed * 1000, 1)
+                span.set_attribute("llm.outcome", completion.outcome)
+                metrics.llm_request_duration.observe(
+                    elapsed,
+                    agent_name or "unknown",
+                    completion.model or "unknown",
+                    "complete",
+                    completion.outcome,
+                )
+        return completion
+
+
+def _chunk_delta(
+    chunk,
+    completion: LLMCompletion,
+    span,
+    agent_name: Optional[str],
+    started: float,
+    first: bool,
+) -> Optional[str]:
+    """Text of a stream chunk, recording usage and the time to first token."""
+    usage = getattr(chunk, "usage", None)
+    if usage is not None:
+        _record_usage(completion, usage, span)
+    delta = chunk.choices[0].delta.content if chunk.choices else None
+    if delta and first:
+        ttft = time.perf_counter() - started
+        completion.ttft_ms = round(ttft * 1000, 1)
+        metrics.llm_time_to_first_token.observe(
+            ttft, agent_name or "unknown", completion.model
         )
+        span.set_attribute("llm.ttft_ms", completion.ttft_ms)
+    return delta
+
+
+async def stream_openai_response_with_messages_async(
+    messages: list,
+    agent_name: Optional[str] = None,
+    completion: Optional[LLMCompletion] = None,
+) -> AsyncIterator[str]:
+    """Stream the assistant reply as text deltas.
+
+    Uses the same sampling parameters as the non-streaming call. Yields the
+    fallback apology if the provider fails before producing any text.
+    Pass ``completion`` to have model, usage and timing filled in once the
+    stream ends (its ``content`` is left to the caller).
+    Raises AdmissionRejectedError when the provider call cannot be admitted.
+    """
+    if completion is None:
+        completion = LLMCompletion(content="")
+    completion.mode = "stream"
+    async with llm_admission.slot():
+        produced = False
+        started = time.perf_counter()
+        # Stays "cancelled" if the consumer stops iterating early
+        completion.outcome = "cancelled"
+        with tracer.span(
+            "llm.chat_completion", {"llm.agent": agent_name, "llm.stream": True}
+        ) as span:
+            try:
+                client = get_async_openai_client()
+                completion.model = get_model_name()
+                span.set_attribute("llm.model", completion.model)
+
+                options = _trace_options()
+                if not settings.is_using_azure_openai:
+                    # Ask for a final chunk carrying token usage
+                    options["extra_body"] = {"stream_options": {"include_usage": True}}
+
+                stream = await client.chat.completions.create(
+                    model=completion.model,
+                    messages=messages,
+                    max_tokens=500,
+                    temperature=0.8,
+                    presence_penalty=0.1,
+                    frequency_penalty=0.1,
+                    stream=True,
+                    **options,
+                )
+                async for chunk in stream:
+                    delta = _chunk_delta(
+                        chunk, completion, span, agent_name, started, not produced
+                    )
+                    if delta:
+                        produced = True
+                        yield delta
+                completion.outcome = "ok"
+
+            except Exception as e:
+                completion.outcome = "error"
+                span.record_exception(e)
+                logger.error("OpenAI API streaming error: %s", str(e))
+                if not produced:
+                    yield _FALLBACK_REPLY
+            finally:
+                elapsed = time.perf_counter() - started
+                completion.latency_ms = round(elapsed * 1000, 1)
+                span.set_attribute("llm.outcome", completion.outcome)
+                metrics.llm_request_duration.observe(
+                    elapsed,
+                    agent_name or "unknown",
+                    completion.model or "unknown",
+                    "stream",
+                    completion.outcome,
+                )
@@ -1,13 +1,32 @@
 """
 Logging configuration with daily rotation and consistent file naming.
+
+By default the root logger only enqueues records; a background listener
+thread formats them and does the console and file writes (including
+rollover), so logging never blocks the event loop on I/O.
+
+Records carry the request and session ids bound in ``app.utils.log_context``
+and can be written as one JSON object per line (``LOG_FORMAT=json``).
+Chatty loggers can be sampled with ``LOG_SAMPLE_RATES``.
 """
 
+import atexit
+import json
 import logging
 import logging.handlers
-from datetime import datetime
+import os
+import queue
+import random
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
 
 from app.config import settings
+from app.utils import metrics
+from app.utils.log_context import request_id_var, session_id_var
+from app.utils.tracing import current_span
+
+QUEUE_POLICIES = ("drop_new", "drop_oldest", "block")
 
 
 class TimedRotatingFileHandlerWithConsistentNaming(
@@ -89,12 +108,269 @@ class TimedRotatingFileHandlerWithConsistentNaming(
                 pass  # Ignore errors when deleting old files
 
 
+class ContextFilter(logging.Filter):
+    """Copy the bound request/session ids and trace id onto each record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.session_id = session_id_var.get()
+        span = current_span()
+        record.trace_id = span.trace_id if span is not None else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records from selected loggers.
+
+    ``rates`` maps logger names to the fraction of records to keep; the
+    longest matching prefix wins. Warnings and errors are never sampled.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        # Longest names first so the most specific rate is found first
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self._cache: dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        if name not in self._cache:
+            self._cache[name] = next(
+                (
+                    rate
+                    for prefix, rate in self.rates
+                    if name == prefix or name.startswith(prefix + ".")
+                ),
+                None,
+            )
+        return self._cache[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate is None or random.random() < rate
+
+
+class AccessLogFilter(logging.Filter):
+    """Drop uvicorn access log lines for excluded paths such as health probes."""
+
+    def __init__(self, exclude_paths: list[str]):
+        super().__init__()
+        self.exclude_paths = set(exclude_paths)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn passes (client, method, path, http_version, status)
+        args = record.args
+        if isinstance(args, tuple) and len(args) >= 3:
+            path = str(args[2]).split("?", 1)[0]
+            return path not in self.exclude_paths
+        return True
+
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "request_id",
+    "session_id",
+    "trace_id",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(timespec="milliseconds")
+            .replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "session_id", "trace_id"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue that never lets a full queue stall the
+    caller (unless the policy is ``block``).
+
+    Policies when the queue is full:
+        drop_new: discard the incoming record
+        drop_oldest: discard the oldest queued record to make room
+        block: wait up to ``block_timeout`` seconds, then discard
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        policy: str = "drop_new",
+        block_timeout: float = 1.0,
+    ):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown log queue policy: {policy}")
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener thread; the handlers there
+        # render message arguments and tracebacks
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.policy == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+
+_queue_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_output_handlers: list[logging.Handler] = []
+
+
+def _start_listener(queue_size: int) -> None:
+    global _listener
+    log_queue = queue.Queue(queue_size)
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(
+        log_queue, *_output_handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def _restart_listener_after_fork() -> None:
+    # Forked workers (gunicorn --preload) inherit the queue but not the
+    # listener thread; give each child its own queue and thread
+    if _listener is not None:
+        _start_listener(_listener.queue.maxsize)
+
+
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and write any later ones synchronously.
+
+    Safe to call more than once; also registered with ``atexit``.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+
+    listener, handler = _listener, _queue_handler
+    _listener = _queue_handler = None
+    # Blocks until every queued record has been handled
+    listener.stop()
+
+    root = logging.getLogger()
+    if handler in root.handlers:
+        root.removeHandler(handler)
+        for output in _output_handlers:
+            root.addHandler(output)
+    for output in _output_handlers:
+        try:
+            output.flush()
+        except (OSError, ValueError):
+            # The stream may already be closed at interpreter exit
+            pass
+    if handler.dropped:
+        root.warning("Dropped %d log records while the queue was full", handler.dropped)
+
+
+atexit.register(shutdown_logging)
+
+
+def _build_formatter(log_format: str) -> logging.Formatter:
+    if log_format == "json":
+        return JsonFormatter()
+    return logging.Formatter(
+        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
+def _build_record_filters(
+    sample_rates: Optional[dict[str, float]]
+) -> list[logging.Filter]:
+    # Attached to the entry handlers, so with the queue they run on the
+    # calling thread before a record is enqueued: sampled-out records are
+    # never queued, and the request's context variables are still visible
+    record_filters: list[logging.Filter] = []
+    if sample_rates:
+        record_filters.append(SamplingFilter(sample_rates))
+    record_filters.append(ContextFilter())
+    return record_filters
+
+
+def _build_output_handlers(
+    log_file: Path,
+    max_files: int,
+    enable_console: bool,
+    level: int,
+    formatter: logging.Formatter,
+) -> list[logging.Handler]:
+    # File handler with daily rotation
+    file_handler = TimedRotatingFileHandlerWithConsistentNaming(
+        filename=str(log_file),
+        when="midnight",
+        interval=1,
+        backupCount=max_files,
+        encoding="utf-8",
+    )
+    handlers: list[logging.Handler] = [file_handler]
+
+    # Console handler (optional)
+    if enable_console:
+        handlers.append(logging.StreamHandler())
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.setLevel(level)
+    return handlers
+
+
 def setup_logging(
     log_level: str = "INFO",
     log_dir: str = "logs",
     app_name: str = "multimind",
     max_files: int = 30,
     enable_console: bool = True,
+    use_queue: bool = True,
+    queue_size: int = 10000,
+    queue_policy: str = "drop_new",
+    log_format: str = "text",
+    sample_rates: Optional[dict[str, float]] = None,
+    access_log_exclude_paths: Optional[list[str]] = None,
 ) -> logging.Logger:
     """
     Set up logging configuration with daily rotation and consistent naming.
@@ -105,46 +381,57 @@ def setup_logging(
         app_name: Application name for log file naming
         max_files: Maximum number of log files to keep
         enable_console: Whether to enable console logging
+        use_queue: Write logs from a background thread via a bounded queue
+        queue_size: Maximum number of records waiting to be written
+        queue_policy: What to do when the queue is full (see
+            ``BoundedQueueHandler``)
+        log_format: "text" for human-readable lines, "json" for one JSON
+            object per line
+        sample_rates: Fraction of sub-WARNING records to keep, per logger
+        access_log_exclude_paths: Paths left out of the uvicorn access log
 
     Returns:
         Configured logger instance
     """
+    global _queue_handler
+    # Stop a previous listener so its thread does not leak
+    shutdown_logging()
+
     # Create logs directory
     log_path = Path(log_dir)
     log_path.mkdir(parents=True, exist_ok=True)
 
     # Configure root logger
+    level = getattr(logging, log_level.upper())
     logger = logging.getLogger()
-    logger.setLevel(getattr(logging, log_level.upper()))
+    logger.setLevel(level)
 
     # Clear any existing handlers
     logger.handlers.clear()
-
-    # Create formatter
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+    _output_handlers.clear()
+
+    _output_handlers.extend(
+        _build_output_handlers(
+            log_path / f"{app_name}.log",
+            max_files,
+            enable_console,
+            level,
+            _build_formatter(log_format),
+        )
     )
 
-    # File handler with daily rotation
-    log_file = log_path / f"{app_name}.log"
-    file_handler = TimedRotatingFileHandlerWithConsistentNaming(
-        filename=str(log_file),
-        when="midnight",
-        interval=1,
-        backupCount=max_files,
-        encoding="utf-8",
-    )
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(getattr(logging, log_level.upper()))
-    logger.addHandler(file_handler)
-
-    # Console handler (optional)
-    if enable_console:
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        console_handler.setLevel(getattr(logging, log_level.upper()))
-        logger.addHandler(console_handler)
+    if use_queue:
+        _queue_handler = BoundedQueueHandler(queue.Queue(queue_size), queue_policy)
+        entry_handlers = [_queue_handler]
+    else:
+        entry_handlers = list(_output_handlers)
+    record_filters = _build_record_filters(sample_rates)
+    for handler in entry_handlers:
+        for record_filter in record_filters:
+            handler.addFilter(record_filter)
+        logger.addHandler(handler)
+    if use_queue:
+        _start_listener(queue_size)
 
     # Set up uvicorn loggers to use our configuration
     uvicorn_logger = logging.getLogger("uvicorn")
@@ -156,6 +443,12 @@ def setup_logging(
         logger_name.handlers.clear()
         logger_name.propagate = True
 
+    for existing in list(uvicorn_access_logger.filters):
+        if isinstance(existing, AccessLogFilter):
+            uvicorn_access_logger.removeFilter(existing)
+    if access_log_exclude_paths:
+        uvicorn_access_logger.addFilter(AccessLogFilter(access_log_exclude_paths))
+
     return logger
 
 
@@ -185,4 +478,26 @@ def init_logging():
         app_name="multimind",
         max_files=settings.log_max_files,
         enable_console=settings.log_enable_console,
+        use_queue=settings.log_queue_enabled,
+        queue_size=settings.log_queue_size,
+        queue_policy=settings.log_queue_policy,
+        log_format=settings.log_format,
+        sample_rates=settings.log_sample_rates,
+        access_log_exclude_paths=settings.log_access_exclude_paths,
     )
+
+
+def dropped_log_records() -> int:
+    """Records discarded because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+@metrics.registry.collector
+def logging_metrics():
+    return [
+        metrics.MetricFamily(
+            "log_records_dropped_total",
+            "counter",
+            "Log records dropped because the log queue was full",
+        ).add(dropped_log_records())
+    ]
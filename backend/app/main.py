@@ -2,12 +2,24 @@ import os
 import re
 
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
-from app.api.v1 import agents, chat, health
+from app.api.v1 import agents, chat, chat_ws, debug, health, metrics, usage
 from app.config import settings
 from app.logging_config import get_logger, init_logging
+from app.utils.compression import CompressionMiddleware
+from app.utils.db import QueryStatsMiddleware
+from app.utils.log_context import RequestContextMiddleware
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import (
+    ProfilingMiddleware,
+    profile_sync_endpoints,
+    profiling_active,
+)
+from app.utils.rate_limit import RateLimitHeadersMiddleware
+from app.utils.tracing import TracingMiddleware, tracer
 
 # Initialize logging first
 init_logging()
@@ -86,7 +98,9 @@ class CustomCORSMiddleware(BaseHTTPMiddleware):
         return response
 
 
-app = FastAPI(title="Multimind API", version="1.0.0")
+app = FastAPI(
+    title="Multimind API", version="1.0.0", default_response_class=ORJSONResponse
+)
 
 # Add custom CORS middleware that supports wildcard patterns
 app.add_middleware(
@@ -107,6 +121,38 @@ app.add_middleware(
     ],
 )
 
+app.add_middleware(RateLimitHeadersMiddleware)
+
+# Compress large JSON and streamed responses for clients that accept it
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+        exclude_paths=settings.compression_exclude_paths,
+    )
+
+# Server spans continue the caller's W3C traceparent
+if tracer.enabled:
+    app.add_middleware(TracingMiddleware)
+
+# Query count and DB time per request, for spotting N+1 patterns
+if settings.db_query_headers and settings.environment != "production":
+    app.add_middleware(QueryStatsMiddleware)
+
+# Debug-only request profiling; not installed at all unless enabled
+if profiling_active():
+    app.add_middleware(ProfilingMiddleware)
+
+# Request ids for log correlation, echoed in X-Request-ID
+app.add_middleware(RequestContextMiddleware)
+
+# Outermost, so latency covers every other middleware
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Log application startup
 logger.info("Starting Multimind API application")
 logger.info(f"Environment: {os.getenv('ENVIRONMENT', 'development')}")
@@ -116,29 +162,35 @@ logger.info(f"CORS origins: {settings.effective_cors_origins}")
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(agents.router, prefix="/api/v1/agents", tags=["agents"])
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["chat"])
+app.include_router(chat_ws.router, prefix="/api/v1/chat", tags=["chat"])
+app.include_router(usage.router, prefix="/api/v1/usage", tags=["usage"])
+if settings.metrics_enabled:
+    app.include_router(metrics.router, tags=["metrics"])
+if debug.debug_routes_active():
+    app.include_router(debug.router, prefix="/api/v1/debug", tags=["debug"])
 
 # Include test endpoints only in test environment
 if os.getenv("ENVIRONMENT") == "test":
     app.include_router(test_endpoints.router, prefix="/api/v1/test", tags=["test"])
     logger.info("Test endpoints enabled")
 
+if profiling_active():
+    profile_sync_endpoints(app)
+
 
 # Add startup and shutdown event handlers
 @app.on_event("startup")
 async def startup_event():
     logger.info("Application startup initiated")
 
-    # Test database connection
-    try:
-        from app.utils.db import engine
+    # Probe the database, LLM provider and cache in the background; the
+    # first round also reports their state in the startup logs
+    from app.services.health_monitor import health_monitor
 
-        with engine.connect() as conn:
-            conn.execute("SELECT 1")
-        logger.info("Database connection test successful")
-    except Exception as e:
-        logger.error(f"Database connection test failed: {e}")
+    if settings.health_monitor_enabled:
+        health_monitor.start()
 
-    # Test Supabase client if configured
+    # Test Supabase client if configured (the client is synchronous)
     try:
         from app.utils.supabase_client import (
             is_supabase_configured,
@@ -150,9 +202,46 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"Supabase client test failed: {e}")
 
+    # Event-loop lag metric, plus stack dumps of blocking calls when enabled
+    from app.utils.loop_monitor import loop_monitor
+
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+
+    # tracemalloc for /api/v1/debug/memory, only when explicitly enabled
+    from app.utils.memory import memory_tracker, tracking_active
+
+    if tracking_active():
+        memory_tracker.start()
+
+    # Resume queued async-mode jobs, including ones left over from a restart
+    from app.services.job_worker import job_workers
+
+    job_workers.start()
+
     logger.info("Application startup completed")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutdown initiated")
+
+    from app.services.job_worker import job_workers
+
+    await job_workers.stop()
+
+    from app.services.health_monitor import health_monitor
+
+    await health_monitor.stop()
+
+    from app.utils.loop_monitor import loop_monitor
+
+    await loop_monitor.stop()
+
+    # Close the pooled provider connections
+    from app.external.openai_client import close_async_openai_client
+
+    await close_async_openai_client()
+
+    # Flush spans still waiting in the export queue
+    tracer.shutdown()
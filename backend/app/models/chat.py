@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -36,3 +36,56 @@ class Message(Base):
 
     session = relationship("ChatSession")
     agent = relationship("Agent")
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of the request
+    status = Column(String(20), nullable=False)  # "pending" or "completed"
+    response_status = Column(Integer)
+    response_body = Column(Text)
+    response_headers = Column(Text)  # JSON object of headers to replay
+    locked_until = Column(DateTime(timezone=True))  # Pending rows expire here
+    expires_at = Column(DateTime(timezone=True), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ChatJob(Base):
+    __tablename__ = "chat_jobs"
+
+    id = Column(String(36), primary_key=True)  # uuid4, handed out to clients
+    session_id = Column(String(255), ForeignKey("chat_sessions.id"), index=True)
+    user_message_id = Column(Integer, ForeignKey("messages.id"))
+    agent_id = Column(Integer, ForeignKey("agents.id"))
+    status = Column(String(20), nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    response_message_id = Column(Integer, ForeignKey("messages.id"))
+    error = Column(Text)
+    available_at = Column(DateTime(timezone=True))  # Earliest next attempt
+    locked_until = Column(DateTime(timezone=True))  # Lease while running
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class MessageUsage(Base):
+    """Provider usage and latency for one generated agent reply."""
+
+    __tablename__ = "message_usage"
+
+    id = Column(Integer, primary_key=True)
+    message_id = Column(Integer, ForeignKey("messages.id"), unique=True, nullable=False)
+    session_id = Column(String(255), ForeignKey("chat_sessions.id"), index=True)
+    agent_id = Column(Integer, ForeignKey("agents.id"), index=True)
+    model = Column(String(100))
+    mode = Column(String(20), nullable=False)  # "complete" or "stream"
+    outcome = Column(String(20), nullable=False)  # "ok", "error" or "cancelled"
+    prompt_tokens = Column(Integer)  # NULL when the provider did not report usage
+    completion_tokens = Column(Integer)
+    cached_tokens = Column(Integer)
+    latency_ms = Column(Float)
+    ttft_ms = Column(Float)  # Streaming only
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,22 +1,26 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 
 from app.models import chat as models
+from app.utils.tracing import traced
 
 
+@traced()
 def get_agents(db: Session):
     return db.query(models.Agent).all()
 
 
+@traced()
 async def get_agents_async(db: AsyncSession) -> List[models.Agent]:
     """Get all agents asynchronously."""
     result = await db.execute(select(models.Agent))
     return result.scalars().all()
 
 
+@traced()
 async def get_agent_by_name_async(
     db: AsyncSession, name: str
 ) -> Optional[models.Agent]:
@@ -25,9 +29,24 @@ async def get_agent_by_name_async(
     return result.scalar_one_or_none()
 
 
+@traced()
 async def get_agent_by_id_async(
     db: AsyncSession, agent_id: int
 ) -> Optional[models.Agent]:
     """Get agent by ID asynchronously."""
     result = await db.execute(select(models.Agent).where(models.Agent.id == agent_id))
     return result.scalar_one_or_none()
+
+
+@traced()
+async def get_agents_by_ids_async(
+    db: AsyncSession, agent_ids: Iterable[int]
+) -> List[models.Agent]:
+    """Get the agents with the given IDs in one query."""
+    agent_ids = set(agent_ids)
+    if not agent_ids:
+        return []
+    result = await db.execute(
+        select(models.Agent).where(models.Agent.id.in_(agent_ids))
+    )
+    return result.scalars().all()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,8 +7,10 @@ from sqlalchemy.orm import Session
 
 from app.models import chat as models
 from app.schemas import chat as schemas
+from app.utils.tracing import traced
 
 
+@traced()
 def create_session(db: Session, session_id: str) -> models.ChatSession:
     """Create a chat session synchronously."""
     db_session = models.ChatSession(id=session_id)
@@ -27,6 +29,7 @@ def create_session(db: Session, session_id: str) -> models.ChatSession:
         )
 
 
+@traced()
 def create_message(db: Session, message: schemas.MessageCreate):
     # Ensure the session exists
     create_session(db, message.session_id)
@@ -40,12 +43,14 @@ def create_message(db: Session, message: schemas.MessageCreate):
     return db_message
 
 
+@traced()
 def get_messages_by_session(db: Session, session_id: str):
     return (
         db.query(models.Message).filter(models.Message.session_id == session_id).all()
     )
 
 
+@traced()
 async def create_session_async(db: AsyncSession, session_id: str) -> models.ChatSession:
     """Create a chat session asynchronously."""
     db_session = models.ChatSession(id=session_id)
@@ -63,10 +68,15 @@ async def create_session_async(db: AsyncSession, session_id: str) -> models.Chat
         return result.scalar_one()
 
 
+@traced()
 async def create_message_async(
-    db: AsyncSession, message: schemas.MessageCreate
+    db: AsyncSession, message: schemas.MessageCreate, usage: Optional[dict] = None
 ) -> models.Message:
-    """Create message asynchronously."""
+    """Create message asynchronously.
+
+    ``usage`` (see ``LLMCompletion.usage_fields``) records provider usage for
+    an agent reply in the same transaction.
+    """
     # Ensure the session exists
     await create_session_async(db, message.session_id)
 
@@ -74,20 +84,62 @@ async def create_message_async(
     message_data = message.model_dump(exclude={"mentions"})
     db_message = models.Message(**message_data)
     db.add(db_message)
+    if usage is not None:
+        await db.flush()
+        db.add(usage_row(db_message, usage))
     await db.commit()
     await db.refresh(db_message)
     return db_message
 
 
+@traced()
 async def get_messages_by_session_async(
-    db: AsyncSession, session_id: str, limit: int = 50
+    db: AsyncSession,
+    session_id: str,
+    limit: int = 50,
+    before_id: Optional[int] = None,
 ) -> List[models.Message]:
-    """Get messages by session asynchronously with optional limit."""
+    """Get messages by session asynchronously with optional limit.
+
+    ``before_id`` restricts the result to messages older than that id.
+    """
+    query = select(models.Message).where(models.Message.session_id == session_id)
+    if before_id is not None:
+        query = query.where(models.Message.id < before_id)
+    result = await db.execute(query.order_by(models.Message.id.desc()).limit(limit))
+    messages = result.scalars().all()
+    return list(reversed(messages))  # Return in chronological order
+
+
+@traced()
+async def get_message_by_id_async(
+    db: AsyncSession, message_id: int
+) -> Optional[models.Message]:
+    result = await db.execute(
+        select(models.Message).where(models.Message.id == message_id)
+    )
+    return result.scalar_one_or_none()
+
+
+@traced()
+async def get_messages_after_async(
+    db: AsyncSession, session_id: str, after_id: int, limit: int = 200
+) -> List[models.Message]:
+    """Get messages newer than ``after_id`` in chronological order."""
     result = await db.execute(
         select(models.Message)
-        .where(models.Message.session_id == session_id)
-        .order_by(models.Message.id.desc())
+        .where(models.Message.session_id == session_id, models.Message.id > after_id)
+        .order_by(models.Message.id)
         .limit(limit)
     )
-    messages = result.scalars().all()
-    return list(reversed(messages))  # Return in chronological order
+    return list(result.scalars().all())
+
+
+def usage_row(message: models.Message, usage: dict) -> models.MessageUsage:
+    """Ledger row for a flushed agent reply."""
+    return models.MessageUsage(
+        message_id=message.id,
+        session_id=message.session_id,
+        agent_id=message.agent_id,
+        **usage,
+    )
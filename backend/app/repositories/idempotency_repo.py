@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models import chat as models
+from app.utils.tracing import traced
+
+
+@traced()
+async def get_key_async(db: AsyncSession, key: str) -> Optional[models.IdempotencyKey]:
+    result = await db.execute(
+        select(models.IdempotencyKey)
+        .where(models.IdempotencyKey.key == key)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+@traced()
+async def claim_key_async(
+    db: AsyncSession,
+    key: str,
+    fingerprint: str,
+    locked_until: datetime,
+    expires_at: datetime,
+) -> tuple[Optional[models.IdempotencyKey], bool]:
+    """Insert a pending record for ``key``.
+
+    Returns ``(record, True)`` when this caller now owns the key, or the
+    existing record and False when another request got there first.
+    """
+    record = models.IdempotencyKey(
+        key=key,
+        fingerprint=fingerprint,
+        status="pending",
+        locked_until=locked_until,
+        expires_at=expires_at,
+    )
+    db.add(record)
+    try:
+        await db.commit()
+        return record, True
+    except IntegrityError:
+        await db.rollback()
+        return await get_key_async(db, key), False
+
+
+@traced()
+async def complete_key_async(
+    db: AsyncSession,
+    key: str,
+    response_status: int,
+    response_body: str,
+    response_headers: Optional[str] = None,
+) -> None:
+    record = await get_key_async(db, key)
+    if record is None:
+        return
+    record.status = "completed"
+    record.response_status = response_status
+    record.response_body = response_body
+    record.response_headers = response_headers
+    record.locked_until = None
+    await db.commit()
+
+
+@traced()
+async def delete_key_async(db: AsyncSession, key: str) -> None:
+    await db.execute(
+        delete(models.IdempotencyKey).where(models.IdempotencyKey.key == key)
+    )
+    await db.commit()
+
+
+@traced()
+async def delete_expired_keys_async(db: AsyncSession, now: datetime) -> int:
+    result = await db.execute(
+        delete(models.IdempotencyKey).where(models.IdempotencyKey.expires_at < now)
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,206 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, exists, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session, aliased
+
+from app.models import chat as models
+from app.repositories.chat_repo import create_session_async, usage_row
+from app.schemas import chat as schemas
+from app.utils.tracing import traced
+
+PENDING_STATUSES = ("queued", "running")
+
+
+@traced()
+async def create_job_async(
+    db: AsyncSession,
+    job_id: str,
+    message: schemas.MessageCreate,
+    agent_id: int,
+    now: datetime,
+) -> tuple[models.ChatJob, models.Message]:
+    """Persist the user message and its job in one transaction."""
+    await create_session_async(db, message.session_id)
+
+    user_message = models.Message(
+        content=message.content, session_id=message.session_id
+    )
+    db.add(user_message)
+    await db.flush()
+
+    job = models.ChatJob(
+        id=job_id,
+        session_id=message.session_id,
+        user_message_id=user_message.id,
+        agent_id=agent_id,
+        status="queued",
+        attempts=0,
+        available_at=now,
+        # Explicit so FIFO order does not depend on the server clock resolution
+        created_at=now,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(user_message)
+    await db.refresh(job)
+    return job, user_message
+
+
+@traced()
+async def get_job_async(db: AsyncSession, job_id: str) -> Optional[models.ChatJob]:
+    result = await db.execute(
+        select(models.ChatJob)
+        .where(models.ChatJob.id == job_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+def _claimable(now: datetime):
+    """Queued jobs that are due, or running jobs whose lease ran out.
+
+    A job is skipped while its session has a live running job or an older
+    job that is still pending (e.g. waiting out a retry backoff), so turns
+    in one session are generated in order.
+    """
+    other = aliased(models.ChatJob)
+    older = or_(
+        other.created_at < models.ChatJob.created_at,
+        and_(
+            other.created_at == models.ChatJob.created_at,
+            other.id < models.ChatJob.id,
+        ),
+    )
+    return and_(
+        or_(
+            and_(
+                models.ChatJob.status == "queued",
+                models.ChatJob.available_at <= now,
+            ),
+            and_(
+                models.ChatJob.status == "running",
+                models.ChatJob.locked_until < now,
+            ),
+        ),
+        ~exists().where(
+            other.session_id == models.ChatJob.session_id,
+            other.id != models.ChatJob.id,
+            or_(
+                and_(other.status == "running", other.locked_until >= now),
+                and_(other.status.in_(PENDING_STATUSES), older),
+            ),
+        ),
+    )
+
+
+@traced()
+async def claim_next_job_async(
+    db: AsyncSession, now: datetime, locked_until: datetime
+) -> Optional[models.ChatJob]:
+    """Atomically move the oldest claimable job to ``running``."""
+    for _ in range(3):
+        result = await db.execute(
+            select(models.ChatJob.id)
+            .where(_claimable(now))
+            .order_by(models.ChatJob.created_at, models.ChatJob.id)
+            .limit(1)
+        )
+        job_id = result.scalar_one_or_none()
+        if job_id is None:
+            return None
+
+        # Re-check the predicate so only one worker wins a race
+        claimed = await db.execute(
+            update(models.ChatJob)
+            .where(models.ChatJob.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                locked_until=locked_until,
+                attempts=models.ChatJob.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if claimed.rowcount == 1:
+            return await get_job_async(db, job_id)
+    return None
+
+
+@traced()
+async def complete_job_async(
+    db: AsyncSession,
+    job_id: str,
+    reply: schemas.MessageCreate,
+    usage: Optional[dict] = None,
+) -> tuple[models.ChatJob, models.Message]:
+    """Save the agent reply, its usage and mark the job completed together."""
+    reply_message = models.Message(**reply.model_dump(exclude={"mentions"}))
+    db.add(reply_message)
+    await db.flush()
+    if usage is not None:
+        db.add(usage_row(reply_message, usage))
+
+    await db.execute(
+        update(models.ChatJob)
+        .where(models.ChatJob.id == job_id)
+        .values(
+            status="completed",
+            response_message_id=reply_message.id,
+            locked_until=None,
+            error=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await db.refresh(reply_message)
+    return await get_job_async(db, job_id), reply_message
+
+
+@traced()
+async def reschedule_job_async(
+    db: AsyncSession,
+    job_id: str,
+    status: str,
+    error: Optional[str] = None,
+    available_at: Optional[datetime] = None,
+    refund_attempt: bool = False,
+) -> Optional[models.ChatJob]:
+    """Put a job back in the queue, or mark it failed."""
+    values = {
+        "status": status,
+        "error": error,
+        "available_at": available_at,
+        "locked_until": None,
+    }
+    if refund_attempt:
+        values["attempts"] = models.ChatJob.attempts - 1
+    await db.execute(
+        update(models.ChatJob)
+        .where(models.ChatJob.id == job_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return await get_job_async(db, job_id)
+
+
+@traced()
+async def count_jobs_by_status_async(db: AsyncSession) -> dict[str, int]:
+    result = await db.execute(
+        select(models.ChatJob.status, func.count()).group_by(models.ChatJob.status)
+    )
+    return {status: count for status, count in result.all()}
+
+
+@traced()
+def count_pending_jobs_by_session(db: Session) -> dict[str, int]:
+    rows = (
+        db.query(models.ChatJob.session_id, func.count(models.ChatJob.id))
+        .filter(models.ChatJob.status.in_(PENDING_STATUSES))
+        .group_by(models.ChatJob.session_id)
+        .all()
+    )
+    return {session_id: count for session_id, count in rows}
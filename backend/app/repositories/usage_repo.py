@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models import chat as models
+from app.utils.tracing import traced
+
+_Usage = models.MessageUsage
+
+
+def _rollup_columns():
+    return (
+        func.count(_Usage.id).label("messages"),
+        func.coalesce(func.sum(_Usage.prompt_tokens), 0).label("prompt_tokens"),
+        func.coalesce(func.sum(_Usage.completion_tokens), 0).label("completion_tokens"),
+        func.coalesce(func.sum(_Usage.cached_tokens), 0).label("cached_tokens"),
+        func.avg(_Usage.latency_ms).label("avg_latency_ms"),
+        func.max(_Usage.latency_ms).label("max_latency_ms"),
+        func.avg(_Usage.ttft_ms).label("avg_ttft_ms"),
+        func.sum(case((_Usage.outcome == "ok", 0), else_=1)).label("errors"),
+    )
+
+
+def _rollup(row) -> dict:
+    data = dict(row._mapping)
+    data["total_tokens"] = data["prompt_tokens"] + data["completion_tokens"]
+    for key in ("avg_latency_ms", "max_latency_ms", "avg_ttft_ms"):
+        if data[key] is not None:
+            data[key] = round(float(data[key]), 1)
+    return data
+
+
+@traced()
+async def get_usage_by_agent_async(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    session_id: Optional[str] = None,
+) -> list[dict]:
+    """Token and latency totals per agent, optionally for one session."""
+    query = (
+        select(
+            _Usage.agent_id,
+            models.Agent.name.label("agent_name"),
+            *_rollup_columns(),
+        )
+        .outerjoin(models.Agent, models.Agent.id == _Usage.agent_id)
+        .group_by(_Usage.agent_id, models.Agent.name)
+        .order_by(_Usage.agent_id)
+    )
+    if since is not None:
+        query = query.where(_Usage.created_at >= since)
+    if session_id is not None:
+        query = query.where(_Usage.session_id == session_id)
+    result = await db.execute(query)
+    return [_rollup(row) for row in result]
+
+
+@traced()
+async def get_usage_for_session_async(db: AsyncSession, session_id: str) -> dict:
+    """Token and latency totals for one session."""
+    result = await db.execute(
+        select(*_rollup_columns()).where(_Usage.session_id == session_id)
+    )
+    totals = _rollup(result.one())
+    totals["errors"] = totals["errors"] or 0
+    return totals
+
+
+@traced()
+async def get_message_usage_async(
+    db: AsyncSession, message_id: int
+) -> Optional[models.MessageUsage]:
+    result = await db.execute(select(_Usage).where(_Usage.message_id == message_id))
+    return result.scalar_one_or_none()
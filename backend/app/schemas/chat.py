@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class MessageBase(BaseModel):
@@ -41,3 +41,30 @@ class Message(MessageBase):
             return cls(**data)
         else:  # Dict or other data
             return super().model_validate(obj, **kwargs)
+
+
+class MessageBatchCreate(BaseModel):
+    messages: List[MessageCreate] = Field(..., min_length=1)
+
+
+class UsageRollup(BaseModel):
+    messages: int
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    total_tokens: int
+    avg_latency_ms: Optional[float] = None
+    max_latency_ms: Optional[float] = None
+    avg_ttft_ms: Optional[float] = None
+    errors: int
+
+
+class AgentUsage(UsageRollup):
+    agent_id: Optional[int] = None
+    agent_name: Optional[str] = None
+
+
+class SessionUsage(BaseModel):
+    session_id: str
+    totals: UsageRollup
+    agents: List[AgentUsage]
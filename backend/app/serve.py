@@ -0,0 +1,163 @@
+"""
+Production entry point: ``python -m app.serve``.
+
+Runs the API under gunicorn with uvicorn workers when gunicorn is installed
+(see ``requirements/prod.txt``), otherwise under uvicorn's own process
+manager. Workers default to the number of CPUs available to the container,
+use uvloop/httptools when present, and are recycled after a configurable
+number of requests to contain memory growth.
+
+Keep-alive and graceful-timeout defaults are sized for LLM latency: idle
+connections outlive a typical 60s load-balancer timeout, and workers being
+recycled or shut down get enough time to finish in-flight generations.
+
+Per-process state (rate-limit buckets, LLM admission slots, WebSocket
+subscriptions) is not shared between workers, so ``LLM_MAX_CONCURRENCY``
+and friends apply per worker. ``/metrics`` only reports the worker that
+answered the scrape, so it is only meaningful with a single worker.
+"""
+
+import argparse
+import importlib.util
+import math
+import os
+import sys
+from typing import Optional
+
+from app.config import settings
+
+APP_URI = "app.main:app"
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and cgroup quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS
+        cpus = os.cpu_count() or 1
+
+    # cgroup v2 CPU quota, e.g. "200000 100000" for two CPUs
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def worker_count(requested: Optional[int] = None) -> int:
+    """Workers to run: explicit value, ``WEB_WORKERS``, or one per CPU."""
+    workers = requested or settings.web_workers
+    return workers if workers > 0 else available_cpus()
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def gunicorn_options(host: str, port: int, workers: int) -> dict:
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": settings.web_preload,
+        "keepalive": settings.web_keepalive,
+        "graceful_timeout": settings.web_graceful_timeout,
+        "timeout": settings.web_worker_timeout,
+        "max_requests": settings.web_max_requests,
+        "max_requests_jitter": settings.web_max_requests_jitter,
+        "forwarded_allow_ips": settings.web_forwarded_allow_ips,
+        "accesslog": "-" if settings.web_access_log else None,
+        "errorlog": "-",
+    }
+
+
+def uvicorn_options(host: str, port: int, workers: int) -> dict:
+    return {
+        "host": host,
+        "port": port,
+        "workers": workers,
+        "loop": "uvloop" if _has_module("uvloop") else "asyncio",
+        "http": "httptools" if _has_module("httptools") else "h11",
+        "timeout_keep_alive": settings.web_keepalive,
+        "timeout_graceful_shutdown": settings.web_graceful_timeout,
+        # uvicorn has no jitter, so all workers recycle at the same count
+        "limit_max_requests": settings.web_max_requests or None,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.web_forwarded_allow_ips,
+        "access_log": settings.web_access_log,
+    }
+
+
+def run_gunicorn(options: dict) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    Application().run()
+
+
+def run_uvicorn(options: dict) -> None:
+    import uvicorn
+
+    uvicorn.run(APP_URI, **options)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Multimind API")
+    parser.add_argument("--host", default=settings.web_host)
+    parser.add_argument(
+        "--port", type=int, default=int(os.getenv("PORT", settings.web_port))
+    )
+    parser.add_argument("--workers", type=int, help="Default: one per CPU")
+    parser.add_argument(
+        "--server", choices=("auto", "gunicorn", "uvicorn"), default="auto"
+    )
+    parser.add_argument(
+        "--print-config",
+        action="store_true",
+        help="Show the resolved server options and exit",
+    )
+    args = parser.parse_args(argv)
+
+    workers = worker_count(args.workers)
+    server = args.server
+    if server == "auto":
+        server = "gunicorn" if _has_module("gunicorn") else "uvicorn"
+
+    if server == "gunicorn":
+        options = gunicorn_options(args.host, args.port, workers)
+    else:
+        options = uvicorn_options(args.host, args.port, workers)
+
+    if args.print_config:
+        print(f"server: {server}")
+        for key, value in options.items():
+            print(f"{key}: {value}")
+        return
+
+    if workers > 1 and settings.metrics_enabled:
+        print(
+            f"warning: /metrics reports one of {workers} workers per scrape; "
+            "run a single worker per instance for usable metrics",
+            file=sys.stderr,
+        )
+    if server == "gunicorn":
+        run_gunicorn(options)
+    else:
+        run_uvicorn(options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Batch execution of chat messages through the regular chat pipeline.
+
+Messages for the same session run strictly in submission order so every
+turn sees the previous one in its context; different sessions run in
+parallel, bounded by a semaphore. Each item gets its own database session
+and its own result status, so one failure never aborts the batch.
+"""
+
+import asyncio
+from typing import AsyncIterator, Iterable
+
+from app.logging_config import get_logger
+from app.schemas.chat import MessageCreate
+from app.services import chat_service
+from app.utils.admission import AdmissionRejectedError
+from app.utils.db import async_session_scope
+from app.utils.log_context import bind_session
+
+logger = get_logger(__name__)
+
+
+async def _run_item(index: int, message: MessageCreate) -> dict:
+    bind_session(message.session_id)
+    try:
+        async with async_session_scope() as db:
+            result = await chat_service.create_message_async(db, message)
+        return {"index": index, "status": 200, "result": result}
+    except ValueError as e:
+        return {"index": index, "status": 400, "error": str(e)}
+    except AdmissionRejectedError as e:
+        return {
+            "index": index,
+            "status": 503,
+            "error": "Agents are busy right now. Please retry shortly.",
+            "retry_after": e.retry_after,
+        }
+    except Exception as e:
+        logger.error(f"Batch item {index} failed: {str(e)}")
+        return {"index": index, "status": 500, "error": "Internal server error"}
+
+
+async def run_batch_async(
+    items: Iterable[tuple[int, MessageCreate]], concurrency: int
+) -> AsyncIterator[dict]:
+    """Run indexed messages and yield per-item results as they complete."""
+    groups: dict[str, list[tuple[int, MessageCreate]]] = {}
+    for index, message in items:
+        groups.setdefault(message.session_id, []).append((index, message))
+
+    total = sum(len(group) for group in groups.values())
+    semaphore = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue[dict] = asyncio.Queue()
+
+    async def run_group(group: list[tuple[int, MessageCreate]]) -> None:
+        for index, message in group:
+            async with semaphore:
+                result = await _run_item(index, message)
+            results.put_nowait(result)
+
+    tasks = [asyncio.create_task(run_group(group)) for group in groups.values()]
+    try:
+        for _ in range(total):
+            yield await results.get()
+    finally:
+        # Stop outstanding work if the consumer goes away (e.g. client hung up)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
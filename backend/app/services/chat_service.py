@@ -1,13 +1,23 @@
 import logging
-from typing import List
+import uuid
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional
 
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from app.repositories import agent_repo, chat_repo
+from app.external.openai_client import LLMCompletion
+from app.models.chat import Agent, ChatJob, Message
+from app.repositories import agent_repo, chat_repo, job_repo
 from app.schemas.chat import MessageCreate
 from app.services import llm_service
-from app.utils.mention_parser import parse_mention
+from app.services.job_stats import job_stats
+from app.services.session_hub import session_hub
+from app.utils.mention_parser import mention_index, parse_mention
+from app.utils.serialization import serialize_job, serialize_message
+from app.utils.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -22,70 +32,288 @@ class ChatService:
 async def create_message_async(db: AsyncSession, message: MessageCreate) -> dict:
     """Create message with async database operations."""
     try:
-        # Parse mention to find target agent
-        agent_name = parse_mention(message.content)
+        with tracer.span(
+            "chat.create_message", {"chat.session_id": message.session_id}
+        ) as span:
+            agent = await _resolve_agent_async(db, message.content)
 
-        if not agent_name:
-            raise ValueError(
-                "No agent mentioned in message. Please mention an agent "
-                "using @AgentName format."
-            )
+            # Access agent attributes while session is active
+            agent_id = agent.id
+            agent_name_str = agent.name
+            span.set_attribute("chat.agent", agent_name_str)
 
-        # Get agent by name
-        agent = await agent_repo.get_agent_by_name_async(db, agent_name)
-        if not agent:
-            raise ValueError(f"Agent '{agent_name}' not found.")
+            # Build context from session history
+            with tracer.span("chat.build_context"):
+                context = await _build_context_async(db, message.session_id)
+
+            # Generate LLM response
+            with tracer.span("chat.generate", {"chat.context_messages": len(context)}):
+                completion = await llm_service.generate_completion_async(
+                    agent=agent, context=context, user_message=message.content
+                )
+            response_content = completion.content
+
+            with tracer.span("chat.save_exchange"):
+                response_message = await _save_exchange_async(
+                    db, message, response_content, agent_id, completion.usage_fields()
+                )
+        return _reply_payload(
+            response_message, message, response_content, agent_id, agent_name_str
+        )
+
+    except Exception as e:
+        logger.error(f"Error creating message: {str(e)}")
+        raise
+
+
+async def stream_message_async(
+    db: AsyncSession, message: MessageCreate
+) -> AsyncIterator[dict]:
+    """Streaming variant of ``create_message_async``.
 
-        # Access agent attributes while session is active
-        agent_id = agent.id
-        agent_name_str = agent.name
+    Yields a ``progress`` event once the agent is resolved, one ``token``
+    event per text delta, and a final ``done`` event carrying the same
+    payload ``create_message_async`` returns.
+    """
+    agent = await _resolve_agent_async(db, message.content)
+    agent_id = agent.id
+    agent_name_str = agent.name
 
-        # Build context from session history
-        context = await _build_context_async(db, message.session_id)
+    context = await _build_context_async(db, message.session_id)
+    yield {
+        "type": "progress",
+        "stage": "generating",
+        "agent_id": agent_id,
+        "agent_name": agent_name_str,
+    }
 
-        # Generate LLM response
-        response_content = await llm_service.generate_response_async(
-            agent=agent, context=context, user_message=message.content
+    parts = []
+    completion = LLMCompletion(content="", mode="stream")
+    async with aclosing(
+        llm_service.stream_response_async(
+            agent=agent,
+            context=context,
+            user_message=message.content,
+            completion=completion,
         )
+    ) as deltas:
+        async for delta in deltas:
+            parts.append(delta)
+            yield {"type": "token", "delta": delta}
 
-        # Save user message
-        await chat_repo.create_message_async(db, message)
+    response_content = "".join(parts).strip()
+    response_message = await _save_exchange_async(
+        db, message, response_content, agent_id, completion.usage_fields()
+    )
+    yield {
+        "type": "done",
+        "message": _reply_payload(
+            response_message, message, response_content, agent_id, agent_name_str
+        ),
+    }
 
-        # Save agent response
-        agent_response = MessageCreate(
-            content=response_content, session_id=message.session_id, agent_id=agent_id
+
+async def enqueue_message_async(db: AsyncSession, message: MessageCreate) -> dict:
+    """Persist the user message and queue its reply for the job workers.
+
+    Returns the serialized job; the reply is generated by
+    ``process_job_async`` in the background.
+    """
+    agent = await _resolve_agent_async(db, message.content)
+
+    job, user_message = await job_repo.create_job_async(
+        db, str(uuid.uuid4()), message, agent.id, datetime.now(timezone.utc)
+    )
+    job_stats.invalidate()
+    payload = serialize_job(job)
+    if session_hub.has_subscribers(message.session_id):
+        session_hub.publish(
+            message.session_id,
+            {
+                "type": "message",
+                "session_id": message.session_id,
+                "message": serialize_message(user_message),
+            },
         )
-        response_message = await chat_repo.create_message_async(db, agent_response)
-
-        return {
-            "id": response_message.id,
-            "content": response_content,
-            "agent_id": agent_id,
-            "agent_name": agent_name_str,
-            "session_id": message.session_id,
-            "timestamp": (
-                response_message.created_at.isoformat()
-                if hasattr(response_message, "created_at")
-                else None
-            ),
-        }
+    logger.info(f"Queued job {payload['id']} for session: {message.session_id}")
+    return payload
+
+
+async def process_job_async(db: AsyncSession, job: ChatJob) -> dict:
+    """Generate and store the reply for a claimed job.
+
+    Raises on failure so the worker can retry or fail the job.
+    """
+    job_id = job.id
+    session_id = job.session_id
+    user_message_id = job.user_message_id
+
+    agent = await agent_repo.get_agent_by_id_async(db, job.agent_id)
+    user_message = await chat_repo.get_message_by_id_async(db, user_message_id)
+    if agent is None or user_message is None:
+        raise LookupError(f"Job {job_id} refers to a missing agent or message")
+
+    context = await _build_context_async(db, session_id, before_id=user_message_id)
+    completion = await llm_service.generate_completion_async(
+        agent=agent, context=context, user_message=user_message.content
+    )
+    if completion.outcome == "error":
+        # Interactive requests get the fallback apology; a job is retried
+        raise RuntimeError(f"The LLM provider failed to answer job {job_id}")
+
+    job, reply = await job_repo.complete_job_async(
+        db,
+        job_id,
+        MessageCreate(
+            content=completion.content, session_id=session_id, agent_id=agent.id
+        ),
+        usage=completion.usage_fields(),
+    )
+    payload = serialize_job(job)
+    if session_hub.has_subscribers(session_id):
+        session_hub.publish(
+            session_id,
+            {
+                "type": "message",
+                "session_id": session_id,
+                "message": serialize_message(reply),
+            },
+        )
+    publish_job_event(payload)
+    return payload
+
+
+def publish_job_event(job_payload: dict) -> None:
+    """Tell live subscribers of the job's session that its status changed."""
+    job_stats.invalidate()
+    session_hub.publish(
+        job_payload["session_id"],
+        {"type": "job", "session_id": job_payload["session_id"], "job": job_payload},
+    )
+
+
+async def _resolve_agent_async(db: AsyncSession, content: str) -> Agent:
+    """Find the agent mentioned in a message or raise ValueError.
+
+    The first mention of a known agent wins, matched case-insensitively by
+    name or display name. Both the match and the agent come from the mention
+    index, so this needs no query while the index is fresh.
+    """
+    with tracer.span("chat.resolve_agent"):
+        matcher = await mention_index.matcher(db, _load_agents_async)
+        mentions = matcher.find(content)
+
+        if not mentions:
+            agent_name = parse_mention(content)
+            if not agent_name:
+                raise ValueError(
+                    "No agent mentioned in message. Please mention an agent "
+                    "using @AgentName format."
+                )
+            raise ValueError(f"Agent '{agent_name}' not found.")
+
+        agent = mention_index.agent(mentions[0].agent_id)
+        if agent is None:
+            raise ValueError(f"Agent '{mentions[0].text}' not found.")
+        # Callers get their own copy; the indexed row is shared
+        return _detached_agent(agent)
+
+
+async def _load_agents_async(db: AsyncSession) -> List[Agent]:
+    """Agents for the mention index, copied out of ``db`` to outlive it."""
+    return [_detached_agent(agent) for agent in await agent_repo.get_agents_async(db)]
+
+
+def _detached_agent(agent: Agent) -> Agent:
+    """A loaded copy of ``agent`` outside any session, so it never expires."""
+    copy = Agent(
+        **{attr.key: getattr(agent, attr.key) for attr in inspect(Agent).column_attrs}
+    )
+    make_transient_to_detached(copy)
+    return copy
+
+
+async def _save_exchange_async(
+    db: AsyncSession,
+    message: MessageCreate,
+    response_content: str,
+    agent_id: int,
+    usage: Optional[dict] = None,
+) -> Message:
+    """Persist the user message and the agent reply, then notify listeners.
+
+    ``usage`` is stored with the reply in the same transaction.
+    """
+    # Save user message
+    user_message = await chat_repo.create_message_async(db, message)
+    # Serialize now; the next commit expires the instance
+    notify = session_hub.has_subscribers(message.session_id)
+    user_payload = serialize_message(user_message) if notify else None
+
+    # Save agent response
+    agent_response = MessageCreate(
+        content=response_content, session_id=message.session_id, agent_id=agent_id
+    )
+    response_message = await chat_repo.create_message_async(
+        db, agent_response, usage=usage
+    )
+
+    if notify:
+        for payload in (user_payload, serialize_message(response_message)):
+            session_hub.publish(
+                message.session_id,
+                {
+                    "type": "message",
+                    "session_id": message.session_id,
+                    "message": payload,
+                },
+            )
+    return response_message
+
+
+def _reply_payload(
+    response_message: Message,
+    message: MessageCreate,
+    content: str,
+    agent_id: int,
+    agent_name: str,
+) -> dict:
+    return {
+        "id": response_message.id,
+        "content": content,
+        "agent_id": agent_id,
+        "agent_name": agent_name,
+        "session_id": message.session_id,
+        "timestamp": (
+            response_message.created_at.isoformat()
+            if hasattr(response_message, "created_at")
+            else None
+        ),
+    }
 
-    except Exception as e:
-        logger.error(f"Error creating message: {str(e)}")
-        raise
 
+async def _build_context_async(
+    db: AsyncSession, session_id: str, before_id: Optional[int] = None
+) -> List[str]:
+    """Build conversation context from message history.
 
-async def _build_context_async(db: AsyncSession, session_id: str) -> List[str]:
-    """Build conversation context from message history."""
-    messages = await chat_repo.get_messages_by_session_async(db, session_id, limit=10)
+    ``before_id`` excludes an already-persisted user message from its own
+    context when replying to a queued job.
+    """
+    messages = await chat_repo.get_messages_by_session_async(
+        db, session_id, limit=10, before_id=before_id
+    )
+    # One lookup for every agent in the window rather than one per message
+    agents = await agent_repo.get_agents_by_ids_async(
+        db, {msg.agent_id for msg in messages if msg.agent_id}
+    )
+    agent_names = {agent.id: agent.name for agent in agents}
     context = []
 
     for msg in messages:
         if msg.agent_id:
-            agent = await agent_repo.get_agent_by_id_async(db, msg.agent_id)
-            if agent:
-                agent_name = agent.name  # Access name while session is active
-                context.append(f"{agent_name}: {msg.content}")
+            if msg.agent_id in agent_names:
+                context.append(f"{agent_names[msg.agent_id]}: {msg.content}")
         else:
             context.append(f"User: {msg.content}")
 
@@ -0,0 +1,273 @@
+"""
+Cached dependency probes for the readiness endpoint.
+
+``HealthMonitor`` checks the database, the LLM provider and the rate-limit
+backend in the background and keeps the latest result of each, so
+``/api/v1/health/ready`` answers from memory no matter how often an
+orchestrator polls it. Each probe has its own interval and a timeout; a
+hung dependency shows up as a failed probe instead of a hung endpoint.
+
+When the background loop is not running (``HEALTH_MONITOR_ENABLED=false``,
+or a standalone process) the endpoint refreshes stale results itself; a
+lock makes concurrent callers share one round of probes.
+
+Saturation (database pool, LLM admission queue, job workers) is read from
+in-process counters on every call, since it costs nothing. Only the pool and
+the admission queue gate readiness: busy job workers just mean the queue is
+being drained, and the API keeps accepting requests meanwhile.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from app.config import settings
+from app.logging_config import get_logger
+from app.utils import db
+
+logger = get_logger(__name__)
+
+
+class ProbeSkipped(Exception):
+    """Raised by a probe whose dependency is not configured."""
+
+
+@dataclass
+class ProbeResult:
+    status: str  # ok, fail or skipped
+    checked_at: datetime
+    latency_ms: float = 0.0
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "checked_at": self.checked_at.isoformat(),
+            "latency_ms": round(self.latency_ms, 1),
+            "error": self.error,
+        }
+
+
+@dataclass
+class Probe:
+    name: str
+    check: Callable[[], Awaitable[None]]
+    interval: float
+    critical: bool = True  # A failure makes the instance not ready
+    result: Optional[ProbeResult] = field(default=None, repr=False)
+    last_run: float = field(default=0.0, repr=False)  # monotonic
+
+    def due(self, now: float) -> bool:
+        return self.result is None or now - self.last_run >= self.interval
+
+
+async def check_database() -> None:
+    async with db.async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def check_llm() -> None:
+    """List models: authenticates against the provider without using tokens."""
+    if settings.llm_provider != "mock" and not (
+        settings.is_using_azure_openai or settings.openai_api_key
+    ):
+        raise ProbeSkipped("no provider configured")
+
+    from app.external.openai_client import get_async_openai_client
+
+    client = get_async_openai_client().with_options(
+        timeout=settings.health_probe_timeout, max_retries=0
+    )
+    await client.models.list()
+
+
+async def check_cache() -> None:
+    from app.utils.rate_limit import InMemoryRateLimitBackend, rate_limiter
+
+    if isinstance(rate_limiter.backend, InMemoryRateLimitBackend):
+        raise ProbeSkipped("in-process rate limit buckets")
+    await rate_limiter.backend.ping()
+
+
+def default_probes() -> list[Probe]:
+    return [
+        Probe("database", check_database, settings.health_probe_interval),
+        Probe(
+            "llm",
+            check_llm,
+            settings.health_llm_probe_interval,
+            critical=settings.health_llm_required,
+        ),
+        Probe("cache", check_cache, settings.health_probe_interval),
+    ]
+
+
+# Resources whose saturation makes the instance not ready
+READINESS_RESOURCES = ("db_pool", "llm_admission")
+
+
+def _ratio(used: float, capacity: float) -> float:
+    return round(used / capacity, 3) if capacity > 0 else 0.0
+
+
+def saturation() -> dict[str, dict]:
+    """Current use of each bounded resource, from in-process counters."""
+    from app.services.job_worker import job_workers
+    from app.utils.admission import llm_admission
+
+    report = {}
+    pool = db.async_engine.sync_engine.pool
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+        report["db_pool"] = {
+            "checked_out": pool.checkedout(),
+            "capacity": capacity,
+            "ratio": _ratio(pool.checkedout(), capacity),
+        }
+
+    stats = llm_admission.stats()
+    report["llm_admission"] = {
+        "in_flight": stats["in_flight"],
+        "queue_depth": stats["queue_depth"],
+        "capacity": stats["max_in_flight"] + stats["max_queue"],
+        "ratio": _ratio(
+            stats["in_flight"] + stats["queue_depth"],
+            stats["max_in_flight"] + stats["max_queue"],
+        ),
+    }
+
+    if job_workers.running:
+        report["job_workers"] = {
+            "busy": job_workers.busy,
+            "capacity": job_workers.concurrency,
+            "ratio": _ratio(job_workers.busy, job_workers.concurrency),
+        }
+    return report
+
+
+class HealthMonitor:
+    def __init__(self, probes: list[Probe], timeout: float = 3.0):
+        self.probes = {probe.name: probe for probe in probes}
+        self.timeout = timeout
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        # Bind the lock to the loop the monitor runs on
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run(), name="health-monitor")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        tick = min(probe.interval for probe in self.probes.values())
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health monitor failed: {str(e)}")
+            await asyncio.sleep(tick)
+
+    async def refresh(self, force: bool = False) -> None:
+        """Run every probe that is due (or all of them) concurrently."""
+        async with self._lock:
+            now = time.monotonic()
+            due = [p for p in self.probes.values() if force or p.due(now)]
+            await asyncio.gather(*(self._run_probe(probe) for probe in due))
+
+    async def _run_probe(self, probe: Probe) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe.check(), timeout=self.timeout)
+            status, error = "ok", None
+        except ProbeSkipped as e:
+            status, error = "skipped", str(e)
+        except asyncio.TimeoutError:
+            status, error = "fail", f"timed out after {self.timeout}s"
+        except Exception as e:
+            status, error = "fail", f"{type(e).__name__}: {e}"
+
+        previous = probe.result.status if probe.result else None
+        probe.last_run = time.monotonic()
+        probe.result = ProbeResult(
+            status=status,
+            checked_at=datetime.now(timezone.utc),
+            latency_ms=(time.perf_counter() - started) * 1000,
+            error=error,
+        )
+        if status != previous:
+            if status == "fail":
+                logger.warning("Health probe %s failed: %s", probe.name, error)
+            else:
+                logger.info("Health probe %s: %s", probe.name, status)
+
+    def _stale(self) -> bool:
+        """True when a result is missing or far older than its interval."""
+        now = time.monotonic()
+        return any(
+            probe.result is None or now - probe.last_run > 3 * probe.interval
+            for probe in self.probes.values()
+        )
+
+    async def readiness(self) -> tuple[bool, dict]:
+        """Readiness verdict and report, refreshing results only if stale."""
+        if self._stale():
+            await self.refresh()
+
+        failed = [
+            probe.name
+            for probe in self.probes.values()
+            if probe.critical and probe.result and probe.result.status == "fail"
+        ]
+        degraded = [
+            probe.name
+            for probe in self.probes.values()
+            if not probe.critical and probe.result and probe.result.status == "fail"
+        ]
+        usage = saturation()
+        saturated = [
+            name
+            for name, entry in usage.items()
+            if name in READINESS_RESOURCES
+            and entry["ratio"] >= settings.health_saturation_threshold
+        ]
+
+        if failed:
+            status = "unavailable"
+        elif saturated:
+            status = "saturated"
+        elif degraded:
+            status = "degraded"
+        else:
+            status = "ok"
+
+        report = {
+            "status": status,
+            "checks": {
+                name: dict(probe.result.to_dict(), critical=probe.critical)
+                for name, probe in self.probes.items()
+                if probe.result
+            },
+            "saturation": usage,
+        }
+        return not (failed or saturated), report
+
+
+health_monitor = HealthMonitor(default_probes(), timeout=settings.health_probe_timeout)
@@ -0,0 +1,72 @@
+"""
+Cached job counts for ``/metrics`` and the ``X-Pending-Jobs`` header.
+
+Both are read far more often than jobs change state, so the counts are
+loaded with one grouped query and kept for ``job_stats_ttl`` seconds.
+Queueing, completing or failing a job in this process invalidates them;
+changes made by other processes (e.g. a standalone worker) show up within
+the TTL.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.repositories import job_repo
+from app.utils import metrics
+from app.utils.db import async_session_scope
+
+
+class JobStats:
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Bumped by invalidate() so a load that raced with it is not kept
+        self._version = 0
+        self._pending: Optional[dict[str, int]] = None
+        self._pending_at = 0.0
+        self._by_status: Optional[dict[str, int]] = None
+        self._by_status_at = 0.0
+
+    def invalidate(self) -> None:
+        """Re-count on the next lookup."""
+        with self._lock:
+            self._version += 1
+            self._pending = None
+            self._by_status = None
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at < self.ttl
+
+    def pending_in_session(self, db: Session, session_id: str) -> int:
+        """Queued and running jobs of a session."""
+        with self._lock:
+            pending, version = self._pending, self._version
+            fresh = pending is not None and self._fresh(self._pending_at)
+        metrics.record_cache("job_stats", fresh)
+        if pending is None or not fresh:
+            pending = job_repo.count_pending_jobs_by_session(db)
+            with self._lock:
+                if version == self._version:
+                    self._pending, self._pending_at = pending, time.monotonic()
+        return pending.get(session_id, 0)
+
+    async def by_status(self) -> dict[str, int]:
+        """Jobs of every session by status."""
+        with self._lock:
+            counts, version = self._by_status, self._version
+            fresh = counts is not None and self._fresh(self._by_status_at)
+        metrics.record_cache("job_stats", fresh)
+        if counts is None or not fresh:
+            async with async_session_scope() as db:
+                counts = await job_repo.count_jobs_by_status_async(db)
+            with self._lock:
+                if version == self._version:
+                    self._by_status, self._by_status_at = counts, time.monotonic()
+        return counts
+
+
+job_stats = JobStats(ttl=settings.job_stats_ttl)
@@ -0,0 +1,207 @@
+"""
+Background workers for chat turns submitted in async mode.
+
+Jobs live in the ``chat_jobs`` table, so queued work survives restarts.
+Workers claim jobs with a lease; a job whose worker died is picked up again
+once its lease expires. Failed attempts (e.g. LLM admission overload) are
+retried with exponential backoff up to ``job_max_attempts``.
+
+Workers run inside the API process by default. Set ``JOB_WORKERS=0`` there
+and run ``python -m app.services.job_worker`` to process jobs elsewhere.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.config import settings
+from app.logging_config import get_logger
+from app.models.chat import ChatJob
+from app.repositories import job_repo
+from app.services import chat_service
+from app.services.job_stats import job_stats
+from app.utils import metrics
+from app.utils.db import async_session_scope
+from app.utils.log_context import bind_session
+from app.utils.serialization import serialize_job
+
+logger = get_logger(__name__)
+
+
+class JobWorkerPool:
+    def __init__(
+        self,
+        concurrency: int,
+        poll_interval: float = 1.0,
+        lease_timeout: float = 300.0,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self.busy = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self._tasks or self.concurrency <= 0:
+            return
+        # Bind the wakeup event to the loop the workers run on
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"chat-job-worker-{index}")
+            for index in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} chat job workers")
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            logger.info("Stopped chat job workers")
+
+    def notify(self) -> None:
+        """Wake idle workers after a job was queued in this process."""
+        self._wakeup.set()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Chat job worker {index} failed: {str(e)}")
+                processed = False
+
+            if not processed:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def run_once(self) -> bool:
+        """Claim and process a single job. Returns False if none was due."""
+        now = datetime.now(timezone.utc)
+        async with async_session_scope() as db:
+            job = await job_repo.claim_next_job_async(
+                db, now, now + timedelta(seconds=self.lease_timeout)
+            )
+            if job is None:
+                return False
+
+            self.busy += 1
+            try:
+                await self._process(db, job)
+            finally:
+                self.busy -= 1
+        return True
+
+    async def _process(self, db, job: ChatJob) -> None:
+        job_id, attempts = job.id, job.attempts
+        bind_session(job.session_id)
+        try:
+            await chat_service.process_job_async(db, job)
+            logger.info(f"Completed job {job_id} after {attempts} attempt(s)")
+        except asyncio.CancelledError:
+            # Shutting down: hand the job straight back instead of waiting
+            # for the lease to expire
+            await db.rollback()
+            await asyncio.shield(self._requeue(job_id))
+            raise
+        except Exception as e:
+            await db.rollback()
+            await self._handle_failure(db, job_id, attempts, e)
+
+    async def _requeue(self, job_id: str) -> None:
+        async with async_session_scope() as db:
+            await job_repo.reschedule_job_async(
+                db,
+                job_id,
+                "queued",
+                available_at=datetime.now(timezone.utc),
+                refund_attempt=True,
+            )
+
+    async def _handle_failure(
+        self, db, job_id: str, attempts: int, error: Exception
+    ) -> None:
+        message = str(error) or type(error).__name__
+        if attempts >= settings.job_max_attempts:
+            logger.error(f"Job {job_id} failed permanently: {message}")
+            job = await job_repo.reschedule_job_async(db, job_id, "failed", message)
+        else:
+            delay = retry_delay(attempts)
+            logger.warning(
+                f"Job {job_id} attempt {attempts} failed, "
+                f"retrying in {delay:.1f}s: {message}"
+            )
+            job = await job_repo.reschedule_job_async(
+                db,
+                job_id,
+                "queued",
+                message,
+                available_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+            )
+        if job is not None:
+            chat_service.publish_job_event(serialize_job(job))
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff for the next attempt after ``attempts`` failures."""
+    return min(
+        settings.job_retry_max_delay,
+        settings.job_retry_base_delay * 2 ** max(0, attempts - 1),
+    )
+
+
+job_workers = JobWorkerPool(
+    settings.job_workers,
+    poll_interval=settings.job_poll_interval,
+    lease_timeout=settings.job_lease_timeout,
+)
+
+
+@metrics.registry.collector
+async def job_metrics():
+    """Job queue depth by status (all workers) and this process's busy workers."""
+    counts = await job_stats.by_status()
+    jobs = metrics.MetricFamily(
+        "chat_jobs", "gauge", "Async-mode chat jobs by status", ("status",)
+    )
+    for status in ("queued", "running", "completed", "failed"):
+        jobs.add(counts.get(status, 0), status)
+    busy = metrics.MetricFamily(
+        "chat_job_workers_busy", "gauge", "Job workers in this process running a job"
+    ).add(job_workers.busy)
+    return [jobs, busy]
+
+
+async def main(concurrency: Optional[int] = None) -> None:
+    """Run a standalone worker pool until interrupted."""
+    pool = JobWorkerPool(
+        concurrency or max(1, settings.job_workers),
+        poll_interval=settings.job_poll_interval,
+        lease_timeout=settings.job_lease_timeout,
+    )
+    pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    from app.logging_config import init_logging
+
+    init_logging()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
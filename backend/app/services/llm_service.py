@@ -1,11 +1,14 @@
 import logging
-from typing import List
+from typing import AsyncIterator, List, Optional
 
 from app.external.openai_client import (
+    LLMCompletion,
+    get_openai_completion_with_messages_async,
     get_openai_response,
-    get_openai_response_with_messages_async,
+    stream_openai_response_with_messages_async,
 )
 from app.models.chat import Agent
+from app.utils.admission import AdmissionRejectedError
 
 logger = logging.getLogger(__name__)
 
@@ -15,44 +18,83 @@ def get_response(prompt: str) -> str:
     return get_openai_response(prompt)
 
 
+def build_messages(agent: Agent, context: List[str], user_message: str) -> list:
+    """Build the provider message list from the agent and session context."""
+    # Use agent's custom system prompt if available, otherwise fallback
+    system_prompt = agent.system_prompt or f"You are {agent.name}, {agent.description}"
+
+    # Build conversation messages for better context handling
+    messages = [{"role": "system", "content": system_prompt}]
+
+    # Add conversation history (last 8 messages for better context
+    # while staying within token limits)
+    for ctx_message in context[-8:]:
+        if ctx_message.startswith("User:"):
+            messages.append({"role": "user", "content": ctx_message[5:].strip()})
+        elif ":" in ctx_message:
+            # Agent message
+            agent_response = ctx_message.split(":", 1)[1].strip()
+            if agent_response:  # Only add non-empty responses
+                messages.append({"role": "assistant", "content": agent_response})
+
+    # Add current user message
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+
 async def generate_response_async(
     agent: Agent, context: List[str], user_message: str
 ) -> str:
     """Generate response using agent's system prompt and conversation context."""
-    try:
-        # Use agent's custom system prompt if available, otherwise fallback
-        system_prompt = (
-            agent.system_prompt or f"You are {agent.name}, {agent.description}"
-        )
+    completion = await generate_completion_async(agent, context, user_message)
+    return completion.content
 
-        # Build conversation messages for better context handling
-        messages = [{"role": "system", "content": system_prompt}]
 
-        # Add conversation history (last 8 messages for better context
-        # while staying within token limits)
-        for ctx_message in context[-8:]:
-            if ctx_message.startswith("User:"):
-                messages.append({"role": "user", "content": ctx_message[5:].strip()})
-            elif ":" in ctx_message:
-                # Agent message
-                agent_response = ctx_message.split(":", 1)[1].strip()
-                if agent_response:  # Only add non-empty responses
-                    messages.append({"role": "assistant", "content": agent_response})
-
-        # Add current user message
-        messages.append({"role": "user", "content": user_message})
+async def generate_completion_async(
+    agent: Agent, context: List[str], user_message: str
+) -> LLMCompletion:
+    """Generate the agent's reply along with provider usage and timing."""
+    try:
+        messages = build_messages(agent, context, user_message)
 
-        response = await get_openai_response_with_messages_async(messages)
+        completion = await get_openai_completion_with_messages_async(
+            messages, agent_name=agent.name
+        )
         logger.info(
-            f"Generated response for agent {agent.name} (length: {len(response)})"
+            "Generated response for agent %s (length: %d)",
+            agent.name,
+            len(completion.content),
         )
-        return response
+        return completion
 
+    except AdmissionRejectedError:
+        # Overload must reach the API layer as a 503, not a canned reply
+        raise
     except Exception as e:
         logger.error(f"Error generating response for agent {agent.name}: {str(e)}")
         # Return a fallback response instead of raising exception
-        return (
-            f"I apologize, but I'm having trouble processing your request "
-            f"right now. As {agent.name}, I'd be happy to help you once "
-            f"the technical issue is resolved."
+        return LLMCompletion(
+            content=(
+                f"I apologize, but I'm having trouble processing your request "
+                f"right now. As {agent.name}, I'd be happy to help you once "
+                f"the technical issue is resolved."
+            ),
+            outcome="error",
         )
+
+
+async def stream_response_async(
+    agent: Agent,
+    context: List[str],
+    user_message: str,
+    completion: Optional[LLMCompletion] = None,
+) -> AsyncIterator[str]:
+    """Stream the agent's reply as text deltas.
+
+    ``completion``, if given, receives the provider's usage and timing.
+    """
+    messages = build_messages(agent, context, user_message)
+    async for delta in stream_openai_response_with_messages_async(
+        messages, agent_name=agent.name, completion=completion
+    ):
+        yield delta
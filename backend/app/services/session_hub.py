@@ -0,0 +1,106 @@
+"""
+In-process fan-out of chat events to live subscribers (WebSocket clients).
+
+Events are serialized once per publish and pushed onto each subscriber's
+bounded queue without awaiting. Droppable events such as typing indicators
+are discarded when a subscriber falls behind; losing any other event marks
+the subscriber as overflowed so its connection can be closed and the client
+can reconnect with a resume cursor instead of silently missing messages.
+"""
+
+import asyncio
+from typing import Optional
+
+import orjson
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def encode_event(event: dict) -> str:
+    return orjson.dumps(event).decode()
+
+
+class Subscriber:
+    """Outbound frame queue of a single connection."""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = asyncio.Event()
+        self.dropped = 0
+        self.sessions: set[str] = set()  # Kept up to date by SessionHub
+
+    def offer(self, frame: str, droppable: bool = False) -> bool:
+        """Enqueue a frame without blocking; returns False if it was lost."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if not droppable:
+                self.overflowed.set()
+            return False
+
+    async def send(self, event: dict) -> None:
+        """Enqueue an event, waiting for room (applies back-pressure)."""
+        await self.queue.put(encode_event(event))
+
+
+class SessionHub:
+    def __init__(self):
+        self._subscribers: dict[str, set[Subscriber]] = {}
+
+    def subscribe(self, session_id: str, subscriber: Subscriber) -> None:
+        self._subscribers.setdefault(session_id, set()).add(subscriber)
+        subscriber.sessions.add(session_id)
+
+    def unsubscribe(self, session_id: str, subscriber: Subscriber) -> None:
+        subscriber.sessions.discard(session_id)
+        subscribers = self._subscribers.get(session_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[session_id]
+
+    def unsubscribe_all(self, subscriber: Subscriber) -> None:
+        for session_id in list(subscriber.sessions):
+            self.unsubscribe(session_id, subscriber)
+
+    def has_subscribers(self, session_id: str) -> bool:
+        return session_id in self._subscribers
+
+    def subscriber_count(self) -> int:
+        return len(set().union(*self._subscribers.values()))
+
+    def publish(
+        self,
+        session_id: str,
+        event: dict,
+        droppable: bool = False,
+        exclude: Optional[Subscriber] = None,
+    ) -> int:
+        """Deliver an event to every subscriber of a session.
+
+        Returns the number of subscribers that received it.
+        """
+        subscribers = self._subscribers.get(session_id)
+        if not subscribers:
+            return 0
+
+        frame = encode_event(event)
+        delivered = 0
+        for subscriber in list(subscribers):
+            if subscriber is exclude:
+                continue
+            if subscriber.offer(frame, droppable):
+                delivered += 1
+            elif not droppable:
+                logger.warning(
+                    "Subscriber of session %s overflowed; closing it", session_id
+                )
+        return delivered
+
+
+session_hub = SessionHub()
@@ -0,0 +1,185 @@
+"""
+Admission control for expensive downstream calls.
+
+``AdmissionController`` caps the number of in-flight operations and keeps a
+bounded FIFO of waiters. Callers that cannot be queued, or that wait longer
+than the queue deadline, are rejected immediately with
+``AdmissionRejectedError`` so the API can answer 503 instead of piling more
+concurrent requests onto a provider that is already saturated.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.config import settings
+from app.logging_config import get_logger
+from app.utils import metrics
+
+logger = get_logger(__name__)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when an operation cannot be admitted in time."""
+
+    def __init__(self, name: str, reason: str, retry_after: float):
+        super().__init__(f"{name} admission rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded, deadline-aware wait queue."""
+
+    def __init__(
+        self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float
+    ):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+        # Running statistics
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.timed_out_total = 0
+        self.wait_seconds_total = 0.0
+        self.last_wait_seconds = 0.0
+        self._avg_service_seconds = 1.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def estimate_retry_after(self) -> float:
+        """Rough time until a newly arriving caller could be served."""
+        backlog = self.queue_depth + 1
+        return backlog * self._avg_service_seconds / max(1, self.max_in_flight)
+
+    def _reject(self, reason: str) -> AdmissionRejectedError:
+        logger.warning(
+            "%s admission rejected (%s): in_flight=%d queue_depth=%d",
+            self.name,
+            reason,
+            self.in_flight,
+            self.queue_depth,
+        )
+        return AdmissionRejectedError(self.name, reason, self.estimate_retry_after())
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._record_admission(0.0)
+            return
+
+        if self.queue_depth >= self.max_queue:
+            self.rejected_total += 1
+            raise self._reject("queue full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await future
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                future.cancel()
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            if isinstance(e, TimeoutError):
+                self.timed_out_total += 1
+                raise self._reject("queue timeout") from None
+            raise
+
+        self._record_admission(time.monotonic() - started)
+
+    def release(self) -> None:
+        # Hand the slot directly to the oldest live waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _record_admission(self, waited: float) -> None:
+        self.admitted_total += 1
+        self.last_wait_seconds = waited
+        self.wait_seconds_total += waited
+        if waited > 0:
+            logger.debug(
+                "%s admitted after %.3fs (queue_depth=%d)",
+                self.name,
+                waited,
+                self.queue_depth,
+            )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one admission slot for the duration of the block."""
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * elapsed
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "timed_out_total": self.timed_out_total,
+            "wait_seconds_total": self.wait_seconds_total,
+            "last_wait_seconds": self.last_wait_seconds,
+        }
+
+
+# Process-wide limiter for LLM provider calls
+llm_admission = AdmissionController(
+    "llm",
+    max_in_flight=settings.llm_max_concurrency,
+    max_queue=settings.llm_max_queue,
+    queue_timeout=settings.llm_queue_timeout,
+)
+
+
+@metrics.registry.collector
+def admission_metrics():
+    """Admission queue state for the LLM limiter, read at scrape time."""
+    stats = llm_admission.stats()
+    families = [
+        ("in_flight", "gauge", "Provider calls currently running"),
+        ("queue_depth", "gauge", "Provider calls waiting for a slot"),
+        ("admitted_total", "counter", "Provider calls admitted"),
+        ("rejected_total", "counter", "Provider calls rejected"),
+        ("timed_out_total", "counter", "Provider calls that timed out waiting"),
+        ("wait_seconds_total", "counter", "Total time spent waiting for a slot"),
+    ]
+    return [
+        metrics.MetricFamily(f"llm_admission_{key}", kind, documentation).add(
+            stats[key]
+        )
+        for key, kind, documentation in families
+    ]
@@ -1,15 +1,58 @@
 import logging
+import re
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import settings
+from app.utils import metrics
 
 logger = logging.getLogger(__name__)
 
 
+class _CheckoutMetricsMixin:
+    """Record pool checkouts and the time spent waiting for a connection."""
+
+    metrics_label = ""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_pool_checkouts.inc(self.metrics_label)
+            metrics.db_pool_checkout_wait.observe(
+                time.perf_counter() - start, self.metrics_label
+            )
+
+
+class InstrumentedQueuePool(_CheckoutMetricsMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_CheckoutMetricsMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def get_pool_args(database_url: str, is_async: bool = False) -> dict:
+    """Swap in the instrumented pool where the dialect would use a QueuePool."""
+    if database_url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    }
+
+
 # Determine connection arguments based on database type
 def get_connect_args(database_url: str) -> dict:
     """Get appropriate connection arguments based on database type."""
@@ -51,6 +94,7 @@ try:
         pool_pre_ping=True,
         pool_recycle=300,
         connect_args=connect_args,
+        **get_pool_args(database_url),
     )
     logger.info("Database engine created successfully")
 except Exception as e:
@@ -76,6 +120,7 @@ try:
         pool_pre_ping=True,
         pool_recycle=300,
         connect_args=connect_args,
+        **get_pool_args(async_database_url, is_async=True),
     )
     logger.info("Async database engine created successfully")
 except Exception as e:
@@ -89,6 +134,140 @@ AsyncSessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+@metrics.registry.collector
+def pool_metrics():
+    """Pool occupancy, read at scrape time."""
+    checked_out = metrics.MetricFamily(
+        "db_pool_checked_out", "gauge", "Connections currently in use", ("engine",)
+    )
+    size = metrics.MetricFamily(
+        "db_pool_size", "gauge", "Configured pool size", ("engine",)
+    )
+    overflow = metrics.MetricFamily(
+        "db_pool_overflow", "gauge", "Connections opened beyond pool size", ("engine",)
+    )
+    pools = (("sync", engine.pool), ("async", async_engine.sync_engine.pool))
+    for label, pool in pools:
+        if isinstance(pool, QueuePool):
+            checked_out.add(pool.checkedout(), label)
+            size.add(pool.size(), label)
+            overflow.add(max(0, pool.overflow()), label)
+    return [checked_out, size, overflow]
+
+
+# Statement timing. Listening on the Engine class covers every engine,
+# including ones created after import (tests swap in their own).
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str, max_length: int = 1000) -> str:
+    """Statement with literals and bind markers as ``?``, for grouping."""
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?, ...)", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return sql if len(sql) <= max_length else sql[:max_length] + "..."
+
+
+def _row_shape(row) -> str:
+    if isinstance(row, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in row.items()) + "}"
+    if isinstance(row, (list, tuple)):
+        return "(" + ", ".join(type(v).__name__ for v in row) + ")"
+    return type(row).__name__
+
+
+def parameters_shape(parameters, executemany: bool = False) -> str:
+    """Names and types of bound parameters; never their values."""
+    if executemany and parameters:
+        return f"{len(parameters)} x {_row_shape(parameters[0])}"
+    return _row_shape(parameters)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements and DB time for the enclosed block (and its tasks)."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    elapsed_ms = elapsed * 1000
+    metrics.db_query_duration.observe(elapsed)
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+
+    if elapsed_ms >= settings.db_slow_query_ms:
+        metrics.db_slow_queries.inc()
+        logger.warning(
+            "Slow query (%.1fms): %s params=%s",
+            elapsed_ms,
+            normalize_sql(statement),
+            parameters_shape(parameters, executemany),
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+class QueryStatsMiddleware:
+    """Per-request query count and DB time as response headers."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-query-count", str(stats.count).encode()),
+                        (b"x-db-time-ms", f"{stats.total_ms:.1f}".encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -103,3 +282,14 @@ async def get_async_db():
             yield session
         finally:
             await session.close()
+
+
+@asynccontextmanager
+async def async_session_scope():
+    """Open an AsyncSession outside of request dependency injection.
+
+    Used by long-lived connections and background work that cannot hold a
+    single request-scoped session.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
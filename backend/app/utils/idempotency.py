@@ -0,0 +1,235 @@
+"""
+Idempotency-Key handling for non-idempotent POST routes.
+
+The first request with a given key claims it by inserting a pending row and
+runs normally; its final response is stored against the key. Duplicates that
+arrive while it is running wait for it (an in-process event when it runs in
+this worker, polling otherwise) and every later duplicate replays the stored
+response without touching the LLM or the messages table.
+
+Server-side failures (5xx) release the key so the client can retry, while
+client errors (4xx) are stored and replayed like successes. Reusing a key
+with a different request body is rejected with 422.
+"""
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+import orjson
+from fastapi import HTTPException, Response
+
+from app.config import settings
+from app.logging_config import get_logger
+from app.models.chat import IdempotencyKey
+from app.repositories import idempotency_repo
+from app.utils import metrics
+from app.utils.db import async_session_scope
+
+logger = get_logger(__name__)
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Response headers stored with the key and repeated on replay, so that e.g. a
+# retried async submission still learns where to poll for its job
+REPLAYED_RESPONSE_HEADERS = ("location", "preference-applied")
+
+# Keys whose first request is running in this process
+_inflight: dict[str, asyncio.Event] = {}
+_last_purge = 0.0
+
+
+def fingerprint(scope: str, payload: dict) -> str:
+    """Stable hash of the route and request body."""
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(scope.encode() + b"\n" + body).hexdigest()
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes even for timezone-aware columns
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _is_stale(record: IdempotencyKey, now: datetime) -> bool:
+    expires_at = _aware(record.expires_at)
+    if expires_at is not None and expires_at <= now:
+        return True
+    locked_until = _aware(record.locked_until)
+    return record.status == "pending" and (
+        locked_until is not None and locked_until <= now
+    )
+
+
+async def _claim_or_wait(
+    key: str, request_fingerprint: str
+) -> Optional[IdempotencyKey]:
+    """Claim ``key`` or wait for its owner.
+
+    Returns None once the caller owns the key, otherwise the completed record
+    to replay.
+    """
+    deadline = time.monotonic() + settings.idempotency_wait_timeout
+    lock_timeout = timedelta(seconds=settings.idempotency_lock_timeout)
+    ttl = timedelta(seconds=settings.idempotency_ttl)
+    while True:
+        now = datetime.now(timezone.utc)
+        async with async_session_scope() as db:
+            record, claimed = await idempotency_repo.claim_key_async(
+                db,
+                key,
+                request_fingerprint,
+                locked_until=now + lock_timeout,
+                expires_at=now + ttl,
+            )
+            if claimed:
+                return None
+            if record is not None and _is_stale(record, now):
+                logger.info("Discarding stale idempotency key %s", key)
+                await idempotency_repo.delete_key_async(db, key)
+                continue
+
+        if record is None:
+            # Released between our insert and read; try again
+            continue
+        if record.fingerprint != request_fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        if record.status == "completed":
+            return record
+
+        await _wait_for_owner(key, deadline)
+
+
+async def _wait_for_owner(key: str, deadline: float) -> None:
+    """Wait for the request owning ``key`` to finish, or for the next poll.
+
+    Raises 409 once ``deadline`` has passed.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still in progress",
+            headers={"Retry-After": "1"},
+        )
+
+    event = _inflight.get(key)
+    if event is not None:
+        try:
+            await asyncio.wait_for(event.wait(), remaining)
+        except asyncio.TimeoutError:
+            pass
+    else:
+        await asyncio.sleep(min(settings.idempotency_poll_interval, remaining))
+
+
+async def _purge_expired() -> None:
+    global _last_purge
+    if time.monotonic() - _last_purge < 300:
+        return
+    _last_purge = time.monotonic()
+    try:
+        async with async_session_scope() as db:
+            removed = await idempotency_repo.delete_expired_keys_async(
+                db, datetime.now(timezone.utc)
+            )
+        if removed:
+            logger.info("Purged %d expired idempotency keys", removed)
+    except Exception as e:
+        logger.warning(f"Failed to purge expired idempotency keys: {str(e)}")
+
+
+def _kept_headers(response: Response) -> Optional[str]:
+    kept = {
+        name: response.headers[name]
+        for name in REPLAYED_RESPONSE_HEADERS
+        if name in response.headers
+    }
+    return orjson.dumps(kept).decode() if kept else None
+
+
+async def _store(
+    key: str, status_code: int, body: bytes, headers: Optional[str] = None
+) -> None:
+    try:
+        async with async_session_scope() as db:
+            await idempotency_repo.complete_key_async(
+                db, key, status_code, body.decode("utf-8"), headers
+            )
+    except Exception as e:
+        # The request itself succeeded; fall back to letting retries re-run it
+        logger.error(f"Failed to store response for idempotency key {key}: {str(e)}")
+        await _release(key)
+
+
+async def _release(key: str) -> None:
+    try:
+        async with async_session_scope() as db:
+            await idempotency_repo.delete_key_async(db, key)
+    except Exception as e:
+        logger.error(f"Failed to release idempotency key {key}: {str(e)}")
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    headers = orjson.loads(record.response_headers) if record.response_headers else {}
+    headers[REPLAYED_HEADER] = "true"
+    return Response(
+        content=record.response_body,
+        status_code=record.response_status,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+async def run_idempotent(
+    key: str,
+    request_fingerprint: str,
+    handler: Callable[[], Awaitable[Response]],
+) -> Response:
+    """Run ``handler`` at most once per key and replay its response."""
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters",
+        )
+
+    record = await _claim_or_wait(key, request_fingerprint)
+    metrics.record_cache("idempotency", record is not None)
+    if record is not None:
+        logger.info("Replaying stored response for idempotency key %s", key)
+        return _replay(record)
+
+    event = _inflight[key] = asyncio.Event()
+    try:
+        try:
+            response = await handler()
+        except HTTPException as e:
+            if e.status_code >= 500 or e.status_code == 429:
+                await _release(key)
+            else:
+                await _store(key, e.status_code, orjson.dumps({"detail": e.detail}))
+            raise
+        except BaseException:
+            await _release(key)
+            raise
+
+        if response.status_code >= 500:
+            await _release(key)
+        else:
+            await _store(
+                key,
+                response.status_code,
+                bytes(response.body),
+                _kept_headers(response),
+            )
+        await _purge_expired()
+        return response
+    finally:
+        _inflight.pop(key, None)
+        event.set()
@@ -0,0 +1,91 @@
+"""
+Per-request logging context and safe rendering of user content.
+
+``RequestContextMiddleware`` binds a request id (the caller's
+``X-Request-ID`` or a new one) for every HTTP request, and the chat service
+binds the session id once it is known. ``logging_config.ContextFilter``
+copies both onto every log record.
+
+``loggable_content`` defers truncating or redacting message text until a
+record is actually written, so dropped or sampled-out records cost nothing.
+"""
+
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+REQUEST_ID_HEADER = "X-Request-ID"
+MAX_REQUEST_ID_LENGTH = 128
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+session_id_var: ContextVar[Optional[str]] = ContextVar("session_id", default=None)
+
+
+def bind_session(session_id: Optional[str]) -> None:
+    """Attach ``session_id`` to log records for the rest of this task."""
+    session_id_var.set(session_id)
+
+
+class LoggableContent:
+    """Message text rendered according to ``LOG_MESSAGE_CONTENT`` when logged."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: Optional[str]):
+        self.text = text or ""
+
+    def __str__(self) -> str:
+        mode = settings.log_message_content
+        if mode == "full":
+            return self.text
+        if mode == "redact":
+            return f"<redacted {len(self.text)} chars>"
+        limit = settings.log_content_max_chars
+        if len(self.text) <= limit:
+            return self.text
+        return f"{self.text[:limit]}... (+{len(self.text) - limit} chars)"
+
+    __repr__ = __str__
+
+
+def loggable_content(text: Optional[str]) -> LoggableContent:
+    return LoggableContent(text)
+
+
+class RequestContextMiddleware:
+    """Bind a request id for logging and echo it in ``X-Request-ID``."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", ()):
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:MAX_REQUEST_ID_LENGTH]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        request_token = request_id_var.set(request_id)
+        session_token = session_id_var.set(None)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(request_token)
+            session_id_var.reset(session_token)
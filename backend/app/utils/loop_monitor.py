@@ -0,0 +1,121 @@
+"""
+Event-loop lag monitoring and blocking-call detection.
+
+``LoopMonitor`` runs a task that sleeps for a fixed tick and records how
+late it wakes up in ``event_loop_lag_seconds``. Lag is time every other
+coroutine in the process also waited: a sync DB call, a blocking client or
+CPU-heavy work inside an ``async def`` shows up here first.
+
+With ``LOOP_BLOCK_DETECTION`` a watchdog thread also watches the task's
+heartbeat. When the loop goes longer than ``LOOP_BLOCK_THRESHOLD`` without
+running it logs the loop thread's current stack, which names the blocking
+call. Sampling another thread's frame is cheap, but the extra wakeups are
+meant for debugging rather than always-on use.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.config import settings
+from app.logging_config import get_logger
+from app.utils import metrics
+
+logger = get_logger(__name__)
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = 0.5,
+        block_detection: bool = False,
+        block_threshold: float = 0.1,
+    ):
+        self.interval = interval
+        self.block_detection = block_detection
+        self.block_threshold = block_threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_block_stack: Optional[str] = None
+        self._tick = interval
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        # Beat often enough that a stall past the threshold is noticed
+        self._tick = (
+            min(self.interval, self.block_threshold / 2)
+            if self.block_detection
+            else self.interval
+        )
+        self._task = asyncio.create_task(self._run(), name="loop-monitor")
+        if self.block_detection:
+            self._stopped.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        watchdog, self._watchdog = self._watchdog, None
+        if watchdog is not None:
+            await asyncio.to_thread(watchdog.join, 1.0)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self._tick
+            await asyncio.sleep(self._tick)
+            lag = max(0.0, loop.time() - due)
+            self._heartbeat = time.monotonic()
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            metrics.event_loop_lag.observe(lag)
+
+    def _watch(self) -> None:
+        reported = False
+        while not self._stopped.wait(self.block_threshold / 2):
+            stalled = time.monotonic() - self._heartbeat - self._tick
+            if stalled <= self.block_threshold:
+                reported = False
+            elif not reported:
+                # One report per stall; the stack is where the loop is stuck
+                reported = True
+                self._report_block(stalled)
+
+    def _report_block(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+        self.last_block_stack = stack
+        metrics.event_loop_blocks.inc()
+        logger.warning(
+            "Event loop blocked for at least %.0fms, loop thread stack:\n%s",
+            stalled * 1000,
+            stack,
+        )
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.loop_monitor_interval,
+    block_detection=settings.loop_block_detection,
+    block_threshold=settings.loop_block_threshold,
+)
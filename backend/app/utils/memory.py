@@ -0,0 +1,146 @@
+"""
+Allocation tracking for finding memory growth in long-running workers.
+
+With ``MEMORY_TRACKING_ENABLED`` (never in production) tracemalloc starts
+with the app and ``/api/v1/debug/memory`` reports the top allocation sites
+of the live worker plus their growth since a baseline, which the endpoint
+can reset. The endpoint needs ``MEMORY_TOKEN`` as a Bearer token and does
+not depend on request profiling being enabled. The soak test
+(``benchmarks/soak.py``) uses the same tracker in-process.
+
+tracemalloc slows allocation-heavy code noticeably and keeps a record per
+live allocation, so it is for soak runs and leak hunts, not always-on use.
+It only sees memory allocated through Python: native buffers (SSL contexts,
+database drivers) show up in RSS alone, which is reported alongside.
+"""
+
+import secrets
+import threading
+import tracemalloc
+from typing import Optional
+
+from app.config import settings
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Allocations made by the tracing machinery itself
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def tracking_active() -> bool:
+    """Tracking needs an explicit opt-in and never runs in production."""
+    return settings.memory_tracking_enabled and settings.environment != "production"
+
+
+def check_token(value: Optional[str]) -> bool:
+    token = settings.memory_token
+    return bool(token and value) and secrets.compare_digest(value, token)
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process; None where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    # Most recent frame first; trim interpreter paths to the package
+    frames = []
+    for frame in reversed(traceback):
+        filename = frame.filename.split("site-packages/")[-1]
+        frames.append(f"{filename}:{frame.lineno}")
+    return " <- ".join(frames)
+
+
+class MemoryTracker:
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info("Tracking allocations (%d frames per site)", self.frames)
+        self._baseline = self.snapshot()
+
+    def stop(self) -> None:
+        self._baseline = None
+        tracemalloc.stop()
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def top(self, snapshot: tracemalloc.Snapshot, limit: int = 20) -> list[dict]:
+        """Largest allocation sites in ``snapshot``."""
+        return [
+            {
+                "site": _site(stat.traceback),
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("traceback")[:limit]
+        ]
+
+    def growth(
+        self,
+        snapshot: tracemalloc.Snapshot,
+        baseline: tracemalloc.Snapshot,
+        limit: int = 20,
+    ) -> list[dict]:
+        """Sites that grew the most between ``baseline`` and ``snapshot``."""
+        grown = [
+            stat
+            for stat in snapshot.compare_to(baseline, "traceback")
+            if stat.size_diff > 0
+        ]
+        grown.sort(key=lambda stat: stat.size_diff, reverse=True)
+        return [
+            {
+                "site": _site(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in grown[:limit]
+        ]
+
+    def report(self, limit: int = 20, reset_baseline: bool = False) -> dict:
+        """Current totals, top sites and growth since the baseline.
+
+        With ``reset_baseline`` the snapshot taken here becomes the new
+        baseline, so the next report shows only what grew after this call.
+        """
+        snapshot = self.snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            baseline = self._baseline
+            if reset_baseline or baseline is None:
+                self._baseline = snapshot
+        return {
+            "rss_bytes": rss_bytes(),
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "top": self.top(snapshot, limit),
+            "growth": self.growth(snapshot, baseline, limit) if baseline else [],
+        }
+
+
+memory_tracker = MemoryTracker(frames=settings.memory_trace_frames)
@@ -1,4 +1,26 @@
+"""
+@mention parsing.
+
+``parse_mention`` extracts the first syntactically valid ``@Name`` without
+knowing which agents exist. ``MentionMatcher`` resolves every mention in a
+message against the known agents instead: a trie over agent names and
+display names, matched case-insensitively with spans. ``mention_index``
+keeps a matcher in step with the agents table, re-reading it at most every
+``MENTION_INDEX_TTL`` seconds and rebuilding only when the agents changed.
+It also keeps the agent rows it read, so a matched mention resolves to its
+agent without another query.
+"""
+
 import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from app.config import settings
+from app.logging_config import get_logger
+from app.utils import metrics
+
+logger = get_logger(__name__)
 
 
 def parse_mention(content: str) -> str | None:
@@ -21,3 +43,145 @@ def parse_mention(content: str) -> str | None:
     if match:
         return match.group(1)
     return None
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+@dataclass(frozen=True)
+class Mention:
+    """An @mention of a known agent; ``start:end`` spans the ``@`` and name."""
+
+    agent_id: int
+    name: str  # The agent's canonical name
+    text: str  # As written, without the @
+    start: int
+    end: int
+
+
+class MentionMatcher:
+    """Case-insensitive trie of agent names and aliases.
+
+    Each ``@`` that starts a word is matched against the trie for the
+    longest name that ends at a word boundary, so a scan costs one pass over
+    the message plus at most one name's length per ``@``.
+    """
+
+    _END = ""  # Trie key holding the (agent_id, name) that ends at a node
+
+    def __init__(self, names: Iterable[tuple[int, str, Iterable[str]]] = ()):
+        self._root: dict = {}
+        self.size = 0
+        aliases: list[tuple[str, tuple[int, str]]] = []
+        for agent_id, name, agent_aliases in names:
+            self._add(name, (agent_id, name))
+            aliases.extend((alias, (agent_id, name)) for alias in agent_aliases)
+        # Aliases never shadow another agent's name
+        for alias, target in aliases:
+            self._add(alias, target)
+
+    @classmethod
+    def from_agents(cls, agents: Iterable) -> "MentionMatcher":
+        """Match agents by name and by display name."""
+        return cls(
+            (
+                agent.id,
+                agent.name,
+                [agent.display_name] if agent.display_name else [],
+            )
+            for agent in agents
+        )
+
+    def _add(self, key: str, target: tuple[int, str]) -> None:
+        key = key.strip().lower()
+        if not key:
+            return
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        if self._END not in node:  # First registration wins
+            node[self._END] = target
+            self.size += 1
+
+    def find(self, content: str) -> list[Mention]:
+        """All mentions of known agents in ``content``, in order."""
+        mentions: list[Mention] = []
+        if not content or not self._root:
+            return mentions
+        length = len(content)
+        at = content.find("@")
+        while at != -1:
+            # Same rule as parse_mention: not inside a word or after another @
+            if at == 0 or not (_is_word(content[at - 1]) or content[at - 1] == "@"):
+                node = self._root
+                best = None
+                position = at + 1
+                while position < length:
+                    child = node.get(content[position].lower())
+                    if child is None:
+                        break
+                    node = child
+                    position += 1
+                    if self._END in node and (
+                        position == length or not _is_word(content[position])
+                    ):
+                        best = (node[self._END], position)
+                if best is not None:
+                    (agent_id, name), end = best
+                    mentions.append(
+                        Mention(agent_id, name, content[at + 1 : end], at, end)
+                    )
+                    at = content.find("@", end)
+                    continue
+            at = content.find("@", at + 1)
+        return mentions
+
+
+class MentionIndex:
+    """A ``MentionMatcher`` for the current agents, reloaded on a TTL."""
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._matcher: Optional[MentionMatcher] = None
+        self._agents: dict[int, Any] = {}
+        self._signature: Optional[tuple] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        """Re-read the agents on the next lookup."""
+        self._loaded_at = 0.0
+
+    async def matcher(
+        self, db, load_agents: Callable[..., Awaitable[Iterable]]
+    ) -> MentionMatcher:
+        """The current matcher, reloading agents with ``load_agents(db)``."""
+        matcher = self._matcher
+        fresh = matcher is not None and time.monotonic() - self._loaded_at < self.ttl
+        metrics.record_cache("mention_index", fresh)
+        if fresh and matcher is not None:
+            return matcher
+
+        agents = list(await load_agents(db))
+        signature = tuple(
+            sorted((agent.id, agent.name, agent.display_name) for agent in agents)
+        )
+        if signature != self._signature or matcher is None:
+            matcher = self._matcher = MentionMatcher.from_agents(agents)
+            self._signature = signature
+            logger.info(
+                "Built mention index: %d agents, %d names",
+                len(agents),
+                matcher.size,
+            )
+        # Other columns (e.g. the system prompt) may change without a rebuild
+        self._agents = {agent.id: agent for agent in agents}
+        self._loaded_at = time.monotonic()
+        return matcher
+
+    def agent(self, agent_id: int) -> Optional[Any]:
+        """The row for ``agent_id`` from the last load of the agents."""
+        return self._agents.get(agent_id)
+
+
+mention_index = MentionIndex(ttl=settings.mention_index_ttl)
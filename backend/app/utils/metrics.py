@@ -0,0 +1,374 @@
+"""
+Low-overhead in-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms keep one small record per label set behind a
+lock, so recording a sample is a dict lookup and an add. Values that already
+live elsewhere (pool sizes, admission queue depth, job counts) are read only
+when ``/metrics`` is scraped, through collector callbacks.
+
+Every worker process keeps its own registry, and workers started by
+``app.serve`` share one port, so a scrape reports whichever worker accepted
+the connection. The numbers are only valid with a single worker per
+instance: run ``WEB_WORKERS=1`` and scale out with more instances, each
+scraped on its own.
+"""
+
+import inspect
+import math
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, Optional, Sequence, TypeVar, Union
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Seconds; spans fast DB calls through slow LLM generations
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(value) for value in labels)
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (+Inf last), sum, count
+        self._values: dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            record = self._values.get(key)
+            if record is None:
+                record = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            record[0][index] += 1
+            record[1] += value
+            record[2] += 1
+
+    def count(self, *labels) -> int:
+        record = self._values.get(self._key(labels))
+        return int(record[2]) if record else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(key, (list(r[0]), r[1], r[2])) for key, r in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                labels = _format_labels(self.labelnames, key, le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+@dataclass
+class MetricFamily:
+    """Values produced by a collector at scrape time."""
+
+    name: str
+    kind: str  # "counter" or "gauge"
+    documentation: str
+    labelnames: tuple[str, ...] = ()
+    samples: list[tuple[tuple, float]] = field(default_factory=list)
+
+    def add(self, value: float, *labels) -> "MetricFamily":
+        self.samples.append((tuple(str(label) for label in labels), value))
+        return self
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for labels, value in self.samples:
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(float(value))}"
+            )
+        return lines
+
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+Collector = Callable[
+    [], Union[Iterable[MetricFamily], Awaitable[Iterable[MetricFamily]]]
+]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Collector] = []
+
+    def _register(self, metric: MetricT) -> MetricT:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, func: Collector) -> Collector:
+        """Register a (sync or async) callback run on every scrape."""
+        self._collectors.append(func)
+        return func
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    async def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                result = collect()
+                families = await result if inspect.isawaitable(result) else result
+            except Exception:
+                # A broken collector must not take the whole scrape down
+                scrape_errors.inc(getattr(collect, "__name__", "collector"))
+                continue
+            for family in families:
+                lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+scrape_errors = registry.counter(
+    "metrics_collector_errors_total",
+    "Collector callbacks that failed during a scrape",
+    ["collector"],
+)
+
+# HTTP
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to complete HTTP responses",
+    ["method", "route", "status"],
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"
+)
+
+# LLM
+llm_request_duration = registry.histogram(
+    "llm_request_duration_seconds",
+    "LLM generation latency",
+    ["agent", "model", "mode", "outcome"],
+)
+llm_time_to_first_token = registry.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time until the first streamed token arrives",
+    ["agent", "model"],
+)
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Tokens reported by the provider", ["model", "kind"]
+)
+
+# Database connection pools
+db_pool_checkouts = registry.counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ["engine"]
+)
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+db_slow_queries = registry.counter(
+    "db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS"
+)
+
+# Caches and rate limiting
+cache_requests = registry.counter(
+    "cache_requests_total", "Cache lookups by outcome", ["cache", "result"]
+)
+rate_limit_rejections = registry.counter(
+    "rate_limit_rejections_total", "Requests rejected by rate limiting", ["policy"]
+)
+
+# Event loop
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a loop callback was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+event_loop_blocks = registry.counter(
+    "event_loop_blocks_total", "Loop stalls longer than LOOP_BLOCK_THRESHOLD"
+)
+
+# WebSocket channel
+ws_connections = registry.gauge("ws_connections", "Open WebSocket connections")
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+class MetricsMiddleware:
+    """Record latency and status per route template for HTTP requests."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            # FastAPI stores the matched route in the scope; use its template
+            # so path parameters do not explode the label space
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            labels = (scope["method"], route, str(status))
+            http_requests.inc(*labels)
+            http_request_duration.observe(elapsed, *labels)
@@ -0,0 +1,284 @@
+"""
+On-demand request profiling for debugging slow endpoints.
+
+When ``PROFILING_ENABLED`` is set (and a ``PROFILING_TOKEN`` configured,
+outside production) ``ProfilingMiddleware`` profiles requests that carry
+``X-Profile: <token>`` plus a random ``PROFILING_SAMPLE_RATE`` fraction of
+all requests. Reports go to ``PROFILING_DIR`` and are listed under
+``/api/v1/debug/profiles``; the response names its report in
+``X-Profile-Id``.
+
+pyinstrument, when installed, samples the request's own task and writes an
+HTML flame view. Otherwise cProfile is used: it sees every coroutine the
+event loop runs meanwhile, and writes a ``.prof`` file (for snakeviz or
+pstats) plus a text summary. One request is profiled at a time.
+
+Sync endpoints run in the threadpool, out of sight of a profiler on the
+event loop thread. ``profile_sync_endpoints`` wraps them so that, during a
+profiled request, the endpoint call is profiled in its worker thread and
+merged into the same report. Sync dependencies are not covered.
+
+When disabled the middleware is not installed at all.
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import functools
+import importlib.util
+import io
+import marshal
+import pstats
+import random
+import re
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+_NAME = re.compile(r"^[\w.-]+$")
+
+# The profiling session of the request being handled, seen by threadpool calls
+_session: contextvars.ContextVar[
+    Union["_PyinstrumentSession", "_CProfileSession", None]
+] = contextvars.ContextVar("profiling_session", default=None)
+
+
+def profiling_active() -> bool:
+    """Profiling needs an explicit opt-in and a token, and never runs in prod."""
+    return (
+        settings.profiling_enabled
+        and bool(settings.profiling_token)
+        and settings.environment != "production"
+    )
+
+
+def check_token(value: Optional[str]) -> bool:
+    token = settings.profiling_token
+    return bool(token and value) and secrets.compare_digest(value, token)
+
+
+def has_pyinstrument() -> bool:
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+def profile_dir() -> Path:
+    return Path(settings.profiling_dir)
+
+
+def list_profiles() -> list[dict]:
+    """Saved reports, newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    entries = []
+    for path in directory.iterdir():
+        if path.is_file() and _NAME.match(path.name):
+            stat = path.stat()
+            entries.append(
+                {
+                    "name": path.name,
+                    "size": stat.st_size,
+                    "created_at": datetime.fromtimestamp(
+                        stat.st_mtime, timezone.utc
+                    ).isoformat(),
+                }
+            )
+    entries.sort(key=lambda entry: entry["created_at"], reverse=True)
+    return entries
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """Path of a saved report, or None for unknown or unsafe names."""
+    if not _NAME.match(name):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
+
+
+def _prune(directory: Path) -> None:
+    files = sorted(
+        (p for p in directory.iterdir() if p.is_file()),
+        key=lambda p: p.stat().st_mtime,
+    )
+    for old in files[: max(0, len(files) - settings.profiling_max_files)]:
+        old.unlink(missing_ok=True)
+
+
+def _save(stem: str, outputs: dict[str, bytes]) -> None:
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    for suffix, data in outputs.items():
+        (directory / f"{stem}{suffix}").write_bytes(data)
+    _prune(directory)
+
+
+class _PyinstrumentSession:
+    suffix = ".html"
+
+    def __init__(self):
+        from pyinstrument import Profiler
+
+        self.profiler = Profiler(
+            interval=settings.profiling_interval, async_mode="enabled"
+        )
+        self._lock = threading.Lock()
+        self._thread_sessions: list = []
+
+    def start(self) -> None:
+        self.profiler.start()
+
+    def run_in_thread(self, func: Callable, *args, **kwargs) -> Any:
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=settings.profiling_interval)
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.stop()
+            with self._lock:
+                self._thread_sessions.append(profiler.last_session)
+
+    def stop(self) -> dict[str, bytes]:
+        from pyinstrument.renderers import HTMLRenderer
+        from pyinstrument.session import Session
+
+        self.profiler.stop()
+        session = self.profiler.last_session
+        with self._lock:
+            for other in self._thread_sessions:
+                session = Session.combine(session, other)
+        return {".html": HTMLRenderer().render(session).encode("utf-8")}
+
+
+class _CProfileSession:
+    suffix = ".prof"
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self._lock = threading.Lock()
+        self._thread_profilers: list[cProfile.Profile] = []
+
+    def start(self) -> None:
+        self.profiler.enable()
+
+    def run_in_thread(self, func: Callable, *args, **kwargs) -> Any:
+        # A Profile tracks one call stack, so each thread gets its own
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._thread_profilers.append(profiler)
+
+    def stop(self) -> dict[str, bytes]:
+        self.profiler.disable()
+        text = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=text)
+        with self._lock:
+            for profiler in self._thread_profilers:
+                stats.add(profiler)
+        stats.sort_stats("cumulative").print_stats(60)
+        stats.sort_stats("tottime").print_stats(30)
+        return {
+            # Same format as pstats.Stats.dump_stats
+            ".prof": marshal.dumps(stats.stats),
+            ".txt": text.getvalue().encode("utf-8"),
+        }
+
+
+def _profiled_in_thread(func: Callable) -> Callable:
+    @functools.wraps(func)
+    def call(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return func(*args, **kwargs)
+        return session.run_in_thread(func, *args, **kwargs)
+
+    return call
+
+
+def profile_sync_endpoints(app: FastAPI) -> None:
+    """Let profiled requests cover the app's sync (threadpool) endpoints.
+
+    Call after all routers are included.
+    """
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        call = route.dependant.call
+        if call is None or asyncio.iscoroutinefunction(call):
+            continue
+        # The request handler reads dependant.call on every request
+        route.dependant.call = _profiled_in_thread(call)
+
+
+class ProfilingMiddleware:
+    """Profile selected HTTP requests and save a report per request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._busy = False
+        self._session_class: type[Union[_PyinstrumentSession, _CProfileSession]] = (
+            _PyinstrumentSession if has_pyinstrument() else _CProfileSession
+        )
+
+    def _wanted(self, scope: Scope) -> bool:
+        for key, value in scope.get("headers", ()):
+            if key == PROFILE_HEADER:
+                return check_token(value.decode("latin-1"))
+        rate = settings.profiling_sample_rate
+        return rate > 0 and random.random() < rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        started = datetime.now(timezone.utc)
+        stem = f"{started:%Y%m%dT%H%M%S%f}-{scope['method']}"
+        session = self._session_class()
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", f"{stem}{session.suffix}".encode("latin-1"))
+                ]
+            await send(message)
+
+        begin = time.perf_counter()
+        token = _session.set(session)
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            outputs = session.stop()
+            _session.reset(token)
+            self._busy = False
+            elapsed_ms = (time.perf_counter() - begin) * 1000
+            route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+            logger.info(
+                "Profiled %s %s in %.1fms -> %s",
+                scope["method"],
+                route,
+                elapsed_ms,
+                stem,
+            )
+            try:
+                await asyncio.to_thread(_save, stem, outputs)
+            except OSError as e:
+                logger.warning(f"Failed to save profile {stem}: {e}")
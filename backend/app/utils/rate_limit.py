@@ -0,0 +1,396 @@
+"""
+Token-bucket rate limiting keyed by session, client IP and user.
+
+Each policy (e.g. ``llm`` for routes that trigger a provider call, ``read``
+for history and agent listing) owns one bucket per identity. A request is
+allowed only if every bucket it touches still has a token, and then takes one
+from each; a denied request takes none. Buckets live in
+process memory by default; setting ``RATE_LIMIT_BACKEND_URL`` to a Redis URL
+shares them between workers and instances.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Protocol, Sequence
+
+from fastapi import HTTPException, Request
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.logging_config import get_logger
+from app.utils import metrics
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    capacity: int
+    refill_rate: float  # tokens per second
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # seconds until the bucket is full again
+    retry_after: float  # seconds until the next token is available
+
+    def headers(self) -> dict[str, str]:
+        """Standard ``RateLimit-*`` response headers for this result."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _bucket_result(
+    policy: RateLimitPolicy, tokens: float, allowed: bool
+) -> RateLimitResult:
+    missing = policy.capacity - tokens
+    return RateLimitResult(
+        allowed=allowed,
+        limit=policy.capacity,
+        remaining=max(0, int(tokens)),
+        reset_after=missing / policy.refill_rate if policy.refill_rate else 0.0,
+        retry_after=(
+            (1 - tokens) / policy.refill_rate
+            if not allowed and policy.refill_rate
+            else 0.0
+        ),
+    )
+
+
+class RateLimitBackend(Protocol):
+    async def consume_all(
+        self, buckets: list[tuple[str, RateLimitPolicy]]
+    ) -> list[RateLimitResult]:
+        """Take a token from every ``(key, policy)`` bucket, or from none.
+
+        Each result's ``allowed`` says whether that bucket had a token.
+        """
+        ...
+
+    async def reset(self) -> None: ...
+
+    async def ping(self) -> None:
+        """Raise if the backend cannot be reached."""
+        ...
+
+
+class InMemoryRateLimitBackend:
+    """Process-local buckets with LRU eviction of idle keys."""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def consume(self, key: str, policy: RateLimitPolicy) -> RateLimitResult:
+        return (await self.consume_all([(key, policy)]))[0]
+
+    async def consume_all(
+        self, buckets: list[tuple[str, RateLimitPolicy]]
+    ) -> list[RateLimitResult]:
+        # No awaits below, so the read-modify-write is atomic on the event loop
+        now = time.monotonic()
+        levels = []
+        for key, policy in buckets:
+            tokens, updated = self._buckets.pop(key, (float(policy.capacity), now))
+            levels.append(
+                min(policy.capacity, tokens + (now - updated) * policy.refill_rate)
+            )
+
+        allowed = [tokens >= 1 for tokens in levels]
+        if all(allowed):
+            levels = [tokens - 1 for tokens in levels]
+
+        for (key, _), tokens in zip(buckets, levels):
+            self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return [
+            _bucket_result(policy, tokens, ok)
+            for (_, policy), tokens, ok in zip(buckets, levels, allowed)
+        ]
+
+    async def reset(self) -> None:
+        self._buckets.clear()
+
+    async def ping(self) -> None:
+        return None
+
+
+# KEYS: bucket keys; ARGV: now, then capacity and refill_rate for each key.
+# Returns allowed, tokens for each key in turn.
+_REDIS_TOKEN_BUCKETS = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local all_allowed = true
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    levels[i] = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    if levels[i] < 1 then
+        all_allowed = false
+    end
+end
+local results = {}
+for i, key in ipairs(KEYS) do
+    local allowed = 0
+    if levels[i] >= 1 then
+        allowed = 1
+    end
+    if all_allowed then
+        levels[i] = levels[i] - 1
+    end
+    local capacity = tonumber(ARGV[2 * i])
+    local rate = tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', key, 'tokens', levels[i], 'updated', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / math.max(rate, 0.001)) + 1)
+    table.insert(results, allowed)
+    table.insert(results, tostring(levels[i]))
+end
+return results
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets shared through Redis, updated atomically with a Lua script."""
+
+    def __init__(self, url: str, prefix: str = "multimind:ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:  # pragma: no cover - optional dependency
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND_URL is set but the 'redis' package is "
+                "not installed"
+            ) from e
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKETS)
+
+    async def consume(self, key: str, policy: RateLimitPolicy) -> RateLimitResult:
+        return (await self.consume_all([(key, policy)]))[0]
+
+    async def consume_all(
+        self, buckets: list[tuple[str, RateLimitPolicy]]
+    ) -> list[RateLimitResult]:
+        if not buckets:
+            return []
+        args: list[float] = [time.time()]
+        for _, policy in buckets:
+            args.extend((policy.capacity, policy.refill_rate))
+        reply = await self._script(
+            keys=[self.prefix + key for key, _ in buckets], args=args
+        )
+        return [
+            _bucket_result(policy, float(tokens), bool(allowed))
+            for (_, policy), allowed, tokens in zip(buckets, reply[::2], reply[1::2])
+        ]
+
+    async def reset(self) -> None:
+        async for key in self._client.scan_iter(match=self.prefix + "*"):
+            await self._client.delete(key)
+
+    async def ping(self) -> None:
+        await self._client.ping()
+
+
+class RateLimiter:
+    """Apply named policies to a set of request identities."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        policies: dict[str, RateLimitPolicy],
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.policies = policies
+        self.enabled = enabled
+
+    async def hit(
+        self, policy_name: str, identities: dict[str, Optional[str]]
+    ) -> Optional[RateLimitResult]:
+        """Consume one token from every identity's bucket, or from none.
+
+        Returns the most restrictive result, or None when limiting is off.
+        """
+        return await self.hit_all([policy_name], identities)
+
+    async def hit_all(
+        self, policy_names: Sequence[str], identities: dict[str, Optional[str]]
+    ) -> Optional[RateLimitResult]:
+        """Like ``hit``, charging every policy in ``policy_names`` or none."""
+        if not self.enabled:
+            return None
+
+        buckets = [
+            (f"{policy.name}:{kind}:{value}", policy)
+            for policy in (self.policies[name] for name in policy_names)
+            for kind, value in identities.items()
+            if value
+        ]
+        results = await self.backend.consume_all(buckets)
+        if not results:
+            return None
+
+        denied = [
+            (policy.name, result)
+            for (_, policy), result in zip(buckets, results)
+            if not result.allowed
+        ]
+        if denied:
+            for name in dict.fromkeys(name for name, _ in denied):
+                metrics.rate_limit_rejections.inc(name)
+            return max(
+                (result for _, result in denied), key=lambda result: result.retry_after
+            )
+        return min(results, key=lambda result: result.remaining)
+
+    async def reset(self) -> None:
+        await self.backend.reset()
+
+
+def client_ip(request: HTTPConnection) -> Optional[str]:
+    """Best-effort client address, honouring X-Forwarded-For when trusted."""
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",", 1)[0].strip()
+    return request.client.host if request.client else None
+
+
+async def _request_session_id(request: Request) -> Optional[str]:
+    session_id = request.path_params.get("session_id")
+    if session_id:
+        return session_id
+
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        if isinstance(body, dict) and isinstance(body.get("session_id"), str):
+            return body["session_id"]
+    return None
+
+
+def request_identities(
+    request: HTTPConnection, session_id: Optional[str] = None
+) -> dict[str, Optional[str]]:
+    """Rate-limit identities of an HTTP request or WebSocket connection."""
+    return {
+        "session": session_id,
+        "ip": client_ip(request),
+        "user": getattr(request.state, "user_id", None),
+    }
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the process-wide limiter from application settings."""
+    policies = {
+        "llm": RateLimitPolicy(
+            "llm", settings.rate_limit_llm_capacity, settings.rate_limit_llm_refill_rate
+        ),
+        "read": RateLimitPolicy(
+            "read",
+            settings.rate_limit_read_capacity,
+            settings.rate_limit_read_refill_rate,
+        ),
+        "batch": RateLimitPolicy(
+            "batch",
+            settings.rate_limit_batch_capacity,
+            settings.rate_limit_batch_refill_rate,
+        ),
+    }
+    if settings.rate_limit_backend_url:
+        backend: RateLimitBackend = RedisRateLimitBackend(
+            settings.rate_limit_backend_url
+        )
+    else:
+        backend = InMemoryRateLimitBackend(settings.rate_limit_max_keys)
+    return RateLimiter(backend, policies, enabled=settings.rate_limit_enabled)
+
+
+rate_limiter = create_rate_limiter()
+
+
+async def enforce_rate_limit(
+    request: Request, policy_name: str, session_id: Optional[str] = None
+) -> None:
+    """Charge ``policy_name`` for ``request``, raising 429 when it is denied."""
+    result = await rate_limiter.hit(
+        policy_name, request_identities(request, session_id)
+    )
+    if result is None:
+        return
+
+    if not result.allowed:
+        logger.warning(
+            "Rate limit '%s' exceeded for session=%s ip=%s",
+            policy_name,
+            session_id,
+            client_ip(request),
+        )
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded. Please slow down.",
+            headers=result.headers(),
+        )
+
+    # Picked up by RateLimitHeadersMiddleware once the response starts
+    request.state.rate_limit = result
+
+
+def rate_limit(policy_name: str):
+    """FastAPI dependency enforcing ``policy_name`` for the current request."""
+
+    async def dependency(request: Request) -> None:
+        session_id = await _request_session_id(request)
+        await enforce_rate_limit(request, policy_name, session_id)
+
+    return dependency
+
+
+class RateLimitHeadersMiddleware:
+    """Attach ``RateLimit-*`` headers recorded by the ``rate_limit`` dependency.
+
+    Routes return ready-made responses (see ``app.utils.serialization``), so
+    the dependency cannot set headers on them directly.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                result = scope.get("state", {}).get("rate_limit")
+                if result is not None:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (name.lower().encode("latin-1"), value.encode("latin-1"))
+                        for name, value in result.headers().items()
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
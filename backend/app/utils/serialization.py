@@ -0,0 +1,106 @@
+"""
+Fast JSON serialization for API responses.
+
+Routes that return ORM rows normally pay for a full pydantic validation pass
+against ``response_model`` followed by ``jsonable_encoder`` and the stdlib
+encoder. The serializers below read the needed attributes straight off
+trusted ORM objects and hand plain dicts to orjson, so returning their
+output wrapped in ``ORJSONResponse`` skips both passes entirely. Mappings
+(e.g. data not loaded from our own database) still go through the pydantic
+schemas.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Iterable
+
+from fastapi.responses import ORJSONResponse
+
+from app.schemas.agent import Agent
+from app.schemas.chat import Message
+
+# Attribute getters are built once at import time instead of per object
+_message_fields = attrgetter("id", "content", "session_id", "agent_id", "created_at")
+_agent_fields = attrgetter(*Agent.model_fields)
+_job_fields = attrgetter(
+    "id",
+    "status",
+    "session_id",
+    "agent_id",
+    "user_message_id",
+    "response_message_id",
+    "attempts",
+    "error",
+    "created_at",
+    "updated_at",
+)
+
+
+def _isoformat(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else None
+
+
+def serialize_message(obj: Any) -> dict:
+    """Serialize a message row to the ``schemas.chat.Message`` shape."""
+    if isinstance(obj, Mapping):
+        return Message.model_validate(obj).model_dump()
+
+    message_id, content, session_id, agent_id, created_at = _message_fields(obj)
+    return {
+        "content": content,
+        "session_id": session_id,
+        "id": message_id,
+        "agent_id": agent_id,
+        "is_user": agent_id is None,
+        "timestamp": _isoformat(created_at),
+    }
+
+
+def serialize_agent(obj: Any) -> dict:
+    """Serialize an agent row to the ``schemas.agent.Agent`` shape."""
+    if isinstance(obj, Mapping):
+        return Agent.model_validate(obj).model_dump()
+
+    return dict(zip(Agent.model_fields, _agent_fields(obj)))
+
+
+def serialize_job(obj: Any) -> dict:
+    """Serialize a chat job row for the job status endpoint and events."""
+    (
+        job_id,
+        status,
+        session_id,
+        agent_id,
+        user_message_id,
+        response_message_id,
+        attempts,
+        error,
+        created_at,
+        updated_at,
+    ) = _job_fields(obj)
+    return {
+        "id": job_id,
+        "status": status,
+        "session_id": session_id,
+        "agent_id": agent_id,
+        "user_message_id": user_message_id,
+        "response_message_id": response_message_id,
+        "attempts": attempts,
+        "error": error,
+        "created_at": _isoformat(created_at),
+        "updated_at": _isoformat(updated_at),
+    }
+
+
+def serialize_messages(messages: Iterable[Any]) -> list[dict]:
+    return [serialize_message(message) for message in messages]
+
+
+def serialize_agents(agents: Iterable[Any]) -> list[dict]:
+    return [serialize_agent(agent) for agent in agents]
+
+
+def json_response(content: Any, status_code: int = 200, **kwargs) -> ORJSONResponse:
+    """Wrap already-serialized content so FastAPI skips response validation."""
+    return ORJSONResponse(content=content, status_code=status_code, **kwargs)
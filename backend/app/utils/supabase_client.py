@@ -4,6 +4,7 @@ This complements the SQLAlchemy database connection for operations
 that benefit from Supabase's features.
 """
 
+import asyncio
 import logging
 from typing import Optional
 
@@ -45,7 +46,11 @@ def is_supabase_configured() -> bool:
 
 
 async def test_supabase_connection() -> bool:
-    """Test the Supabase connection."""
+    """Test the Supabase connection without blocking the event loop."""
+    return await asyncio.to_thread(_test_supabase_connection)
+
+
+def _test_supabase_connection() -> bool:
     try:
         client = get_supabase_client()
         if client is None:
@@ -0,0 +1,541 @@
+"""
+Lightweight distributed tracing for the chat pipeline.
+
+Spans are opened with ``tracer.span(name)`` or the ``@traced`` decorator and
+nest through a context variable, so concurrent requests and background tasks
+keep separate traces. Incoming W3C ``traceparent`` headers continue the
+caller's trace and provider requests carry one onward.
+
+Finished spans are handed to a background thread that batches them to an
+exporter: a JSON-lines file, an OTLP/HTTP collector, or memory for tests.
+When tracing is disabled ``span()`` returns a shared no-op and the
+decorators call straight through.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Optional, Protocol
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "sampled",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        attributes: Optional[dict] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_exception(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled."""
+
+    sampled = False
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    """Return ``(trace_id, parent_span_id, sampled)`` from a W3C header."""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list; used by tests and offline debugging."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.spans.extend(spans)
+
+    def shutdown(self) -> None:
+        pass
+
+    def names(self) -> list[str]:
+        return [span.name for span in self.spans]
+
+
+class FileExporter:
+    """Appends one JSON object per span to a local file."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPHttpExporter:
+    """Posts spans to an OpenTelemetry collector using OTLP/HTTP JSON."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        import httpx
+
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    def payload(self, spans: list[Span]) -> dict:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.utils.tracing"},
+                            "spans": [self._span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    @staticmethod
+    def _span(span: Span) -> dict:
+        data = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items()
+            ],
+            "status": (
+                {"code": 2, "message": span.error} if span.error else {"code": 1}
+            ),
+        }
+        if span.parent_id:
+            data["parentSpanId"] = span.parent_id
+        return data
+
+    def export(self, spans: list[Span]) -> None:
+        response = self._client.post(self.endpoint, json=self.payload(spans))
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+class SimpleSpanProcessor:
+    """Exports each span synchronously as it ends."""
+
+    def __init__(self, exporter: SpanExporter):
+        self.exporter = exporter
+
+    def on_end(self, span: Span) -> None:
+        self.exporter.export([span])
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+
+class BatchSpanProcessor:
+    """Queues spans and exports them in batches from a daemon thread.
+
+    Request handling never waits on the exporter: when the queue is full new
+    spans are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        max_queue_size: int = 2048,
+        batch_size: int = 256,
+        interval: float = 2.0,
+    ):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: queue.Queue[Optional[Span]] = queue.Queue(max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        # Started lazily, and again in forked workers where the thread is gone
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="span-exporter", daemon=True
+                    )
+                    self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch:
+                self._export_batch(batch)
+        self._drain()
+
+    def _collect(self) -> tuple[list[Span], bool]:
+        """Wait for a full batch or the interval; also report shutdown."""
+        batch: list[Span] = []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                span = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if span is None:
+                return batch, True
+            batch.append(span)
+        return batch, False
+
+    def _drain(self) -> None:
+        """Export whatever was queued before shutdown."""
+        remaining = []
+        while True:
+            try:
+                span = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if span is not None:
+                remaining.append(span)
+        if remaining:
+            self._export_batch(remaining)
+
+    def _export_batch(self, batch: list[Span]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning(f"Failed to export {len(batch)} spans: {e}")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self.exporter.shutdown()
+
+
+class _SpanScope:
+    __slots__ = ("tracer", "span", "_token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.span.end_ns = time.time_ns()
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.span.record_exception(exc)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited from another context, e.g. an async generator finalizer
+            _current_span.set(None)
+        if self.span.sampled:
+            self.tracer.processor.on_end(self.span)
+
+
+class Tracer:
+    def __init__(
+        self,
+        enabled: bool = False,
+        sample_rate: float = 1.0,
+        processor=None,
+    ):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.processor = processor or SimpleSpanProcessor(InMemoryExporter())
+
+    def _should_sample(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def span(
+        self,
+        name: str,
+        attributes: Optional[dict] = None,
+        traceparent: Optional[str] = None,
+    ):
+        """Open a span as a context manager.
+
+        Nests under the current span; otherwise continues ``traceparent`` if
+        given, or starts a new trace subject to sampling.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(
+                name, parent.trace_id, parent.span_id, parent.sampled, attributes
+            )
+        else:
+            remote = parse_traceparent(traceparent)
+            if remote is not None:
+                trace_id, parent_id, sampled = remote
+            else:
+                trace_id = f"{random.getrandbits(128):032x}"
+                parent_id, sampled = None, self._should_sample()
+            span = Span(name, trace_id, parent_id, sampled, attributes)
+        return _SpanScope(self, span)
+
+    def inject(self, headers: dict) -> dict:
+        """Add the current ``traceparent`` to outgoing request headers."""
+        span = _current_span.get()
+        if self.enabled and span is not None:
+            headers["traceparent"] = span.traceparent
+        return headers
+
+    def shutdown(self) -> None:
+        self.processor.shutdown()
+
+
+def create_exporter(name: str) -> Optional[SpanExporter]:
+    if name == "file":
+        return FileExporter(settings.tracing_file_path)
+    if name == "otlp":
+        return OTLPHttpExporter(
+            settings.tracing_otlp_endpoint, settings.tracing_service_name
+        )
+    if name == "memory":
+        return InMemoryExporter()
+    return None
+
+
+def create_tracer() -> Tracer:
+    """Build the process-wide tracer from application settings."""
+    exporter = None
+    if settings.tracing_enabled:
+        exporter = create_exporter(settings.tracing_exporter)
+    if exporter is None:
+        return Tracer(enabled=False)
+    processor = BatchSpanProcessor(
+        exporter,
+        max_queue_size=settings.tracing_queue_size,
+        batch_size=settings.tracing_batch_size,
+        interval=settings.tracing_export_interval,
+    )
+    logger.info(
+        "Tracing enabled: exporter=%s sample_rate=%s (pid %s)",
+        settings.tracing_exporter,
+        settings.tracing_sample_rate,
+        os.getpid(),
+    )
+    return Tracer(True, settings.tracing_sample_rate, processor)
+
+
+tracer = create_tracer()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Wrap a sync or async function in a span named after it."""
+
+    def decorator(func: Callable) -> Callable:
+        module = func.__module__.rsplit(".", 1)[-1]
+        span_name = name or f"{module}.{func.__name__}"
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TracingMiddleware:
+    """Open a server span per HTTP request, continuing any ``traceparent``."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        method = scope["method"]
+        with tracer.span(
+            f"HTTP {method}",
+            {"http.method": method, "http.target": scope.get("path", "")},
+            traceparent=traceparent,
+        ) as span:
+
+            async def send_with_trace(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    # Lets clients quote the trace id when reporting slowness
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"traceresponse", span.traceparent.encode("latin-1"))
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"HTTP {method} {route}"
+                    span.set_attribute("http.route", route)
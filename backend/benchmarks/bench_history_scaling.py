@@ -0,0 +1,175 @@
+"""
+Scaling benchmark: history and context latency as the messages table grows.
+
+Grows a scratch database in steps with ``scripts.generate_history`` and,
+at each size, times ``chat_repo.get_messages_by_session``,
+``chat_repo.get_messages_by_session_async`` and ``_build_context_async``
+for a random sample of sessions. Run it before and after an index or
+partitioning change to compare the curves.
+
+Usage:
+    python -m benchmarks.bench_history_scaling [--url sqlite:///./history_bench.db]
+        [--sizes 10000,100000,1000000] [--samples 100] [--fresh] [--json out.json]
+
+Pass a PostgreSQL URL (postgresql://...) to benchmark PostgreSQL; the
+tables there are filled with COPY.
+"""
+
+import os
+
+# Quiet, self-contained defaults; set before the app reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_ENABLE_CONSOLE", "false")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import math  # noqa: E402
+import statistics  # noqa: E402
+import time  # noqa: E402
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.config import Settings  # noqa: E402
+from app.models.chat import ChatSession, Message  # noqa: E402
+from app.repositories import chat_repo  # noqa: E402
+from app.services.chat_service import _build_context_async  # noqa: E402
+from app.utils.db import Base  # noqa: E402
+from benchmarks.stats import percentile  # noqa: E402
+from scripts.generate_history import (  # noqa: E402
+    HistoryGenerator,
+    ensure_agents,
+    generate_history,
+)
+
+PREFIX = "scale"
+
+
+def summarize(timings: list[float]) -> dict:
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def message_count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Message)).scalar_one()
+
+
+def sample_sessions(engine, samples: int) -> list[str]:
+    with engine.connect() as conn:
+        return list(
+            conn.execute(
+                select(ChatSession.id)
+                .where(ChatSession.id.like(f"{PREFIX}-%"))
+                .order_by(func.random())
+                .limit(samples)
+            ).scalars()
+        )
+
+
+def grow(engine, generator: HistoryGenerator, target: int, mean: float) -> int:
+    """Add sessions until the table holds at least ``target`` messages."""
+    count = message_count(engine)
+    step = 0
+    while count < target:
+        sessions = max(1, math.ceil((target - count) / mean))
+        count += generate_history(
+            engine, generator, sessions, prefix=f"{PREFIX}-{time.time_ns()}-{step}"
+        )
+        step += 1
+    return count
+
+
+def time_sync(engine, session_ids: list[str]) -> list[float]:
+    make_session = sessionmaker(bind=engine)
+    timings = []
+    for session_id in session_ids:
+        with make_session() as db:
+            started = time.perf_counter()
+            chat_repo.get_messages_by_session(db, session_id)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def time_async(async_url: str, session_ids: list[str]) -> dict[str, list[float]]:
+    engine = create_async_engine(async_url)
+    make_session = async_sessionmaker(engine, expire_on_commit=False)
+    timings: dict[str, list[float]] = {"history_async": [], "context_async": []}
+    try:
+        for session_id in session_ids:
+            async with make_session() as db:
+                started = time.perf_counter()
+                await chat_repo.get_messages_by_session_async(db, session_id)
+                timings["history_async"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                await _build_context_async(db, session_id)
+                timings["context_async"].append(time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="sqlite:///./history_bench.db")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--messages-per-session", type=float, default=40)
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--fresh", action="store_true", help="drop and recreate the tables first"
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    async_url = Settings(database_url=args.url).effective_async_database_url
+    if args.fresh:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    agents = ensure_agents(engine, ["Assistant", "Coder", "Writer", "Researcher"])
+    generator = HistoryGenerator(
+        list(agents.values()),
+        messages_per_session=args.messages_per_session,
+        seed=args.seed,
+    )
+
+    print(
+        f"{'messages':>10}{'operation':>16}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}"
+    )
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        started = time.perf_counter()
+        count = grow(engine, generator, size, args.messages_per_session)
+        load_seconds = time.perf_counter() - started
+        session_ids = sample_sessions(engine, args.samples)
+
+        timings = {"history_sync": time_sync(engine, session_ids)}
+        timings.update(asyncio.run(time_async(async_url, session_ids)))
+
+        row = {"messages": count, "load_seconds": round(load_seconds, 1)}
+        for name, values in timings.items():
+            row[name] = summarize(values)
+            print(
+                f"{count:>10}{name:>16}{row[name]['p50_ms']:>10.2f}"
+                f"{row[name]['p95_ms']:>10.2f}{row[name]['mean_ms']:>10.2f}"
+            )
+        results.append(row)
+
+    engine.dispose()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"url": engine.url.render_as_string(), "results": results}, f)
+
+
+if __name__ == "__main__":
+    main()
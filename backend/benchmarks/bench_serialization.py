@@ -0,0 +1,118 @@
+"""
+Microbenchmark: FastAPI's default response path vs the orjson fast path.
+
+Compares serializing a page of message history and the agent list the way
+FastAPI does for ``response_model`` routes (pydantic validation, then
+``jsonable_encoder``, then ``JSONResponse``) against
+``app.utils.serialization`` + ``ORJSONResponse``.
+
+Usage:
+    python -m benchmarks.bench_serialization [--messages 200] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.schemas.agent import Agent
+from app.schemas.chat import Message
+from app.utils.serialization import serialize_agents, serialize_messages
+
+
+def make_messages(count: int) -> list[SimpleNamespace]:
+    """Build ORM-like message rows with realistic content sizes."""
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i,
+            content=("Here is a detailed answer about the topic. " * 12),
+            session_id="bench-session",
+            agent_id=None if i % 2 == 0 else (i % 4) + 1,
+            created_at=created_at,
+        )
+        for i in range(count)
+    ]
+
+
+def make_agents(count: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=i,
+            name=f"Agent{i}",
+            description="A helpful specialist agent.",
+            system_prompt="You are a helpful specialist. " * 20,
+            display_name=f"Agent {i}",
+            avatar="A",
+            color="from-blue-500 to-blue-600",
+        )
+        for i in range(count)
+    ]
+
+
+def time_it(func: Callable[[], object], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def default_path(response_type, rows) -> Callable[[], bytes]:
+    """Reproduce FastAPI's serialization for a ``response_model`` route."""
+    field = create_response_field(name="response", type_=response_type)
+    loop = asyncio.new_event_loop()
+
+    def run() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=rows, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    return run
+
+
+def report(name: str, baseline: list[float], fast: list[float]) -> None:
+    base_median = statistics.median(baseline) * 1e6
+    fast_median = statistics.median(fast) * 1e6
+    print(
+        f"{name:<10} default: {base_median:9.1f} us   "
+        f"fast: {fast_median:9.1f} us   "
+        f"speedup: {base_median / fast_median:5.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    agents = make_agents(args.agents)
+
+    report(
+        "messages",
+        time_it(default_path(list[Message], messages), args.repeat),
+        time_it(
+            lambda: ORJSONResponse(serialize_messages(messages)).body, args.repeat
+        ),
+    )
+    report(
+        "agents",
+        time_it(default_path(list[Agent], agents), args.repeat),
+        time_it(lambda: ORJSONResponse(serialize_agents(agents)).body, args.repeat),
+    )
+
+
+if __name__ == "__main__":
+    main()
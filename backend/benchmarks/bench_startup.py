@@ -0,0 +1,433 @@
+"""
+Startup benchmark: import time, time to first request and memory footprint.
+
+For each database backend, and with the other backends' drivers installed
+or hidden, a fresh process is measured for:
+
+- ``import app.main`` wall time, plus a ``-X importtime`` breakdown by
+  top-level package and the slowest ``app.*`` modules;
+- time from process spawn to the first successful ``/api/v1/health/live``,
+  which is what a platform health check waits for when scaling out;
+- resident memory once up, and again after ``--requests`` requests to
+  ``--path``.
+
+"Hidden" drivers fail to import in the child, as on an image built without
+them. Each run is appended to ``--history`` (JSON lines, with the commit and
+machine) and compared with the previous run of the same configuration.
+
+Backends: ``sqlite`` uses a scratch database. ``postgresql`` needs
+``--postgres-url`` pointing at a migrated database and is skipped without
+one. ``azure-sql`` takes the ``AZURE_SQL_*`` variables from the environment,
+falling back to placeholders: the process still starts (engines connect
+lazily) but requests that reach the database fail and are counted.
+
+Usage:
+    python -m benchmarks.bench_startup [--backends sqlite,postgresql,azure-sql]
+        [--drivers installed,hidden] [--repeat 3] [--requests 200]
+        [--path /api/v1/agents] [--postgres-url postgresql://...]
+        [--history benchmarks/baselines/startup_history.jsonl]
+
+Memory is read from /proc and is reported only on Linux.
+"""
+
+import os
+
+# Quiet, self-contained defaults; set before the app reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_ENABLE_CONSOLE", "false")
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import socket  # noqa: E402
+import statistics  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+import time  # noqa: E402
+from collections import defaultdict  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import Optional  # noqa: E402
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+
+from app.models import chat  # noqa: E402,F401  (registers the tables)
+from app.utils.db import Base  # noqa: E402
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HISTORY = Path(__file__).parent / "baselines" / "startup_history.jsonl"
+
+# Driver packages each backend loads through SQLAlchemy (sync and async)
+DRIVERS = {
+    "sqlite": ["aiosqlite"],
+    "postgresql": ["psycopg2", "asyncpg"],
+    "azure-sql": ["pyodbc", "aioodbc"],
+}
+
+# Child preamble: make the modules in BENCH_HIDDEN_MODULES unimportable
+_HIDE = """
+import importlib.abc, os, sys
+
+_hidden = set(filter(None, os.environ.get("BENCH_HIDDEN_MODULES", "").split(",")))
+
+
+class _HiddenModules(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path=None, target=None):
+        if name.partition(".")[0] in _hidden:
+            raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+        return None
+
+
+sys.meta_path.insert(0, _HiddenModules())
+"""
+
+_IMPORT = (
+    _HIDE
+    + """
+import time
+
+started = time.perf_counter()
+import app.main
+
+print(time.perf_counter() - started)
+"""
+)
+
+_SERVE = (
+    _HIDE
+    + """
+import uvicorn
+
+uvicorn.run(
+    "app.main:app",
+    host="127.0.0.1",
+    port=int(sys.argv[1]),
+    log_level="warning",
+    access_log=False,
+)
+"""
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def available(module: str) -> bool:
+    """Whether ``module`` imports here, native libraries included."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import {module}"], capture_output=True
+    )
+    return result.returncode == 0
+
+
+def backend_env(backend: str, tmp: str, args: argparse.Namespace) -> dict:
+    env = {
+        "LOG_LEVEL": "WARNING",
+        "LOG_ENABLE_CONSOLE": "false",
+        # No provider key needed; nothing here calls the LLM
+        "LLM_PROVIDER": "mock",
+        # Every request should reach its handler, not a 429
+        "RATE_LIMIT_ENABLED": "false",
+        "SUPABASE_URL": "",
+        "SUPABASE_KEY": "",
+    }
+    if backend == "sqlite":
+        database_url = f"sqlite:///{tmp}/startup.db"
+        engine = create_engine(database_url)
+        Base.metadata.create_all(engine)
+        engine.dispose()
+        env["DATABASE_URL"] = database_url
+    elif backend == "postgresql":
+        env["DATABASE_URL"] = args.postgres_url
+    elif backend == "azure-sql":
+        env["DATABASE_URL"] = ""
+        for name, placeholder in (
+            ("AZURE_SQL_SERVER", "localhost"),
+            ("AZURE_SQL_DATABASE", "multimind"),
+            ("AZURE_SQL_USERNAME", "bench"),
+            ("AZURE_SQL_PASSWORD", "bench"),
+        ):
+            env[name] = os.environ.get(name) or placeholder
+    else:
+        raise SystemExit(f"Unknown backend: {backend}")
+    return env
+
+
+def import_breakdown(env: dict, top: int) -> dict:
+    """Import wall time and ``-X importtime`` totals for ``import app.main``."""
+    plain = subprocess.run(
+        [sys.executable, "-c", _IMPORT],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if plain.returncode != 0:
+        raise RuntimeError(plain.stderr.strip().splitlines()[-1])
+
+    traced = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    packages: dict[str, int] = defaultdict(int)
+    app_modules: dict[str, int] = {}
+    for line in traced.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        packages[name.partition(".")[0]] += int(self_us)
+        if name == "app" or name.startswith("app."):
+            app_modules[name] = int(cumulative_us)
+
+    def slowest(timings: dict[str, int]) -> list:
+        ranked = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+        return [[name, round(us / 1000, 1)] for name, us in ranked[:top]]
+
+    return {
+        "import_s": round(float(plain.stdout.strip().splitlines()[-1]), 3),
+        "modules": sum(1 for line in traced.stderr.splitlines() if "|" in line) - 1,
+        # Self time summed per package; importtime's own overhead inflates
+        # these, so compare them with each other rather than with import_s
+        "packages_ms": slowest(packages),
+        "app_modules_cumulative_ms": slowest(app_modules),
+    }
+
+
+def serve_once(env: dict, args: argparse.Namespace) -> dict:
+    """Spawn a server, time its first successful request and sample memory."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    # A file rather than a pipe, which a chatty server could fill and block on
+    log = tempfile.TemporaryFile(mode="w+")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-c", _SERVE, str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=log,
+    )
+    try:
+        with httpx.Client(base_url=url, timeout=30) as client:
+            deadline = started + args.start_timeout
+            while True:
+                try:
+                    if client.get("/api/v1/health/live").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.perf_counter() > deadline:
+                    server.kill()
+                    server.wait()
+                    log.seek(0)
+                    lines = log.read().strip().splitlines()
+                    raise RuntimeError(lines[-1] if lines else "server did not start")
+                time.sleep(0.01)
+            first_request = time.perf_counter() - started
+            rss_startup = rss_mb(server.pid)
+
+            errors = 0
+            for _ in range(args.requests):
+                try:
+                    if client.get(args.path).status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+            rss_after = rss_mb(server.pid)
+    finally:
+        if server.poll() is None:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+        log.close()
+
+    return {
+        "first_request_s": round(first_request, 3),
+        "rss_startup_mb": rss_startup,
+        "rss_after_mb": rss_after,
+        "request_errors": errors,
+    }
+
+
+def measure(backend: str, drivers: str, args: argparse.Namespace) -> dict:
+    hidden = []
+    if drivers == "hidden":
+        hidden = [
+            module
+            for other, modules in DRIVERS.items()
+            if other != backend
+            for module in modules
+        ]
+    record = {
+        "config": f"{backend}/{drivers}",
+        "backend": backend,
+        "hidden_modules": hidden,
+        "available": {
+            module: module not in hidden and available(module)
+            for modules in DRIVERS.values()
+            for module in modules
+        },
+        "requests": args.requests,
+        "path": args.path,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, **backend_env(backend, tmp, args))
+        env["BENCH_HIDDEN_MODULES"] = ",".join(hidden)
+        try:
+            record.update(import_breakdown(env, args.top))
+            runs = [serve_once(env, args) for _ in range(args.repeat)]
+        except RuntimeError as exc:
+            record["error"] = str(exc)
+            return record
+
+    # Medians over fresh processes; errors are summed
+    for key in ("first_request_s", "rss_startup_mb", "rss_after_mb"):
+        values = [run[key] for run in runs if run[key] is not None]
+        record[key] = round(statistics.median(values), 3) if values else None
+    record["request_errors"] = sum(run["request_errors"] for run in runs)
+    record["repeat"] = args.repeat
+    return record
+
+
+def commit() -> Optional[str]:
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def machine() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def previous_runs(history: Path) -> dict[str, dict]:
+    """The latest recorded run per configuration."""
+    latest: dict[str, dict] = {}
+    if history.exists():
+        for line in history.read_text().splitlines():
+            if line.strip():
+                record = json.loads(line)
+                latest[record["config"]] = record
+    return latest
+
+
+def _change(current: dict, before: Optional[dict], key: str) -> str:
+    if not before or current.get(key) is None or before.get(key) is None:
+        return ""
+    return f" ({current[key] - before[key]:+.3g})"
+
+
+def _listing(entries: list) -> str:
+    return ", ".join(f"{name} {ms}" for name, ms in entries)
+
+
+def report(record: dict, before: Optional[dict], top: int) -> None:
+    print(f"\n== {record['config']}")
+    if record.get("error"):
+        print(f"   failed to start: {record['error']}")
+        return
+    print(
+        f"   import app.main     {record['import_s']:.3f}s"
+        f"{_change(record, before, 'import_s')}, {record['modules']} modules"
+    )
+    print(
+        f"   first request       {record['first_request_s']:.3f}s"
+        f"{_change(record, before, 'first_request_s')}"
+    )
+    print(
+        f"   RSS at startup      {record['rss_startup_mb']} MB"
+        f"{_change(record, before, 'rss_startup_mb')}"
+    )
+    print(
+        f"   RSS after {record['requests']:<9} {record['rss_after_mb']} MB"
+        f"{_change(record, before, 'rss_after_mb')}"
+        f", {record['request_errors']} failed requests"
+    )
+    packages = record["packages_ms"][:top]
+    print("   slowest packages (self ms): " + _listing(packages))
+    modules = record["app_modules_cumulative_ms"][:top]
+    print("   slowest app modules (cumulative ms): " + _listing(modules))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", default="sqlite,postgresql,azure-sql")
+    parser.add_argument(
+        "--drivers",
+        default="installed,hidden",
+        help="run with the other backends' drivers installed, hidden or both",
+    )
+    parser.add_argument("--postgres-url", help="a migrated PostgreSQL database")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--path", default="/api/v1/agents")
+    parser.add_argument("--start-timeout", type=float, default=60.0)
+    parser.add_argument("--top", type=int, default=8, help="breakdown entries kept")
+    parser.add_argument("--history", type=Path, default=HISTORY)
+    parser.add_argument(
+        "--no-record", action="store_true", help="do not append to --history"
+    )
+    args = parser.parse_args()
+
+    before = previous_runs(args.history)
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit(),
+        "machine": machine(),
+    }
+    records = []
+    for backend in args.backends.split(","):
+        if backend == "postgresql" and not args.postgres_url:
+            print("\n== postgresql skipped: pass --postgres-url")
+            continue
+        for drivers in args.drivers.split(","):
+            record = dict(meta, **measure(backend, drivers, args))
+            previous = before.get(record["config"])
+            if previous and previous.get("machine") != meta["machine"]:
+                previous = None  # not comparable
+            report(record, previous, args.top)
+            records.append(record)
+
+    if records and not args.no_record:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with args.history.open("a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        print(f"\nAppended {len(records)} run(s) to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
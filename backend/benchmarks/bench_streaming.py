@@ -0,0 +1,286 @@
+"""
+Streaming benchmark: time to first token and inter-token latency we add.
+
+Drives streaming chat sends over the WebSocket channel against the mock
+LLM provider, whose token schedule is fixed (first token after
+``--ttft-ms``, then one every ``--token-interval-ms``, no jitter). Whatever
+a client observes beyond that schedule is added by this service: agent
+lookup, context queries, middleware, serialization and the send queue.
+
+Streams run at increasing concurrency levels against one worker; the
+report gives added TTFT and added inter-token gap percentiles per level and
+the highest level whose p95 added TTFT stays under ``--degrade-ms``.
+
+By default a single uvicorn worker is started on a scratch SQLite database
+with admission and rate limits lifted, so they do not queue streams. Use
+``--url`` to target a running server instead (e.g. behind a proxy). It must
+use ``LLM_PROVIDER=mock`` with the schedule given here and
+``MOCK_LLM_JITTER=0``.
+
+Usage:
+    python -m benchmarks.bench_streaming [--levels 1,8,32,64] [--rounds 3]
+        [--ttft-ms 200] [--token-interval-ms 20] [--tokens 50]
+        [--url http://localhost:8000] [--json out.json]
+"""
+
+import os
+
+# Quiet, self-contained defaults; set before the app reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_ENABLE_CONSOLE", "false")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import socket  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import tempfile  # noqa: E402
+import time  # noqa: E402
+import uuid  # noqa: E402
+from contextlib import contextmanager  # noqa: E402
+from dataclasses import dataclass, field  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import Iterator, Optional  # noqa: E402
+
+import httpx  # noqa: E402
+import websockets  # noqa: E402
+from sqlalchemy import create_engine, insert  # noqa: E402
+
+from app.models.chat import Agent  # noqa: E402
+from app.utils.db import Base  # noqa: E402
+from benchmarks.stats import percentile  # noqa: E402
+
+AGENT = "Streamer"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class StreamTiming:
+    ttft: float  # seconds from send to first token
+    gaps: list[float] = field(default_factory=list)
+    total: float = 0.0
+    tokens: int = 0
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(args: argparse.Namespace) -> Iterator[str]:
+    """Run one uvicorn worker on a scratch database with the mock provider."""
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/streaming.db"
+        engine = create_engine(database_url)
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                insert(Agent),
+                [{"name": AGENT, "description": "Benchmark agent"}],
+            )
+        engine.dispose()
+
+        port = _free_port()
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            LLM_PROVIDER="mock",
+            MOCK_LLM_LATENCY=str(args.ttft_ms / 1000),
+            MOCK_LLM_TOKEN_INTERVAL=str(args.token_interval_ms / 1000),
+            MOCK_LLM_REPLY_TOKENS=str(args.tokens),
+            MOCK_LLM_JITTER="0",
+            MOCK_LLM_ERROR_RATE="0",
+            RATE_LIMIT_ENABLED="false",
+            LLM_MAX_CONCURRENCY="100000",
+            LLM_MAX_QUEUE="100000",
+            JOB_WORKERS="0",
+        )
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    if httpx.get(f"{url}/api/v1/health/live").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("Benchmark server failed to start")
+                time.sleep(0.2)
+            yield url
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+async def one_stream(ws_url: str, agent: str, ready: asyncio.Event) -> StreamTiming:
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        # Connections are set up first so only the streams overlap
+        await ready.wait()
+        started = time.perf_counter()
+        await ws.send(
+            json.dumps(
+                {
+                    "type": "send",
+                    "session_id": f"stream-{uuid.uuid4().hex}",
+                    "content": f"@{agent} tell me a story",
+                    "request_id": "bench",
+                }
+            )
+        )
+        arrivals = []
+        while True:
+            frame = json.loads(await ws.recv())
+            if frame["type"] == "token":
+                arrivals.append(time.perf_counter())
+            elif frame["type"] == "done":
+                break
+            elif frame["type"] == "error":
+                raise RuntimeError(f"Stream failed: {frame}")
+        finished = time.perf_counter()
+
+    if not arrivals:
+        raise RuntimeError("Stream produced no tokens")
+    return StreamTiming(
+        ttft=arrivals[0] - started,
+        gaps=[b - a for a, b in zip(arrivals, arrivals[1:])],
+        total=finished - started,
+        tokens=len(arrivals),
+    )
+
+
+async def run_level(
+    ws_url: str, agent: str, concurrency: int, rounds: int
+) -> tuple[list[StreamTiming], float]:
+    timings: list[StreamTiming] = []
+    elapsed = 0.0
+    for _ in range(rounds):
+        ready = asyncio.Event()
+        tasks = [
+            asyncio.create_task(one_stream(ws_url, agent, ready))
+            for _ in range(concurrency)
+        ]
+        await asyncio.sleep(0.2 + concurrency * 0.005)  # let connections open
+        started = time.perf_counter()
+        ready.set()
+        timings.extend(await asyncio.gather(*tasks))
+        elapsed += time.perf_counter() - started
+    return timings, elapsed
+
+
+def summarize(
+    concurrency: int,
+    timings: list[StreamTiming],
+    elapsed: float,
+    args: argparse.Namespace,
+) -> dict:
+    added_ttft = sorted(t.ttft * 1000 - args.ttft_ms for t in timings)
+    added_gap = sorted(
+        gap * 1000 - args.token_interval_ms for t in timings for gap in t.gaps
+    )
+    return {
+        "concurrency": concurrency,
+        "streams": len(timings),
+        "streams_per_s": round(len(timings) / elapsed, 2),
+        "tokens_per_s": round(sum(t.tokens for t in timings) / elapsed, 1),
+        "added_ttft_p50_ms": round(percentile(added_ttft, 0.50), 2),
+        "added_ttft_p95_ms": round(percentile(added_ttft, 0.95), 2),
+        "added_gap_p50_ms": round(percentile(added_gap, 0.50), 2),
+        "added_gap_p95_ms": round(percentile(added_gap, 0.95), 2),
+        "added_gap_p99_ms": round(percentile(added_gap, 0.99), 2),
+    }
+
+
+async def benchmark(url: str, args: argparse.Namespace) -> list[dict]:
+    ws_url = url.replace("http", "ws", 1) + "/api/v1/chat/ws"
+    # Warm up imports, connection pools and the agent lookup
+    await run_level(ws_url, args.agent, 2, 1)
+
+    print(
+        f"{'streams':>8}{'streams/s':>11}{'tokens/s':>10}"
+        f"{'+ttft p50':>11}{'+ttft p95':>11}{'+gap p50':>10}{'+gap p95':>10}"
+        f"{'+gap p99':>10}"
+    )
+    rows = []
+    for concurrency in args.levels:
+        timings, elapsed = await run_level(ws_url, args.agent, concurrency, args.rounds)
+        row = summarize(concurrency, timings, elapsed, args)
+        rows.append(row)
+        print(
+            f"{concurrency:>8}{row['streams_per_s']:>11.1f}{row['tokens_per_s']:>10.0f}"
+            f"{row['added_ttft_p50_ms']:>11.1f}{row['added_ttft_p95_ms']:>11.1f}"
+            f"{row['added_gap_p50_ms']:>10.2f}{row['added_gap_p95_ms']:>10.2f}"
+            f"{row['added_gap_p99_ms']:>10.2f}"
+        )
+    return rows
+
+
+def sustained_level(rows: list[dict], degrade_ms: float) -> Optional[int]:
+    """Highest concurrency before p95 added TTFT first exceeds the budget."""
+    sustained = None
+    for row in rows:
+        if row["added_ttft_p95_ms"] > degrade_ms:
+            break
+        sustained = row["concurrency"]
+    return sustained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="use a running server instead of starting one")
+    parser.add_argument("--agent", default=AGENT)
+    parser.add_argument(
+        "--levels",
+        type=lambda text: [int(v) for v in text.split(",")],
+        default=[1, 8, 32, 64, 128],
+    )
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--token-interval-ms", type=float, default=20.0)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument(
+        "--degrade-ms", type=float, default=50.0, help="p95 added TTFT budget"
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.url:
+        rows = asyncio.run(benchmark(args.url, args))
+    else:
+        with local_server(args) as url:
+            rows = asyncio.run(benchmark(url, args))
+
+    sustained = sustained_level(rows, args.degrade_ms)
+    if sustained is None:
+        print(f"\nAdded p95 TTFT exceeds {args.degrade_ms:.0f}ms at every level")
+    else:
+        print(
+            f"\nOne worker sustains {sustained} concurrent streams within "
+            f"{args.degrade_ms:.0f}ms added p95 TTFT"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "levels": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Load test: drive a running API with a mix of chat traffic.
+
+Virtual users loop over agent listings, message sends and history reads
+spread across many sessions, for a fixed duration. The report gives
+throughput plus p50/p95/p99 latency per route, so capacity can be compared
+release to release.
+
+Run the API against the mock provider, so results measure this service
+rather than OpenAI, and with rate limiting off:
+
+    LLM_PROVIDER=mock MOCK_LLM_LATENCY=0.5 RATE_LIMIT_ENABLED=false \\
+        DATABASE_URL=sqlite:///./loadtest.db python -m app.serve
+
+(create the schema with ``alembic upgrade head`` and agents with
+``python -m scripts.seed_agents`` first; a local PostgreSQL URL works the
+same way). Then:
+
+Usage:
+    python -m benchmarks.loadtest [--url http://localhost:8000]
+        [--users 20] [--duration 30] [--sessions 50]
+        [--mix send=3,history=5,agents=2] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from benchmarks.stats import percentile
+
+API = "/api/v1"
+
+ROUTES = {
+    "agents": ("GET", f"{API}/agents"),
+    "send": ("POST", f"{API}/chat/messages"),
+    "history": ("GET", f"{API}/chat/sessions/{{session_id}}/messages"),
+}
+
+PROMPTS = [
+    "can you summarize what we discussed so far?",
+    "what would you suggest as a next step?",
+    "give me three ideas for a weekend project",
+    "explain that again in simpler terms",
+]
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    @property
+    def errors(self) -> int:
+        return sum(
+            count
+            for status, count in self.statuses.items()
+            if not status.startswith("2")
+        )
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown route {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadTest:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        agents: list[str],
+        mix: dict[str, float],
+        sessions: int,
+        seed: Optional[int] = None,
+    ):
+        self.client = client
+        self.agents = agents
+        self.routes = list(mix)
+        self.weights = list(mix.values())
+        self.sessions = [f"load-{i}" for i in range(sessions)]
+        self.random = random.Random(seed)
+        self.stats: dict[str, RouteStats] = defaultdict(RouteStats)
+
+    def _request(self, route: str) -> tuple[str, str, Optional[dict]]:
+        method, path = ROUTES[route]
+        session_id = self.random.choice(self.sessions)
+        body = None
+        if route == "send":
+            agent = self.random.choice(self.agents)
+            prompt = self.random.choice(PROMPTS)
+            body = {"content": f"@{agent} {prompt}", "session_id": session_id}
+        return method, path.format(session_id=session_id), body
+
+    async def _user(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            route = self.random.choices(self.routes, self.weights)[0]
+            method, path, body = self._request(route)
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            stats = self.stats[route]
+            stats.latencies.append(time.perf_counter() - started)
+            stats.statuses[status] += 1
+
+    async def run(self, users: int, duration: float) -> float:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(self._user(deadline) for _ in range(users)))
+        return time.perf_counter() - started
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        for route, stats in sorted(self.stats.items()):
+            latencies = sorted(stats.latencies)
+            routes[route] = {
+                "requests": len(latencies),
+                "errors": stats.errors,
+                "statuses": dict(stats.statuses),
+                "rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+                "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "rps": round(total / elapsed, 2),
+            "errors": sum(route["errors"] for route in routes.values()),
+            "routes": routes,
+        }
+
+
+def report(summary: dict) -> None:
+    print(
+        f"{'route':<10}{'reqs':>8}{'errors':>8}{'rps':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    for route, row in summary["routes"].items():
+        print(
+            f"{route:<10}{row['requests']:>8}{row['errors']:>8}{row['rps']:>9.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+            f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    print(
+        f"total: {summary['requests']} requests, {summary['errors']} errors, "
+        f"{summary['rps']:.1f} req/s over {summary['elapsed_s']}s"
+    )
+    for route, row in summary["routes"].items():
+        unexpected = {s: n for s, n in row["statuses"].items() if s[0] != "2"}
+        if unexpected:
+            print(f"  {route} non-2xx: {unexpected}")
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(
+        max_connections=args.users, max_keepalive_connections=args.users
+    )
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=limits
+    ) as client:
+        response = await client.get(f"{API}/agents")
+        response.raise_for_status()
+        agents = [agent["name"] for agent in response.json()]
+        if not agents:
+            raise SystemExit("No agents configured; run scripts.seed_agents first")
+
+        test = LoadTest(client, agents, args.mix, args.sessions, seed=args.seed)
+        if args.warmup:
+            await test.run(args.users, args.warmup)
+            test.stats.clear()
+        elapsed = await test.run(args.users, args.duration)
+        return test.summary(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument(
+        "--mix", type=parse_mix, default=parse_mix("send=3,history=5,agents=2")
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    summary = asyncio.run(main_async(args))
+    report(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
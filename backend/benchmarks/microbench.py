@@ -0,0 +1,400 @@
+"""
+Microbenchmarks for per-request hot paths, with stored baselines.
+
+Covers mention parsing and matching, provider message assembly, ``Message`` schema
+validation, CORS origin matching, repository queries and a whole chat turn.
+Database cases run against an in-memory SQLite database and the chat turn
+uses a fake LLM, so timings reflect this codebase only.
+
+``run --save`` writes ``benchmarks/baselines/microbench.json``; ``compare``
+re-runs the suite and exits non-zero when a case's best round is slower than
+its baseline by more than ``--tolerance``. Timings depend on the machine:
+refresh the baseline on the machine that runs ``compare``.
+
+Usage:
+    python -m benchmarks.microbench run [--filter mention] [--save]
+    python -m benchmarks.microbench compare [--tolerance 0.15] [--filter db.]
+"""
+
+import os
+
+# Quiet, self-contained defaults; set before the app reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_ENABLE_CONSOLE", "false")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import inspect  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+from pathlib import Path  # noqa: E402
+from types import SimpleNamespace  # noqa: E402
+from typing import Callable  # noqa: E402
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+BASELINE = Path(__file__).parent / "baselines" / "microbench.json"
+# Compared statistic: the fastest round is the least disturbed by other load
+METRIC = "min_us"
+
+CASES: dict[str, Callable] = {}
+
+
+def case(name: str):
+    """Register a factory returning the function to time (sync or async).
+
+    Factories may be async to set up fixtures such as a seeded database.
+    """
+
+    def register(factory: Callable) -> Callable:
+        CASES[name] = factory
+        return factory
+
+    return register
+
+
+# Fixtures
+
+
+def _agent(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=i,
+        name=f"Agent{i}",
+        description="A helpful specialist agent.",
+        system_prompt="You are a helpful specialist. " * 20,
+    )
+
+
+def _context(turns: int) -> list[str]:
+    return [
+        "User: Could you help me plan the next step?"
+        if i % 2 == 0
+        else "Agent1: Here is a detailed answer about the topic. " * 4
+        for i in range(turns)
+    ]
+
+
+_engine = None
+_database = None
+
+
+async def database(messages: int = 200):
+    """Session factory for a seeded in-memory database, shared by cases."""
+    global _engine, _database
+    if _database is not None:
+        return _database
+
+    from app.models.chat import Agent, ChatSession, Message
+    from app.utils.db import Base
+
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as db:
+        db.add_all(
+            Agent(
+                name=f"Agent{i}",
+                display_name=f"Agent {i}",
+                description="A helpful specialist agent.",
+                system_prompt="You are a helpful specialist.",
+            )
+            for i in range(1, 9)
+        )
+        db.add(ChatSession(id="bench"))
+        db.add_all(
+            Message(
+                session_id="bench",
+                content="Here is a detailed answer about the topic. " * 4,
+                agent_id=None if i % 2 == 0 else (i % 8) + 1,
+            )
+            for i in range(messages)
+        )
+        await db.commit()
+
+    _engine, _database = engine, sessions
+    return sessions
+
+
+# Cases
+
+
+@case("mention.parse_mention")
+def bench_parse_mention():
+    from app.utils.mention_parser import parse_mention
+
+    content = "Thanks for the summary! @Researcher can you find sources for this?"
+    return lambda: parse_mention(content)
+
+
+@case("mention.parse_mention_none")
+def bench_parse_mention_none():
+    from app.utils.mention_parser import parse_mention
+
+    content = "A longer message without any mention, mailing someone@example.com. " * 4
+    return lambda: parse_mention(content)
+
+
+@case("mention.matcher_find")
+def bench_matcher_find():
+    from app.utils.mention_parser import MentionMatcher
+
+    agents = [_agent(i) for i in range(1, 51)]
+    for agent in agents:
+        agent.display_name = f"Agent number {agent.id}"
+    matcher = MentionMatcher.from_agents(agents)
+    content = "Thanks @agent12! @Agent7 can you check with @agent number 30 too?"
+    return lambda: matcher.find(content)
+
+
+@case("llm.build_messages")
+def bench_build_messages():
+    from app.services.llm_service import build_messages
+
+    agent, context = _agent(1), _context(10)
+    return lambda: build_messages(agent, context, "What should I do next?")
+
+
+@case("schema.message_model_validate")
+def bench_message_model_validate():
+    from app.schemas.chat import Message
+
+    row = SimpleNamespace(
+        id=1,
+        content="Here is a detailed answer about the topic. " * 4,
+        session_id="bench",
+        agent_id=2,
+        is_user=False,
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+    return lambda: Message.model_validate(row)
+
+
+@case("cors.is_origin_allowed")
+def bench_is_origin_allowed():
+    from app.config import Settings
+    from app.main import CustomCORSMiddleware
+
+    origins = Settings(environment="production").effective_cors_origins
+    middleware = CustomCORSMiddleware(None, allowed_origins=origins)
+    # A preview deployment: misses every exact origin, matches a wildcard
+    origin = "https://multimind-chat-git-feature-x.vercel.app"
+    return lambda: middleware.is_origin_allowed(origin)
+
+
+@case("db.get_agents_async")
+async def bench_get_agents():
+    from app.repositories import agent_repo
+
+    sessions = await database()
+
+    async def run():
+        async with sessions() as db:
+            await agent_repo.get_agents_async(db)
+
+    return run
+
+
+@case("db.get_messages_by_session_async")
+async def bench_get_messages():
+    from app.repositories import chat_repo
+
+    sessions = await database()
+
+    async def run():
+        async with sessions() as db:
+            await chat_repo.get_messages_by_session_async(db, "bench")
+
+    return run
+
+
+@case("chat.build_context_async")
+async def bench_build_context():
+    from app.services.chat_service import _build_context_async
+
+    sessions = await database()
+
+    async def run():
+        async with sessions() as db:
+            await _build_context_async(db, "bench")
+
+    return run
+
+
+@case("chat.create_message_async")
+async def bench_create_message():
+    from app.external.openai_client import LLMCompletion
+    from app.schemas.chat import MessageCreate
+    from app.services import chat_service, llm_service
+
+    sessions = await database()
+
+    async def fake_completion(agent, context, user_message):
+        return LLMCompletion(content="A canned reply.", model="fake", latency_ms=0.0)
+
+    # Process-wide: the suite never talks to a real provider
+    llm_service.generate_completion_async = fake_completion
+    message = MessageCreate(content="@Agent3 what do you think?", session_id="bench")
+
+    async def run():
+        async with sessions() as db:
+            await chat_service.create_message_async(db, message)
+
+    return run
+
+
+# Runner
+
+
+def _timer(factory: Callable, loop: asyncio.AbstractEventLoop):
+    """A function timing ``n`` calls of the case, in seconds."""
+    target = factory()
+    if inspect.isawaitable(target):
+        target = loop.run_until_complete(target)
+
+    if inspect.iscoroutinefunction(target):
+
+        async def many(n: int) -> float:
+            start = time.perf_counter()
+            for _ in range(n):
+                await target()
+            return time.perf_counter() - start
+
+        return lambda n: loop.run_until_complete(many(n))
+
+    def many_sync(n: int) -> float:
+        start = time.perf_counter()
+        for _ in range(n):
+            target()
+        return time.perf_counter() - start
+
+    return many_sync
+
+
+def measure(
+    factory: Callable,
+    loop: asyncio.AbstractEventLoop,
+    rounds: int,
+    min_round_time: float,
+) -> dict:
+    timer = _timer(factory, loop)
+    # Calibrate so a round is long enough for the clock, then warm up
+    number = 1
+    while timer(number) < min_round_time and number < 1_000_000:
+        number *= 2
+    timer(number)
+
+    per_call = [timer(number) / number * 1e6 for _ in range(rounds)]
+    return {
+        "median_us": round(statistics.median(per_call), 3),
+        "mean_us": round(statistics.fmean(per_call), 3),
+        "min_us": round(min(per_call), 3),
+        "stdev_us": round(statistics.stdev(per_call), 3) if rounds > 1 else 0.0,
+        "rounds": rounds,
+        "calls_per_round": number,
+    }
+
+
+def run_suite(pattern: str, rounds: int, min_round_time: float) -> dict:
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        for name, factory in CASES.items():
+            if pattern in name:
+                results[name] = measure(factory, loop, rounds, min_round_time)
+                print(f"{name:<36} {results[name][METRIC]:>12.2f} us")
+    finally:
+        if _engine is not None:
+            # aiosqlite's worker thread would otherwise keep the process alive
+            loop.run_until_complete(_engine.dispose())
+        loop.close()
+    return results
+
+
+def machine() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print a comparison table and return the names of regressed cases."""
+    regressions = []
+    print(f"\n{'case':<36}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            print(f"{name:<36}{'-':>12}{current[METRIC]:>12.2f}{'new':>9}")
+            continue
+        change = current[METRIC] / before[METRIC] - 1
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -tolerance:
+            flag = "  faster"
+        print(
+            f"{name:<36}{before[METRIC]:>12.2f}{current[METRIC]:>12.2f}"
+            f"{change:>+9.1%}{flag}"
+        )
+    if baseline.get("machine") != machine():
+        print("\nnote: baseline was recorded on a different machine or Python")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("run", "compare"):
+        sub = commands.add_parser(command)
+        sub.add_argument("--filter", default="", help="substring of case names")
+        sub.add_argument("--rounds", type=int, default=15)
+        sub.add_argument("--min-round-time", type=float, default=0.02)
+        sub.add_argument("--baseline", type=Path, default=BASELINE)
+    commands.choices["run"].add_argument(
+        "--save", action="store_true", help="write the results as the baseline"
+    )
+    commands.choices["compare"].add_argument(
+        "--tolerance", type=float, default=0.15, help="allowed slowdown, 0.15 = 15%%"
+    )
+    args = parser.parse_args()
+
+    results = run_suite(args.filter, args.rounds, args.min_round_time)
+
+    if args.command == "run":
+        if args.save:
+            baseline = {"machine": machine(), "results": results}
+            if args.filter and args.baseline.exists():
+                # Keep the cases this run skipped
+                baseline = json.loads(args.baseline.read_text())
+                baseline["machine"] = machine()
+                baseline["results"].update(results)
+            args.baseline.parent.mkdir(parents=True, exist_ok=True)
+            args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+            print(f"\nSaved baseline to {args.baseline}")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed beyond {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Memory soak test: run the chat pipeline for hours and watch what grows.
+
+Virtual users send messages through ``create_message_async`` and
+``stream_message_async`` in-process, against the mock LLM provider and a
+scratch SQLite database, rotating over ``--sessions`` sessions. tracemalloc
+runs throughout. Once ``--warmup`` has let caches, pools and lazy imports
+settle, a baseline snapshot and RSS are taken; every ``--interval`` the
+report shows RSS, traced memory and the allocation sites grown the most
+since the baseline.
+
+Exits non-zero when RSS, less tracemalloc's own bookkeeping, grows more
+than ``--max-rss-growth-mb`` past the warm-up. Growth that RSS shows but
+tracemalloc does not is native memory (SSL contexts, driver buffers, the
+SQLite page cache) or allocator fragmentation.
+
+For a worker under real traffic, use ``/api/v1/debug/memory`` with
+``MEMORY_TRACKING_ENABLED=true`` and a ``MEMORY_TOKEN`` instead.
+
+Usage:
+    python -m benchmarks.soak [--duration 2h] [--interval 5m] [--warmup 2m]
+        [--users 8] [--sessions 200] [--stream-ratio 0.5]
+        [--max-rss-growth-mb 50] [--frames 5] [--top 10] [--json soak.json]
+"""
+
+import os
+import tempfile
+
+# Quiet, self-contained defaults; set before the app reads its settings
+_SCRATCH = tempfile.mkdtemp(prefix="soak-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_SCRATCH}/soak.db")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_ENABLE_CONSOLE", "false")
+os.environ.setdefault("LLM_PROVIDER", "mock")
+os.environ.setdefault("MOCK_LLM_LATENCY", "0.01")
+os.environ.setdefault("MOCK_LLM_TOKEN_INTERVAL", "0.001")
+os.environ.setdefault("MOCK_LLM_REPLY_TOKENS", "60")
+# SQLite writers queue behind each other here; that is not what is measured
+os.environ.setdefault("DB_SLOW_QUERY_MS", "60000")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import gc  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import shutil  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+import tracemalloc  # noqa: E402
+from contextlib import aclosing  # noqa: E402
+
+from app.models import chat  # noqa: E402,F401  (registers the tables)
+from app.schemas.chat import MessageCreate  # noqa: E402
+from app.services import chat_service  # noqa: E402
+from app.utils import db as database  # noqa: E402
+from app.utils.memory import MemoryTracker, rss_bytes  # noqa: E402
+from scripts.generate_history import ensure_agents  # noqa: E402
+
+AGENTS = ["Assistant", "Coder", "Writer", "Researcher"]
+PROMPTS = [
+    "can you summarize what we discussed so far?",
+    "what would you suggest as a next step?",
+    "give me three ideas for a weekend project",
+    "explain that again in simpler terms",
+]
+MB = 1024 * 1024
+
+
+def parse_duration(text: str) -> float:
+    """Seconds from ``90``, ``90s``, ``5m`` or ``2h``."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1:] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+class Soak:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.turns = 0
+        self.errors = 0
+        self.random = random.Random(args.seed)
+
+    def _message(self) -> MessageCreate:
+        session = self.random.randrange(self.args.sessions)
+        agent = self.random.choice(AGENTS)
+        prompt = self.random.choice(PROMPTS)
+        return MessageCreate(
+            content=f"@{agent} {prompt}", session_id=f"soak-{session}"
+        )
+
+    async def turn(self) -> None:
+        message = self._message()
+        async with database.AsyncSessionLocal() as db:
+            if self.random.random() < self.args.stream_ratio:
+                async with aclosing(
+                    chat_service.stream_message_async(db, message)
+                ) as events:
+                    async for _ in events:
+                        pass
+            else:
+                await chat_service.create_message_async(db, message)
+
+    async def user(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            try:
+                await self.turn()
+            except Exception as e:
+                self.errors += 1
+                if self.errors <= 5:
+                    print(f"turn failed: {e!r}", file=sys.stderr)
+            self.turns += 1
+
+
+def sample(started: float, soak: Soak) -> dict:
+    rss = rss_bytes()
+    # tracemalloc's own bookkeeping grows with live objects; leave it out
+    overhead = tracemalloc.get_tracemalloc_memory()
+    return {
+        "elapsed_s": round(time.monotonic() - started, 1),
+        "turns": soak.turns,
+        "errors": soak.errors,
+        "rss_bytes": None if rss is None else rss - overhead,
+        "traced_bytes": tracemalloc.get_traced_memory()[0],
+        "growth": [],
+    }
+
+
+def print_sample(row: dict, start: dict) -> None:
+    rss = row["rss_bytes"] or 0
+    rss_delta = rss - (start["rss_bytes"] or 0)
+    traced_delta = row["traced_bytes"] - start["traced_bytes"]
+    print(
+        f"\n[{row['elapsed_s'] / 60:7.1f} min] turns {row['turns']:>9}"
+        f"  errors {row['errors']:>5}"
+        f"  rss {rss / MB:8.1f} MB ({rss_delta / MB:+.1f})"
+        f"  traced {row['traced_bytes'] / MB:7.1f} MB ({traced_delta / MB:+.1f})"
+    )
+    for site in row["growth"]:
+        print(
+            f"  {site['size_diff_bytes'] / 1024:+10.1f} KiB"
+            f" {site['count_diff']:+8} blocks  {site['site']}"
+        )
+
+
+async def soak(args: argparse.Namespace) -> dict:
+    tracker = MemoryTracker(frames=args.frames)
+    tracker.start()
+    runner = Soak(args)
+    stop = asyncio.Event()
+    users = [asyncio.create_task(runner.user(stop)) for _ in range(args.users)]
+    started = time.monotonic()
+    deadline = started + args.warmup + args.duration
+    try:
+        print(f"Warming up for {args.warmup:.0f}s")
+        await asyncio.sleep(args.warmup)
+        gc.collect()
+        baseline = tracker.snapshot()
+        start = sample(started, runner)
+        samples = [start]
+        print(
+            f"Baseline after {runner.turns} turns: "
+            f"rss {(start['rss_bytes'] or 0) / MB:.1f} MB, "
+            f"traced {start['traced_bytes'] / MB:.1f} MB"
+        )
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(args.interval, deadline - time.monotonic()))
+            gc.collect()
+            snapshot = tracker.snapshot()
+            row = sample(started, runner)
+            row["growth"] = tracker.growth(snapshot, baseline, args.top)
+            samples.append(row)
+            print_sample(row, start)
+    finally:
+        stop.set()
+        await asyncio.gather(*users, return_exceptions=True)
+        tracker.stop()
+        # aiosqlite's worker thread would otherwise keep the process alive
+        await database.async_engine.dispose()
+    return {"baseline": start, "samples": samples[1:]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=parse_duration, default="2h")
+    parser.add_argument("--interval", type=parse_duration, default="5m")
+    parser.add_argument("--warmup", type=parse_duration, default="2m")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument(
+        "--stream-ratio", type=float, default=0.5, help="fraction of streamed turns"
+    )
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50.0)
+    parser.add_argument(
+        "--frames", type=int, default=5, help="stack frames per allocation site"
+    )
+    parser.add_argument("--top", type=int, default=10, help="growing sites shown")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="also write the samples to this file")
+    args = parser.parse_args()
+
+    database.Base.metadata.create_all(database.engine)
+    ensure_agents(database.engine, AGENTS)
+    try:
+        result = asyncio.run(soak(args))
+    finally:
+        database.engine.dispose()
+        shutil.rmtree(_SCRATCH, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), **result}, f, indent=2)
+
+    start = result["baseline"]
+    end = result["samples"][-1] if result["samples"] else start
+    if start["rss_bytes"] is None:
+        print("\nRSS is unavailable on this platform; no growth check")
+        return
+    growth_mb = (end["rss_bytes"] - start["rss_bytes"]) / MB
+    hours = (end["elapsed_s"] - start["elapsed_s"]) / 3600
+    rate = f", {growth_mb / hours:+.1f} MB/h" if hours else ""
+    print(
+        f"\nRSS grew {growth_mb:+.1f} MB over {end['turns'] - start['turns']} turns"
+        f"{rate} (limit {args.max_rss_growth_mb:.0f} MB)"
+    )
+    if growth_mb > args.max_rss_growth_mb:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""add chat jobs
+
+Revision ID: add_chat_jobs
+Revises: add_idempotency_keys
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_chat_jobs'
+down_revision = 'add_idempotency_keys'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Durable queue for chat turns submitted in async mode
+    op.create_table('chat_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('session_id', sa.String(length=255), nullable=True),
+    sa.Column('user_message_id', sa.Integer(), nullable=True),
+    sa.Column('agent_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('response_message_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('available_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ),
+    sa.ForeignKeyConstraint(['response_message_id'], ['messages.id'], ),
+    sa.ForeignKeyConstraint(['session_id'], ['chat_sessions.id'], ),
+    sa.ForeignKeyConstraint(['user_message_id'], ['messages.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_chat_jobs_session_id'), 'chat_jobs', ['session_id'], unique=False)
+    op.create_index(op.f('ix_chat_jobs_status'), 'chat_jobs', ['status'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_chat_jobs_status'), table_name='chat_jobs')
+    op.drop_index(op.f('ix_chat_jobs_session_id'), table_name='chat_jobs')
+    op.drop_table('chat_jobs')
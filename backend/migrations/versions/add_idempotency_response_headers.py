@@ -0,0 +1,22 @@
+"""add idempotency response headers
+
+Revision ID: add_idempotency_response_headers
+Revises: add_message_usage
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_idempotency_response_headers'
+down_revision = 'add_message_usage'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Headers such as Location that a replayed response must repeat
+    op.add_column('idempotency_keys', sa.Column('response_headers', sa.Text(), nullable=True))
+
+def downgrade():
+    op.drop_column('idempotency_keys', 'response_headers')
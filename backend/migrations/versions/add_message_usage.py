@@ -0,0 +1,47 @@
+"""add message usage
+
+Revision ID: add_message_usage
+Revises: add_chat_jobs
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_message_usage'
+down_revision = 'add_chat_jobs'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Token usage and provider latency per generated reply
+    op.create_table('message_usage',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.String(length=255), nullable=True),
+    sa.Column('agent_id', sa.Integer(), nullable=True),
+    sa.Column('model', sa.String(length=100), nullable=True),
+    sa.Column('mode', sa.String(length=20), nullable=False),
+    sa.Column('outcome', sa.String(length=20), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+    sa.Column('completion_tokens', sa.Integer(), nullable=True),
+    sa.Column('cached_tokens', sa.Integer(), nullable=True),
+    sa.Column('latency_ms', sa.Float(), nullable=True),
+    sa.Column('ttft_ms', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['agents.id'], ),
+    sa.ForeignKeyConstraint(['message_id'], ['messages.id'], ),
+    sa.ForeignKeyConstraint(['session_id'], ['chat_sessions.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('message_id')
+    )
+    op.create_index(op.f('ix_message_usage_agent_id'), 'message_usage', ['agent_id'], unique=False)
+    op.create_index(op.f('ix_message_usage_created_at'), 'message_usage', ['created_at'], unique=False)
+    op.create_index(op.f('ix_message_usage_session_id'), 'message_usage', ['session_id'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_message_usage_session_id'), table_name='message_usage')
+    op.drop_index(op.f('ix_message_usage_created_at'), table_name='message_usage')
+    op.drop_index(op.f('ix_message_usage_agent_id'), table_name='message_usage')
+    op.drop_table('message_usage')
@@ -0,0 +1,234 @@
+"""
+Bulk-generate synthetic chat history for scaling tests.
+
+Creates ``--sessions`` sessions whose message counts follow a geometric
+distribution around ``--messages-per-session``. Turns alternate between the
+user and an agent drawn from ``--agent-mix``, and message lengths follow
+``--length-mix`` (short/medium/long buckets). PostgreSQL tables are filled
+with COPY, other databases with batched executemany inserts.
+
+Run it against a scratch database: it appends rows and never deletes.
+
+Usage:
+    python -m scripts.generate_history [--url sqlite:///./history.db]
+        [--sessions 1000] [--messages-per-session 40]
+        [--length-mix short=0.5,medium=0.35,long=0.15]
+        [--agent-mix Assistant=2,Coder=1] [--seed 1]
+"""
+
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy import Engine, create_engine, insert, select
+
+from app.models.chat import Agent, ChatSession, Message
+from app.utils.db import Base
+
+# Character ranges per length bucket
+LENGTHS = {"short": (20, 120), "medium": (200, 800), "long": (1500, 4000)}
+
+_TEXT = (
+    "Here is a detailed answer that covers the question from a few angles, "
+    "with examples, caveats and a short summary at the end. "
+) * 40
+
+
+def parse_weights(text: str) -> dict[str, float]:
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class HistoryGenerator:
+    def __init__(
+        self,
+        agent_ids: list[int],
+        agent_weights: Optional[list[float]] = None,
+        length_mix: Optional[dict[str, float]] = None,
+        messages_per_session: float = 40,
+        seed: Optional[int] = None,
+    ):
+        if not agent_ids:
+            raise ValueError("At least one agent is required")
+        self.agent_ids = agent_ids
+        self.agent_weights = agent_weights
+        length_mix = length_mix or {"short": 0.5, "medium": 0.35, "long": 0.15}
+        unknown = set(length_mix) - set(LENGTHS)
+        if unknown:
+            raise ValueError(f"Unknown length buckets: {sorted(unknown)}")
+        self.buckets = list(length_mix)
+        self.bucket_weights = list(length_mix.values())
+        self.messages_per_session = messages_per_session
+        self.random = random.Random(seed)
+
+    def _message_count(self) -> int:
+        # Geometric: most sessions are short, a few are very long
+        p = 1 / max(1.0, self.messages_per_session)
+        count = 1
+        while self.random.random() > p:
+            count += 1
+        return count
+
+    def _content(self) -> str:
+        bucket = self.random.choices(self.buckets, self.bucket_weights)[0]
+        low, high = LENGTHS[bucket]
+        start = self.random.randrange(0, 200)
+        return _TEXT[start : start + self.random.randint(low, high)]
+
+    def sessions(self, count: int, prefix: str) -> Iterator[tuple[str, list[dict]]]:
+        """Yield ``(session_id, message rows)`` for ``count`` new sessions."""
+        now = datetime.now(timezone.utc)
+        for index in range(count):
+            session_id = f"{prefix}-{index}"
+            started = now - timedelta(minutes=self.random.randint(0, 60 * 24 * 90))
+            agent_id = self.random.choices(self.agent_ids, self.agent_weights)[0]
+            rows = []
+            for turn in range(self._message_count()):
+                rows.append(
+                    {
+                        "session_id": session_id,
+                        # Even turns are the user's, odd ones the agent's reply
+                        "agent_id": agent_id if turn % 2 else None,
+                        "content": self._content(),
+                        "created_at": started + timedelta(seconds=20 * turn),
+                    }
+                )
+            yield session_id, rows
+
+
+def _copy_rows(engine: Engine, table: str, columns: list[str], rows: list) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+                "WITH (FORMAT csv, NULL '')",
+                buffer,
+            )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def write_batch(engine: Engine, session_ids: list[str], messages: list[dict]) -> None:
+    if engine.dialect.name == "postgresql":
+        _copy_rows(engine, "chat_sessions", ["id"], [{"id": s} for s in session_ids])
+        _copy_rows(
+            engine,
+            "messages",
+            ["session_id", "agent_id", "content", "created_at"],
+            messages,
+        )
+        return
+    with engine.begin() as conn:
+        conn.execute(insert(ChatSession), [{"id": s} for s in session_ids])
+        conn.execute(insert(Message), messages)
+
+
+def generate_history(
+    engine: Engine,
+    generator: HistoryGenerator,
+    sessions: int,
+    prefix: str = "synthetic",
+    batch_size: int = 20000,
+) -> int:
+    """Insert ``sessions`` generated sessions; returns the message count."""
+    total = 0
+    session_ids: list[str] = []
+    messages: list[dict] = []
+    for session_id, rows in generator.sessions(sessions, prefix):
+        session_ids.append(session_id)
+        messages.extend(rows)
+        if len(messages) >= batch_size:
+            write_batch(engine, session_ids, messages)
+            total += len(messages)
+            session_ids, messages = [], []
+    if session_ids:
+        write_batch(engine, session_ids, messages)
+        total += len(messages)
+    return total
+
+
+def ensure_agents(engine: Engine, names: list[str]) -> dict[str, int]:
+    """Agent ids by name, creating any named agents that do not exist."""
+    with engine.begin() as conn:
+        existing = dict(conn.execute(select(Agent.name, Agent.id)).all())
+        missing = [name for name in names if name not in existing]
+        if missing:
+            conn.execute(
+                insert(Agent),
+                [
+                    {
+                        "name": name,
+                        "display_name": name,
+                        "description": "Synthetic agent for scaling tests",
+                        "system_prompt": f"You are {name}.",
+                    }
+                    for name in missing
+                ],
+            )
+            existing = dict(conn.execute(select(Agent.name, Agent.id)).all())
+    return existing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="database URL (default: app settings)")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--messages-per-session", type=float, default=40)
+    parser.add_argument("--length-mix", default="short=0.5,medium=0.35,long=0.15")
+    parser.add_argument(
+        "--agent-mix",
+        default="Assistant,Coder,Writer,Researcher",
+        help="agent names with optional weights, e.g. Assistant=2,Coder=1",
+    )
+    parser.add_argument("--prefix", default=None, help="session id prefix")
+    parser.add_argument("--batch-size", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from app.utils.db import engine
+    Base.metadata.create_all(engine)
+
+    agent_mix = parse_weights(args.agent_mix)
+    agents = ensure_agents(engine, list(agent_mix))
+    generator = HistoryGenerator(
+        [agents[name] for name in agent_mix],
+        list(agent_mix.values()),
+        parse_weights(args.length_mix),
+        args.messages_per_session,
+        seed=args.seed,
+    )
+
+    started = time.perf_counter()
+    count = generate_history(
+        engine,
+        generator,
+        args.sessions,
+        prefix=args.prefix or f"synthetic-{int(time.time())}",
+        batch_size=args.batch_size,
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"Inserted {args.sessions} sessions, {count} messages in {elapsed:.1f}s "
+        f"({count / elapsed:,.0f} messages/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
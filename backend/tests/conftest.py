@@ -9,6 +9,8 @@ os.environ["AZURE_SQL_SERVER"] = "test"
 os.environ["AZURE_SQL_DATABASE"] = "test"
 os.environ["AZURE_SQL_USERNAME"] = "test"
 os.environ["AZURE_SQL_PASSWORD"] = "test"
+# Tests drive job workers explicitly instead of running them in the app
+os.environ["JOB_WORKERS"] = "0"
 
 # Clear environment variables that might interfere with config tests
 config_env_vars = [
@@ -44,6 +46,7 @@ from app.main import app
 from app.utils.db import get_db, get_async_db, SessionLocal
 from app.models.chat import Agent, Base
 from app.services import llm_service
+from app.external.openai_client import LLMCompletion
 from app.config import settings
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -95,6 +98,33 @@ def setup_test_database():
     db_module.AsyncSessionLocal = original_async_session_local
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def reset_rate_limiter():
+    """Start every test with full rate-limit buckets."""
+    from app.utils.rate_limit import rate_limiter
+
+    await rate_limiter.reset()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_mention_index():
+    """Re-read the agents each test creates instead of a cached index."""
+    from app.utils.mention_parser import mention_index
+
+    mention_index.invalidate()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_job_stats():
+    """Count the jobs each test creates instead of cached totals."""
+    from app.services.job_stats import job_stats
+
+    job_stats.invalidate()
+    yield
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database session for each test."""
@@ -128,7 +158,17 @@ def mock_llm_service():
     """Mock the LLM service to avoid API calls during testing."""
     with patch.object(llm_service, "generate_response_async") as mock:
         mock.return_value = "Hello! This is a test response from the agent."
-        yield mock
+
+        # The chat service asks for completions with usage; answer with the
+        # mocked text so tests can keep configuring ``mock``
+        async def completion(agent, context, user_message):
+            content = await mock(
+                agent=agent, context=context, user_message=user_message
+            )
+            return LLMCompletion(content=content, model="test-model", latency_ms=1.0)
+
+        with patch.object(llm_service, "generate_completion_async", completion):
+            yield mock
 
 
 @pytest.fixture(scope="function")
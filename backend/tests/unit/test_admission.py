@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from app.utils.admission import AdmissionController, AdmissionRejectedError
+
+
+class TestAdmissionController:
+
+    @pytest.mark.asyncio
+    async def test_admits_up_to_limit(self):
+        """Test that slots are granted immediately below the limit."""
+        controller = AdmissionController("test", 2, 2, 1.0)
+
+        await controller.acquire()
+        await controller.acquire()
+
+        assert controller.in_flight == 2
+        assert controller.queue_depth == 0
+        assert controller.admitted_total == 2
+
+    @pytest.mark.asyncio
+    async def test_waiter_admitted_on_release(self):
+        """Test that queued callers get the slot in FIFO order."""
+        controller = AdmissionController("test", 1, 2, 1.0)
+        await controller.acquire()
+
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+
+        controller.release()
+        await waiter
+
+        assert controller.in_flight == 1
+        assert controller.queue_depth == 0
+        assert controller.last_wait_seconds >= 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """Test fail-fast rejection once the queue is full."""
+        controller = AdmissionController("test", 1, 1, 1.0)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            await controller.acquire()
+
+        assert exc_info.value.reason == "queue full"
+        assert int(exc_info.value.retry_after_header) >= 1
+        assert controller.rejected_total == 1
+        waiter.cancel()
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        """Test that waiters give up after the queue deadline."""
+        controller = AdmissionController("test", 1, 5, 0.01)
+        await controller.acquire()
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            await controller.acquire()
+
+        assert exc_info.value.reason == "queue timeout"
+        assert controller.queue_depth == 0
+        assert controller.timed_out_total == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test that cancelled waiters do not hold a queue position."""
+        controller = AdmissionController("test", 1, 5, 1.0)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert controller.queue_depth == 0
+        controller.release()
+        assert controller.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_caps_concurrency(self):
+        """Test that concurrent work never exceeds the in-flight limit."""
+        controller = AdmissionController("test", 2, 10, 1.0)
+        running = 0
+        peak = 0
+
+        async def work():
+            nonlocal running, peak
+            async with controller.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.005)
+                running -= 1
+
+        await asyncio.gather(*(work() for _ in range(6)))
+
+        assert peak == 2
+        assert controller.in_flight == 0
+        assert controller.stats()["admitted_total"] == 6
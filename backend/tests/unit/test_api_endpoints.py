@@ -232,6 +232,194 @@ class TestChatEndpoints:
             data = response.json()
             assert "detail" in data
 
+    @pytest.mark.asyncio
+    async def test_send_message_llm_overloaded(self, async_client):
+        """Test that LLM admission rejection maps to 503 with Retry-After."""
+        from app.utils.admission import AdmissionRejectedError
+
+        message_data = {"content": "@Assistant help", "session_id": "test-session"}
+
+        with patch(
+            "app.api.v1.chat.chat_service.create_message_async"
+        ) as mock_create_message:
+            mock_create_message.side_effect = AdmissionRejectedError(
+                "llm", "queue full", 2.5
+            )
+
+            response = await async_client.post(
+                "/api/v1/chat/messages", json=message_data
+            )
+
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "3"
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch(self, async_client):
+        """Test batch submission with per-item results in submission order."""
+
+        async def create(db, message):
+            if "@" not in message.content:
+                raise ValueError("No agent mentioned in message")
+            return {"content": f"re: {message.content}"}
+
+        batch = {
+            "messages": [
+                {"content": "@Assistant one", "session_id": "s1"},
+                {"content": "no mention", "session_id": "s2"},
+                {"content": "@Assistant two", "session_id": "s1"},
+            ]
+        }
+
+        with patch("app.api.v1.chat.chat_service.create_message_async", create):
+            response = await async_client.post(
+                "/api/v1/chat/messages/batch", json=batch
+            )
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [result["index"] for result in results] == [0, 1, 2]
+        assert [result["status"] for result in results] == [200, 400, 200]
+        assert results[2]["result"]["content"] == "re: @Assistant two"
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_stream(self, async_client):
+        """Test that batch results can be streamed as NDJSON."""
+        import json
+
+        batch = {
+            "messages": [
+                {"content": "@Assistant one", "session_id": "s1"},
+                {"content": "@Assistant two", "session_id": "s2"},
+            ]
+        }
+
+        with patch(
+            "app.api.v1.chat.chat_service.create_message_async"
+        ) as mock_create_message:
+            mock_create_message.return_value = {"content": "ok"}
+
+            response = await async_client.post(
+                "/api/v1/chat/messages/batch?stream=true", json=batch
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["index"] for line in lines) == [0, 1]
+        assert all(line["status"] == 200 for line in lines)
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_rate_limited(self, async_client):
+        """Test that items beyond the batch allowance are rejected individually."""
+        from app.utils.rate_limit import RateLimitPolicy, rate_limiter
+
+        batch = {
+            "messages": [
+                {"content": "@Assistant hi", "session_id": "s1"} for _ in range(3)
+            ]
+        }
+
+        with (
+            patch.dict(
+                rate_limiter.policies, {"batch": RateLimitPolicy("batch", 2, 0.001)}
+            ),
+            patch(
+                "app.api.v1.chat.chat_service.create_message_async"
+            ) as mock_create_message,
+        ):
+            mock_create_message.return_value = {"content": "ok"}
+
+            response = await async_client.post(
+                "/api/v1/chat/messages/batch", json=batch
+            )
+
+        statuses = [result["status"] for result in response.json()["results"]]
+        assert statuses == [200, 200, 429]
+        assert mock_create_message.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_charges_llm_limit(self, async_client):
+        """Test that batch items count against the LLM allowance, per session."""
+        from app.utils.rate_limit import RateLimitPolicy, rate_limiter
+
+        sessions = ["s1", "s1", "s1", "s2"]
+        batch = {
+            "messages": [
+                {"content": "@Assistant hi", "session_id": session}
+                for session in sessions
+            ]
+        }
+
+        with (
+            patch.dict(
+                rate_limiter.policies, {"llm": RateLimitPolicy("llm", 2, 0.001)}
+            ),
+            patch(
+                "app.api.v1.chat.chat_service.create_message_async"
+            ) as mock_create_message,
+        ):
+            mock_create_message.return_value = {"content": "ok"}
+
+            response = await async_client.post(
+                "/api/v1/chat/messages/batch", json=batch
+            )
+            # The rejected and skipped items were not charged to "batch"
+            remaining = await rate_limiter.hit("batch", {"session": "s1"})
+
+        statuses = [result["status"] for result in response.json()["results"]]
+        # The third s1 item exhausts the IP's LLM bucket; s2 shares that IP
+        assert statuses == [200, 200, 429, 429]
+        assert mock_create_message.call_count == 2
+        assert remaining.remaining == rate_limiter.policies["batch"].capacity - 3
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_skips_rest_of_rejected_session(
+        self, async_client
+    ):
+        """Test that later turns of a rate-limited session do not run."""
+        from app.utils.rate_limit import RateLimitResult, rate_limiter
+
+        batch = {
+            "messages": [
+                {"content": "@Assistant one", "session_id": "s1"},
+                {"content": "@Assistant two", "session_id": "s1"},
+                {"content": "@Assistant three", "session_id": "s2"},
+            ]
+        }
+        denied = RateLimitResult(False, 10, 0, 5.0, 5.0)
+        allowed = RateLimitResult(True, 10, 5, 0.0, 0.0)
+
+        with (
+            patch.object(
+                rate_limiter, "hit_all", AsyncMock(side_effect=[denied, allowed])
+            ) as hit_all,
+            patch(
+                "app.api.v1.chat.chat_service.create_message_async"
+            ) as mock_create_message,
+        ):
+            mock_create_message.return_value = {"content": "ok"}
+            response = await async_client.post(
+                "/api/v1/chat/messages/batch", json=batch
+            )
+
+        statuses = [result["status"] for result in response.json()["results"]]
+        assert statuses == [429, 429, 200]
+        # The skipped s1 turn was neither charged nor run
+        assert hit_all.call_count == 2
+        assert mock_create_message.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_send_message_batch_too_large(self, async_client):
+        """Test that oversized batches are rejected up front."""
+        batch = {"messages": [{"content": "@Assistant hi", "session_id": "s"}] * 3}
+
+        with patch("app.api.v1.chat.settings.batch_max_items", 2):
+            response = await async_client.post(
+                "/api/v1/chat/messages/batch", json=batch
+            )
+
+        assert response.status_code == 400
+
     def test_get_messages_invalid_session_id(self, client):
         """Test getting messages with invalid session ID format."""
         # Test with very long session ID
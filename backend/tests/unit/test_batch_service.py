@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.schemas.chat import MessageCreate
+from app.services import batch_service
+from app.utils.admission import AdmissionRejectedError
+
+
+def indexed(*messages):
+    return [
+        (index, MessageCreate(content=content, session_id=session_id))
+        for index, (session_id, content) in enumerate(messages)
+    ]
+
+
+async def collect(items, concurrency=4):
+    return [result async for result in batch_service.run_batch_async(items, concurrency)]
+
+
+class TestRunBatch:
+
+    @pytest.mark.asyncio
+    async def test_session_order_preserved(self):
+        """Test that messages of one session run sequentially in order."""
+        calls = []
+
+        async def create(db, message):
+            calls.append(message.content)
+            # The first turn is slower, so parallel execution would reorder
+            await asyncio.sleep(0.02 if message.content == "@Echo one" else 0)
+            return {"content": message.content}
+
+        with patch.object(batch_service.chat_service, "create_message_async", create):
+            results = await collect(
+                indexed(("s1", "@Echo one"), ("s1", "@Echo two"), ("s1", "@Echo three"))
+            )
+
+        assert calls == ["@Echo one", "@Echo two", "@Echo three"]
+        assert [result["index"] for result in results] == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_sessions_run_concurrently(self):
+        """Test that different sessions overlap up to the concurrency bound."""
+        running = 0
+        peak = 0
+
+        async def create(db, message):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {}
+
+        items = indexed(*[(f"s{i}", "@Echo hi") for i in range(6)])
+        with patch.object(batch_service.chat_service, "create_message_async", create):
+            results = await collect(items, concurrency=3)
+
+        assert len(results) == 6
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_item_errors_are_isolated(self):
+        """Test that each failure maps to its own status."""
+
+        async def create(db, message):
+            if message.content == "bad":
+                raise ValueError("No agent mentioned in message")
+            if message.content == "@Busy hi":
+                raise AdmissionRejectedError("llm", "queue full", 1.5)
+            if message.content == "@Broken hi":
+                raise RuntimeError("boom")
+            return {"content": "ok"}
+
+        items = indexed(
+            ("s1", "bad"), ("s1", "@Echo hi"), ("s2", "@Busy hi"), ("s3", "@Broken hi")
+        )
+        with patch.object(batch_service.chat_service, "create_message_async", create):
+            results = {r["index"]: r for r in await collect(items)}
+
+        assert results[0]["status"] == 400
+        assert "No agent mentioned" in results[0]["error"]
+        assert results[1] == {"index": 1, "status": 200, "result": {"content": "ok"}}
+        assert results[2]["status"] == 503
+        assert results[2]["retry_after"] == 1.5
+        assert results[3]["status"] == 500
@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.external.openai_client import LLMCompletion
+from app.repositories import job_repo
+from app.services.job_worker import JobWorkerPool, retry_delay
+from app.utils.admission import AdmissionRejectedError
+from app.utils.db import async_session_scope
+
+URL = "/api/v1/chat/messages"
+
+
+async def submit(async_client, session_id="job-session", content="@Echo hello"):
+    response = await async_client.post(
+        f"{URL}?mode=async", json={"content": content, "session_id": session_id}
+    )
+    assert response.status_code == 202
+    return response.json()
+
+
+class TestAsyncJobMode:
+
+    @pytest.mark.asyncio
+    async def test_submit_returns_job(self, async_client, async_test_agents):
+        """Test that async mode stores the user message and returns 202."""
+        response = await async_client.post(
+            URL,
+            json={"content": "@Echo hello", "session_id": "job-session"},
+            headers={"Prefer": "respond-async"},
+        )
+
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert response.headers["location"] == f"/api/v1/chat/jobs/{job['id']}"
+
+        history = await async_client.get(
+            "/api/v1/chat/sessions/job-session/messages"
+        )
+        assert history.headers["x-pending-jobs"] == "1"
+        assert [m["content"] for m in history.json()] == ["@Echo hello"]
+
+    @pytest.mark.asyncio
+    async def test_submit_without_mention(self, async_client, async_test_agents):
+        """Test that validation errors are reported before queueing."""
+        response = await async_client.post(
+            f"{URL}?mode=async", json={"content": "hello", "session_id": "s"}
+        )
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_worker_completes_job(
+        self, async_client, async_test_agents, mock_llm_service
+    ):
+        """Test that a worker generates the reply and completes the job."""
+        job = await submit(async_client)
+
+        assert await JobWorkerPool(1).run_once() is True
+
+        response = await async_client.get(f"/api/v1/chat/jobs/{job['id']}")
+        status = response.json()
+        assert status["status"] == "completed"
+        assert status["attempts"] == 1
+        assert status["result"]["content"] == mock_llm_service.return_value
+        # The stored user message is not repeated in its own context
+        assert mock_llm_service.call_args.kwargs["context"] == []
+        assert mock_llm_service.call_args.kwargs["user_message"] == "@Echo hello"
+
+        history = await async_client.get(
+            "/api/v1/chat/sessions/job-session/messages"
+        )
+        assert history.headers["x-pending-jobs"] == "0"
+        assert len(history.json()) == 2
+
+    @pytest.mark.asyncio
+    async def test_pending_count_cached_until_jobs_change(
+        self, async_client, async_test_agents, mock_llm_service
+    ):
+        """Test that history reads share one count until a job changes state."""
+        history_url = "/api/v1/chat/sessions/job-session/messages"
+        await submit(async_client)
+
+        with patch.object(
+            job_repo,
+            "count_pending_jobs_by_session",
+            wraps=job_repo.count_pending_jobs_by_session,
+        ) as count:
+            for _ in range(3):
+                history = await async_client.get(history_url)
+            assert history.headers["x-pending-jobs"] == "1"
+            assert count.call_count == 1
+
+            await JobWorkerPool(1).run_once()
+            history = await async_client.get(history_url)
+
+        assert history.headers["x-pending-jobs"] == "0"
+        assert count.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_attempt_is_retried_later(
+        self, async_client, async_test_agents, mock_llm_service
+    ):
+        """Test that failures re-queue the job with backoff."""
+        mock_llm_service.side_effect = AdmissionRejectedError("llm", "full", 1.0)
+        job = await submit(async_client)
+        pool = JobWorkerPool(1)
+
+        assert await pool.run_once() is True
+        # Not due again until the backoff has passed
+        assert await pool.run_once() is False
+
+        status = (await async_client.get(f"/api/v1/chat/jobs/{job['id']}")).json()
+        assert status["status"] == "queued"
+        assert status["attempts"] == 1
+        assert status["error"]
+
+    @pytest.mark.asyncio
+    async def test_provider_error_is_retried(self, async_client, async_test_agents):
+        """Test that a failed provider call is retried, not stored as the reply."""
+        replies = [
+            LLMCompletion(content="I apologize...", outcome="error"),
+            LLMCompletion(content="Real reply", model="test-model"),
+        ]
+        job = await submit(async_client)
+        pool = JobWorkerPool(1)
+
+        with (
+            patch(
+                "app.services.llm_service.generate_completion_async",
+                side_effect=replies,
+            ),
+            patch("app.services.job_worker.retry_delay", return_value=0.0),
+        ):
+            assert await pool.run_once() is True
+            assert await pool.run_once() is True
+
+        status = (await async_client.get(f"/api/v1/chat/jobs/{job['id']}")).json()
+        assert status["status"] == "completed"
+        assert status["attempts"] == 2
+        assert status["result"]["content"] == "Real reply"
+
+        history = await async_client.get(
+            "/api/v1/chat/sessions/job-session/messages"
+        )
+        assert [m["content"] for m in history.json()] == ["@Echo hello", "Real reply"]
+
+    @pytest.mark.asyncio
+    async def test_job_fails_after_max_attempts(
+        self, async_client, async_test_agents, mock_llm_service
+    ):
+        """Test that a job is marked failed once attempts run out."""
+        mock_llm_service.side_effect = AdmissionRejectedError("llm", "full", 1.0)
+        job = await submit(async_client)
+
+        with patch("app.services.job_worker.settings.job_max_attempts", 1):
+            await JobWorkerPool(1).run_once()
+
+        status = (await async_client.get(f"/api/v1/chat/jobs/{job['id']}")).json()
+        assert status["status"] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_recovered(
+        self, async_client, async_test_agents, mock_llm_service
+    ):
+        """Test that jobs abandoned by a dead worker are picked up again."""
+        job = await submit(async_client)
+        now = datetime.now(timezone.utc)
+        async with async_session_scope() as db:
+            claimed = await job_repo.claim_next_job_async(
+                db, now, now - timedelta(seconds=1)
+            )
+        assert claimed.id == job["id"]
+
+        assert await JobWorkerPool(1).run_once() is True
+
+        status = (await async_client.get(f"/api/v1/chat/jobs/{job['id']}")).json()
+        assert status["status"] == "completed"
+        assert status["attempts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_one_running_job_per_session(self, async_client, async_test_agents):
+        """Test that turns within a session are not generated concurrently."""
+        first = await submit(async_client, "ordered")
+        await submit(async_client, "ordered", "@Echo again")
+        other = await submit(async_client, "other")
+
+        now = datetime.now(timezone.utc)
+        lease = now + timedelta(minutes=5)
+        async with async_session_scope() as db:
+            claimed = []
+            for _ in range(3):
+                job = await job_repo.claim_next_job_async(db, now, lease)
+                claimed.append(job.id if job else None)
+
+        assert claimed == [first["id"], other["id"], None]
+
+    @pytest.mark.asyncio
+    async def test_backoff_holds_back_later_turns(
+        self, async_client, async_test_agents, mock_llm_service
+    ):
+        """Test that a job waiting to retry blocks newer jobs of its session."""
+        mock_llm_service.side_effect = AdmissionRejectedError("llm", "full", 1.0)
+        first = await submit(async_client, "ordered")
+        await submit(async_client, "ordered", "@Echo again")
+
+        assert await JobWorkerPool(1).run_once() is True
+        # The first job is in backoff; the second must not overtake it
+        assert await JobWorkerPool(1).run_once() is False
+
+        status = (await async_client.get(f"/api/v1/chat/jobs/{first['id']}")).json()
+        assert status["status"] == "queued"
+        assert status["attempts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self, async_client):
+        """Test that unknown job ids return 404."""
+        response = await async_client.get("/api/v1/chat/jobs/missing")
+
+        assert response.status_code == 404
+
+    def test_retry_delay_is_capped(self):
+        """Test exponential backoff between attempts."""
+        with (
+            patch("app.services.job_worker.settings.job_retry_base_delay", 2.0),
+            patch("app.services.job_worker.settings.job_retry_max_delay", 10.0),
+        ):
+            assert [retry_delay(n) for n in range(1, 5)] == [2.0, 4.0, 8.0, 10.0]
@@ -5,6 +5,7 @@ from app.services.chat_service import create_message_async, _build_context_async
 from app.schemas.chat import MessageCreate
 from app.models.chat import Agent, Message
 from app.utils.mention_parser import parse_mention
+from app.external.openai_client import LLMCompletion
 
 
 class TestChatService:
@@ -20,6 +21,7 @@ class TestChatService:
         mock_agent = MagicMock(spec=Agent)
         mock_agent.id = 1
         mock_agent.name = "Assistant"
+        mock_agent.display_name = "Assistant"
         mock_agent.description = "Helpful assistant"
         mock_agent.system_prompt = "You are a helpful assistant"
 
@@ -43,12 +45,12 @@ class TestChatService:
         ):
 
             # Configure mocks
-            mock_agent_repo.get_agent_by_name_async = AsyncMock(return_value=mock_agent)
+            mock_agent_repo.get_agents_async = AsyncMock(return_value=[mock_agent])
             mock_chat_repo.create_message_async = AsyncMock(
                 side_effect=[mock_user_message, mock_response_message]
             )
-            mock_llm_service.generate_response_async = AsyncMock(
-                return_value="Hello! How can I help you?"
+            mock_llm_service.generate_completion_async = AsyncMock(
+                return_value=LLMCompletion(content="Hello! How can I help you?")
             )
             mock_build_context = AsyncMock(return_value=[])
 
@@ -62,11 +64,10 @@ class TestChatService:
             assert result["agent_name"] == "Assistant"
             assert result["session_id"] == "test-session"
 
-            # Verify function calls
-            mock_agent_repo.get_agent_by_name_async.assert_called_once_with(
-                db_mock, "Assistant"
-            )
-            mock_llm_service.generate_response_async.assert_called_once()
+            # Verify function calls; the agent comes from the mention index
+            mock_agent_repo.get_agents_async.assert_awaited_once_with(db_mock)
+            mock_agent_repo.get_agent_by_name_async.assert_not_called()
+            mock_llm_service.generate_completion_async.assert_called_once()
             assert mock_chat_repo.create_message_async.call_count == 2
 
     @pytest.mark.asyncio
@@ -75,8 +76,11 @@ class TestChatService:
         db_mock = AsyncMock(spec=AsyncSession)
         message = MessageCreate(content="Hello world", session_id="test-session")
 
-        with pytest.raises(ValueError, match="No agent mentioned in message"):
-            await create_message_async(db_mock, message)
+        with patch("app.services.chat_service.agent_repo") as mock_agent_repo:
+            mock_agent_repo.get_agents_async = AsyncMock(return_value=[])
+
+            with pytest.raises(ValueError, match="No agent mentioned in message"):
+                await create_message_async(db_mock, message)
 
     @pytest.mark.asyncio
     async def test_create_message_async_agent_not_found(self):
@@ -85,11 +89,14 @@ class TestChatService:
         message = MessageCreate(content="@NonExistent help", session_id="test-session")
 
         with patch("app.services.chat_service.agent_repo") as mock_agent_repo:
-            mock_agent_repo.get_agent_by_name_async = AsyncMock(return_value=None)
+            mock_agent_repo.get_agents_async = AsyncMock(return_value=[])
 
             with pytest.raises(ValueError, match="Agent 'NonExistent' not found"):
                 await create_message_async(db_mock, message)
 
+            # Unknown names are rejected from the index alone
+            mock_agent_repo.get_agent_by_name_async.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_build_context_async(self):
         """Test building conversation context from message history."""
@@ -106,7 +113,9 @@ class TestChatService:
         mock_agent_message.agent_id = 1
 
         mock_agent = MagicMock(spec=Agent)
+        mock_agent.id = 1
         mock_agent.name = "Assistant"
+        mock_agent.display_name = None
 
         with (
             patch("app.services.chat_service.chat_repo") as mock_chat_repo,
@@ -116,7 +125,9 @@ class TestChatService:
             mock_chat_repo.get_messages_by_session_async = AsyncMock(
                 return_value=[mock_user_message, mock_agent_message]
             )
-            mock_agent_repo.get_agent_by_id_async = AsyncMock(return_value=mock_agent)
+            mock_agent_repo.get_agents_by_ids_async = AsyncMock(
+                return_value=[mock_agent]
+            )
 
             # Execute
             context = await _build_context_async(db_mock, session_id)
@@ -150,6 +161,7 @@ class TestChatService:
         mock_agent = MagicMock(spec=Agent)
         mock_agent.id = 1
         mock_agent.name = "Assistant"
+        mock_agent.display_name = None
 
         with (
             patch("app.services.chat_service.agent_repo") as mock_agent_repo,
@@ -159,9 +171,9 @@ class TestChatService:
             ) as mock_build_context,
         ):
 
-            mock_agent_repo.get_agent_by_name_async = AsyncMock(return_value=mock_agent)
+            mock_agent_repo.get_agents_async = AsyncMock(return_value=[mock_agent])
             mock_build_context = AsyncMock(return_value=[])
-            mock_llm_service.generate_response_async = AsyncMock(
+            mock_llm_service.generate_completion_async = AsyncMock(
                 side_effect=Exception("API Error")
             )
 
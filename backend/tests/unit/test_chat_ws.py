@@ -0,0 +1,218 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.admission import AdmissionRejectedError
+
+WS_URL = "/api/v1/chat/ws"
+
+
+async def fake_stream(agent, context, user_message, completion=None):
+    for delta in ["Hello", " from", " Echo"]:
+        yield delta
+
+
+def receive_until(websocket, event_type):
+    """Collect frames until one of the given type arrives."""
+    frames = []
+    while True:
+        frame = websocket.receive_json()
+        frames.append(frame)
+        if frame["type"] == event_type:
+            return frames
+
+
+@pytest.fixture
+def streaming_llm():
+    with patch(
+        "app.services.chat_service.llm_service.stream_response_async", fake_stream
+    ):
+        yield
+
+
+class TestChatWebSocket:
+
+    def test_ping_pong(self, client):
+        """Test application-level heartbeat frames."""
+        with client.websocket_connect(WS_URL) as websocket:
+            websocket.send_json({"type": "ping"})
+
+            assert websocket.receive_json() == {"type": "pong"}
+
+    def test_pong_accepted(self, client):
+        """Test that answers to the server heartbeat are not errors."""
+        with client.websocket_connect(WS_URL) as websocket:
+            websocket.send_json({"type": "pong"})
+            websocket.send_json({"type": "ping"})
+
+            assert websocket.receive_json() == {"type": "pong"}
+
+    def test_send_rate_limited_per_forwarded_ip(self, client, test_agents):
+        """Test that sends are limited per client behind a trusted proxy."""
+        from app.utils import rate_limit
+        from app.utils.rate_limit import RateLimitPolicy, rate_limiter
+
+        statuses = []
+        with (
+            patch.dict(
+                rate_limiter.policies, {"llm": RateLimitPolicy("llm", 1, 0.001)}
+            ),
+            patch.object(rate_limit.settings, "rate_limit_trust_forwarded_for", True),
+        ):
+            for number, ip in enumerate(["10.0.0.1", "10.0.0.2", "10.0.0.1"]):
+                headers = {"X-Forwarded-For": ip}
+                with client.websocket_connect(WS_URL, headers=headers) as websocket:
+                    websocket.send_json(
+                        {"type": "send", "session_id": f"fwd-{number}", "content": "hi"}
+                    )
+                    statuses.append(receive_until(websocket, "error")[-1]["status"])
+
+        # "hi" has no mention, so allowed sends fail validation with 400
+        assert statuses == [400, 400, 429]
+
+    def test_invalid_frame(self, client):
+        """Test that non-JSON frames produce an error event."""
+        with client.websocket_connect(WS_URL) as websocket:
+            websocket.send_text("not json")
+
+            frame = websocket.receive_json()
+
+            assert frame["type"] == "error"
+            assert frame["status"] == 400
+
+    def test_subscribe(self, client):
+        """Test subscribing to a session."""
+        with client.websocket_connect(WS_URL) as websocket:
+            websocket.send_json({"type": "subscribe", "session_id": "ws-session"})
+
+            frame = websocket.receive_json()
+
+            assert frame == {
+                "type": "subscribed",
+                "session_id": "ws-session",
+                "last_id": None,
+            }
+
+    def test_send_streams_tokens(self, client, test_agents, streaming_llm):
+        """Test that a send frame streams tokens and completes."""
+        with client.websocket_connect(WS_URL) as websocket:
+            websocket.send_json({"type": "subscribe", "session_id": "ws-session"})
+            websocket.receive_json()
+
+            websocket.send_json(
+                {
+                    "type": "send",
+                    "session_id": "ws-session",
+                    "content": "@Echo hi",
+                    "request_id": "r1",
+                }
+            )
+            frames = receive_until(websocket, "done")
+
+        types = [frame["type"] for frame in frames]
+        assert types[0] == "progress"
+        tokens = [frame["delta"] for frame in frames if frame["type"] == "token"]
+        assert "".join(tokens) == "Hello from Echo"
+        messages = [frame for frame in frames if frame["type"] == "message"]
+        assert [m["message"]["is_user"] for m in messages] == [True, False]
+        done = frames[-1]
+        assert done["request_id"] == "r1"
+        assert done["message"]["content"] == "Hello from Echo"
+        assert done["message"]["agent_name"] == "Echo"
+
+    def test_other_tab_receives_push(self, client, test_agents, streaming_llm):
+        """Test that messages are pushed to other subscribers of the session."""
+        with (
+            client.websocket_connect(WS_URL) as sender,
+            client.websocket_connect(WS_URL) as watcher,
+        ):
+            for websocket in (sender, watcher):
+                websocket.send_json({"type": "subscribe", "session_id": "shared"})
+                websocket.receive_json()
+
+            sender.send_json(
+                {"type": "send", "session_id": "shared", "content": "@Echo hi"}
+            )
+            receive_until(sender, "done")
+
+            frames = []
+            while len([f for f in frames if f["type"] == "message"]) < 2:
+                frames.append(watcher.receive_json())
+
+        assert all(frame["type"] != "token" for frame in frames)
+        typing = [frame for frame in frames if frame["type"] == "typing"]
+        assert typing[0]["actor"] == "agent"
+
+    def test_resume_from_cursor(self, client, test_agents, streaming_llm):
+        """Test that subscribing with after_id replays missed messages."""
+        with client.websocket_connect(WS_URL) as websocket:
+            websocket.send_json(
+                {"type": "send", "session_id": "resume", "content": "@Echo hi"}
+            )
+            done = receive_until(websocket, "done")[-1]
+
+        with client.websocket_connect(WS_URL) as websocket:
+            websocket.send_json(
+                {"type": "subscribe", "session_id": "resume", "after_id": 0}
+            )
+            frames = receive_until(websocket, "subscribed")
+
+        replayed = [frame["message"] for frame in frames if frame["type"] == "message"]
+        assert len(replayed) == 2
+        assert frames[-1]["last_id"] == done["message"]["id"]
+
+    def test_send_without_mention(self, client, test_agents, streaming_llm):
+        """Test that service validation errors are reported per request."""
+        with client.websocket_connect(WS_URL) as websocket:
+            websocket.send_json(
+                {
+                    "type": "send",
+                    "session_id": "s",
+                    "content": "no mention",
+                    "request_id": "r2",
+                }
+            )
+
+            frame = websocket.receive_json()
+
+        assert frame["type"] == "error"
+        assert frame["status"] == 400
+        assert frame["request_id"] == "r2"
+
+    def test_send_when_overloaded(self, client, test_agents):
+        """Test that admission rejection becomes a 503 error event."""
+
+        async def rejected_stream(agent, context, user_message, completion=None):
+            raise AdmissionRejectedError("llm", "queue full", 2.0)
+            yield  # pragma: no cover
+
+        with (
+            patch(
+                "app.services.chat_service.llm_service.stream_response_async",
+                rejected_stream,
+            ),
+            client.websocket_connect(WS_URL) as websocket,
+        ):
+            websocket.send_json(
+                {"type": "send", "session_id": "s", "content": "@Echo hi"}
+            )
+
+            frames = receive_until(websocket, "error")
+
+        assert frames[-1]["status"] == 503
+        assert frames[-1]["retry_after"] == 2.0
+
+    def test_idle_connection_closed(self, client):
+        """Test that silent clients are disconnected after the idle timeout."""
+        from starlette.websockets import WebSocketDisconnect
+
+        with (
+            patch("app.api.v1.chat_ws.settings.ws_heartbeat_interval", 0.01),
+            patch("app.api.v1.chat_ws.settings.ws_idle_timeout", 0.02),
+            client.websocket_connect(WS_URL) as websocket,
+        ):
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                while True:
+                    assert websocket.receive_json() == {"type": "ping"}
+
+        assert exc_info.value.code == 1000
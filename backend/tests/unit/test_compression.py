@@ -0,0 +1,203 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.utils.compression import (
+    CompressionMiddleware,
+    available_encodings,
+    negotiate_encoding,
+)
+
+LARGE_TEXT = "hello multimind " * 500
+
+
+def create_app(**kwargs):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, **kwargs)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE_TEXT)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/image")
+    def image():
+        return PlainTextResponse(LARGE_TEXT, media_type="image/png")
+
+    @app.get("/health/large")
+    def health_large():
+        return PlainTextResponse(LARGE_TEXT)
+
+    return app
+
+
+async def run_asgi(app, path, accept_encoding):
+    """Drive an ASGI app directly and collect the messages it sends."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    sent = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Block like a connected client until the response task is cancelled
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent
+
+
+class TestNegotiateEncoding:
+
+    def test_no_header(self):
+        """Test that no encoding is chosen without Accept-Encoding."""
+        assert negotiate_encoding("", ["gzip"]) is None
+
+    def test_gzip_only(self):
+        """Test plain gzip negotiation."""
+        assert negotiate_encoding("gzip, deflate", ["br", "gzip"]) == "gzip"
+
+    def test_server_preference_breaks_ties(self):
+        """Test that equally weighted encodings use server preference."""
+        assert negotiate_encoding("gzip, br", ["br", "zstd", "gzip"]) == "br"
+
+    def test_q_values(self):
+        """Test that q-values outrank server preference."""
+        assert negotiate_encoding("br;q=0.5, gzip;q=1.0", ["br", "gzip"]) == "gzip"
+
+    def test_q_zero_rejects(self):
+        """Test that q=0 excludes an encoding."""
+        assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+
+    def test_wildcard(self):
+        """Test wildcard acceptance."""
+        assert negotiate_encoding("*", ["gzip"]) == "gzip"
+
+    def test_unsupported_only(self):
+        """Test that unsupported encodings are ignored."""
+        assert negotiate_encoding("br", ["gzip"]) is None
+
+
+class TestCompressionMiddleware:
+
+    def test_large_response_is_gzipped(self):
+        """Test that responses above the threshold are compressed."""
+        client = TestClient(create_app(minimum_size=100))
+
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.text == LARGE_TEXT
+
+    def test_small_response_not_compressed(self):
+        """Test that responses below the threshold are sent as-is."""
+        client = TestClient(create_app(minimum_size=100))
+
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text == "tiny"
+
+    def test_incompressible_media_type_skipped(self):
+        """Test that binary media types are not compressed."""
+        client = TestClient(create_app(minimum_size=100))
+
+        response = client.get("/image", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_excluded_path_not_compressed(self):
+        """Test per-route opt-out via excluded path prefixes."""
+        client = TestClient(create_app(minimum_size=100, exclude_paths=["/health"]))
+
+        response = client.get("/health/large", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text == LARGE_TEXT
+
+    def test_identity_when_not_accepted(self):
+        """Test that clients without Accept-Encoding get identity responses."""
+        client = TestClient(create_app(minimum_size=100))
+
+        response = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.skipif("br" not in available_encodings(), reason="brotli missing")
+    def test_brotli_preferred(self):
+        """Test brotli is negotiated when available."""
+        app = create_app(minimum_size=100)
+        client = TestClient(app)
+
+        response = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+
+        assert response.headers["content-encoding"] == "br"
+        assert response.text == LARGE_TEXT
+
+    @pytest.mark.asyncio
+    async def test_streaming_chunks_are_flushed(self):
+        """Test that each NDJSON chunk is independently decodable."""
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=10_000)
+        chunks = [f'{{"token": "{i}"}}\n'.encode() for i in range(5)]
+
+        async def generate():
+            for chunk in chunks:
+                yield chunk
+
+        @app.get("/stream")
+        def stream():
+            return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+        sent = await run_asgi(app, "/stream", "gzip")
+        start = sent[0]
+        headers = dict(start["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        bodies = [m for m in sent[1:] if m.get("more_body")]
+        for chunk, message in zip(chunks, bodies):
+            # A sync-flushed chunk decodes fully without waiting for more input
+            assert decompressor.decompress(message["body"]) == chunk
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_chunks_round_trip(self):
+        """Test that chunked non-streaming bodies still decode correctly."""
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+        async def generate():
+            for _ in range(3):
+                yield LARGE_TEXT.encode()
+
+        @app.get("/chunked")
+        def chunked():
+            return StreamingResponse(generate(), media_type="text/plain")
+
+        sent = await run_asgi(app, "/chunked", "gzip")
+        body = b"".join(m.get("body", b"") for m in sent[1:])
+
+        assert gzip.decompress(body) == LARGE_TEXT.encode() * 3
@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from app.utils import db
+from app.utils.db import (
+    async_session_scope,
+    normalize_sql,
+    parameters_shape,
+    track_queries,
+)
+
+URL = "/api/v1/chat/messages"
+
+
+class TestNormalizeSql:
+
+    def test_literals_and_placeholders(self):
+        """Test that values and bind markers of every style become ``?``."""
+        sql = (
+            "SELECT *\n  FROM messages WHERE session_id = 'abc''d' AND id > 42 "
+            "AND agent_id = %(agent_id)s AND x = $1 AND y = :y AND z::text = ?"
+        )
+
+        assert normalize_sql(sql) == (
+            "SELECT * FROM messages WHERE session_id = ? AND id > ? "
+            "AND agent_id = ? AND x = ? AND y = ? AND z::text = ?"
+        )
+
+    def test_in_lists_collapsed(self):
+        """Test that IN lists of any length normalize the same way."""
+        assert normalize_sql("id IN (1, 2, 3)") == normalize_sql("id IN (%s, %s)")
+        assert normalize_sql("id IN (1, 2, 3)") == "id IN (?, ...)"
+
+    def test_parameters_shape_hides_values(self):
+        """Test that parameter shapes name types but never values."""
+        assert parameters_shape({"name": "secret", "n": 3}) == "{name: str, n: int}"
+        assert parameters_shape(("secret", 1.5)) == "(str, float)"
+        assert parameters_shape([("a",), ("b",)], executemany=True) == "2 x (str)"
+
+
+class TestQueryTracking:
+
+    @pytest.mark.asyncio
+    async def test_track_queries_counts_statements(self):
+        """Test that statements in the block are counted and timed."""
+        with track_queries() as stats:
+            async with async_session_scope() as session:
+                await session.execute(text("SELECT 1"))
+                await session.execute(text("SELECT 2"))
+
+        assert stats.count == 2
+        assert stats.total_ms > 0
+
+    @pytest.mark.asyncio
+    async def test_slow_query_logged(self):
+        """Test that slow statements are logged normalized, without values."""
+        with (
+            patch.object(settings, "db_slow_query_ms", 0.0),
+            patch.object(db.logger, "warning") as warning,
+        ):
+            async with async_session_scope() as session:
+                await session.execute(
+                    text("SELECT :secret AS value"), {"secret": "hunter2"}
+                )
+
+        message, _, statement, shape = warning.call_args.args
+        assert message.startswith("Slow query")
+        assert statement == "SELECT ? AS value"
+        assert "hunter2" not in shape
+
+    @pytest.mark.asyncio
+    async def test_response_headers(self, async_client, async_test_agents):
+        """Test that each response reports its query count and DB time."""
+        response = await async_client.get("/api/v1/chat/sessions/s1/messages")
+
+        assert int(response.headers["x-db-query-count"]) >= 1
+        assert float(response.headers["x-db-time-ms"]) >= 0
+
+    @pytest.mark.asyncio
+    async def test_send_queries_independent_of_history(
+        self, async_client, async_test_agents, mock_llm_service
+    ):
+        """Test that a longer history does not add queries to a send."""
+
+        async def send():
+            response = await async_client.post(
+                URL, json={"content": "@Echo hi", "session_id": "n-plus-one"}
+            )
+            assert response.status_code == 200
+            return int(response.headers["x-db-query-count"])
+
+        await send()
+        short_history = await send()
+        for _ in range(4):
+            await send()
+        long_history = await send()
+
+        assert long_history == short_history
@@ -0,0 +1,162 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.services.health_monitor import HealthMonitor, Probe, health_monitor
+from app.services.job_worker import JobWorkerPool
+from app.utils.admission import llm_admission
+
+READY = "/api/v1/health/ready"
+
+
+def counting_probe(name, calls, error=None, critical=True, delay=0.0):
+    async def check():
+        calls.append(name)
+        if delay:
+            await asyncio.sleep(delay)
+        if error:
+            raise error
+
+    return Probe(name, check, interval=60.0, critical=critical)
+
+
+def test_liveness(client):
+    """Test that liveness answers without consulting dependencies."""
+    response = client.get("/api/v1/health/live")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_readiness_default_probes(client):
+    """Test that the real probes pass against the test database."""
+    response = client.get(READY)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["checks"]["database"]["status"] == "ok"
+    # No provider key or Redis backend in the test environment
+    assert data["checks"]["llm"]["status"] == "skipped"
+    assert data["checks"]["cache"]["status"] == "skipped"
+    assert "llm_admission" in data["saturation"]
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached(async_client):
+    """Test that polling readiness does not re-run probes every time."""
+    calls = []
+    monitor = HealthMonitor([counting_probe("database", calls)])
+
+    with patch("app.api.v1.health.health_monitor", monitor):
+        for _ in range(5):
+            response = await async_client.get(READY)
+            assert response.status_code == 200
+
+    assert calls == ["database"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_probe(async_client):
+    """Test that simultaneous readiness calls wait on one round of probes."""
+    calls = []
+    monitor = HealthMonitor([counting_probe("database", calls, delay=0.05)])
+
+    with patch("app.api.v1.health.health_monitor", monitor):
+        responses = await asyncio.gather(*(async_client.get(READY) for _ in range(4)))
+
+    assert [r.status_code for r in responses] == [200] * 4
+    assert calls == ["database"]
+
+
+@pytest.mark.asyncio
+async def test_critical_failure_not_ready(async_client):
+    """Test that a failed critical probe answers 503 with the error."""
+    monitor = HealthMonitor(
+        [counting_probe("database", [], error=ConnectionError("refused"))]
+    )
+
+    with patch("app.api.v1.health.health_monitor", monitor):
+        response = await async_client.get(READY)
+
+    assert response.status_code == 503
+    data = response.json()
+    assert data["status"] == "unavailable"
+    assert data["checks"]["database"]["error"] == "ConnectionError: refused"
+
+
+@pytest.mark.asyncio
+async def test_optional_failure_degraded(async_client):
+    """Test that a failed non-critical probe keeps the instance ready."""
+    monitor = HealthMonitor(
+        [
+            counting_probe("database", []),
+            counting_probe("llm", [], error=RuntimeError("down"), critical=False),
+        ]
+    )
+
+    with patch("app.api.v1.health.health_monitor", monitor):
+        response = await async_client.get(READY)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded"
+
+
+@pytest.mark.asyncio
+async def test_hung_probe_times_out():
+    """Test that a dependency that never answers fails its probe in time."""
+    monitor = HealthMonitor([counting_probe("cache", [], delay=5.0)], timeout=0.05)
+
+    ready, report = await monitor.readiness()
+
+    assert ready is False
+    assert report["checks"]["cache"]["status"] == "fail"
+    assert "timed out" in report["checks"]["cache"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_saturated_not_ready(async_client):
+    """Test that a full LLM admission queue steers traffic away."""
+    monitor = HealthMonitor([counting_probe("database", [])])
+    full = dict(
+        llm_admission.stats(),
+        in_flight=llm_admission.max_in_flight,
+        queue_depth=llm_admission.max_queue,
+    )
+
+    with (
+        patch("app.api.v1.health.health_monitor", monitor),
+        patch.object(llm_admission, "stats", return_value=full),
+    ):
+        response = await async_client.get(READY)
+
+    assert response.status_code == 503
+    data = response.json()
+    assert data["status"] == "saturated"
+    assert data["saturation"]["llm_admission"]["ratio"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_busy_job_workers_still_ready(async_client):
+    """Test that job workers are reported but do not gate readiness."""
+    monitor = HealthMonitor([counting_probe("database", [])])
+    workers = JobWorkerPool(2)
+    workers.busy = 2
+
+    with (
+        patch("app.api.v1.health.health_monitor", monitor),
+        patch("app.services.job_worker.job_workers", workers),
+        patch.object(JobWorkerPool, "running", True),
+    ):
+        response = await async_client.get(READY)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["saturation"]["job_workers"]["ratio"] == 1.0
+
+
+def test_monitor_runs_in_background(client):
+    """Test that app startup starts the background probes."""
+    assert health_monitor.running
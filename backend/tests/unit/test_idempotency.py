@@ -0,0 +1,162 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+URL = "/api/v1/chat/messages"
+MESSAGE = {"content": "@Assistant help", "session_id": "idem-session"}
+
+
+def keyed(key):
+    return {"Idempotency-Key": key}
+
+
+class TestIdempotencyKeys:
+
+    @pytest.mark.asyncio
+    async def test_completed_request_is_replayed(self, async_client):
+        """Test that a retry replays the stored response without re-running."""
+        with patch("app.api.v1.chat.chat_service.create_message_async") as create:
+            create.return_value = {"id": 7, "content": "Hi there"}
+
+            first = await async_client.post(URL, json=MESSAGE, headers=keyed("k1"))
+            second = await async_client.post(URL, json=MESSAGE, headers=keyed("k1"))
+
+        assert create.call_count == 1
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_wait_for_first(self, async_client):
+        """Test that in-flight duplicates wait and share one execution."""
+        calls = 0
+
+        async def create(db, message):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"id": 1, "content": "slow reply"}
+
+        with patch("app.api.v1.chat.chat_service.create_message_async", create):
+            responses = await asyncio.gather(
+                *[
+                    async_client.post(URL, json=MESSAGE, headers=keyed("k2"))
+                    for _ in range(3)
+                ]
+            )
+
+        assert calls == 1
+        assert all(response.status_code == 200 for response in responses)
+        assert {response.json()["content"] for response in responses} == {
+            "slow reply"
+        }
+
+    @pytest.mark.asyncio
+    async def test_key_reused_with_different_body(self, async_client):
+        """Test that a key cannot be reused for a different request."""
+        with patch("app.api.v1.chat.chat_service.create_message_async") as create:
+            create.return_value = {"id": 1}
+
+            await async_client.post(URL, json=MESSAGE, headers=keyed("k3"))
+            response = await async_client.post(
+                URL,
+                json={**MESSAGE, "content": "@Assistant something else"},
+                headers=keyed("k3"),
+            )
+
+        assert response.status_code == 422
+        assert create.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_server_error_releases_key(self, async_client):
+        """Test that 5xx responses are not stored so retries run again."""
+        with patch("app.api.v1.chat.chat_service.create_message_async") as create:
+            create.side_effect = [Exception("boom"), {"id": 1, "content": "ok"}]
+
+            failed = await async_client.post(URL, json=MESSAGE, headers=keyed("k4"))
+            retried = await async_client.post(URL, json=MESSAGE, headers=keyed("k4"))
+
+        assert failed.status_code == 500
+        assert retried.status_code == 200
+        assert create.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_client_error_is_replayed(self, async_client):
+        """Test that 4xx responses are stored like successes."""
+        with patch("app.api.v1.chat.chat_service.create_message_async") as create:
+            create.side_effect = ValueError("No agent mentioned in message")
+
+            first = await async_client.post(URL, json=MESSAGE, headers=keyed("k5"))
+            second = await async_client.post(URL, json=MESSAGE, headers=keyed("k5"))
+
+        assert first.status_code == second.status_code == 400
+        assert second.json() == {"detail": "No agent mentioned in message"}
+        assert create.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_key_runs_again(self, async_client):
+        """Test that responses are only replayed until the key expires."""
+        with (
+            patch("app.utils.idempotency.settings.idempotency_ttl", -1),
+            patch("app.api.v1.chat.chat_service.create_message_async") as create,
+        ):
+            create.return_value = {"id": 1}
+
+            await async_client.post(URL, json=MESSAGE, headers=keyed("k6"))
+            second = await async_client.post(URL, json=MESSAGE, headers=keyed("k6"))
+
+        assert create.call_count == 2
+        assert "idempotent-replayed" not in second.headers
+
+    @pytest.mark.asyncio
+    async def test_key_too_long(self, async_client):
+        """Test that oversized keys are rejected."""
+        response = await async_client.post(URL, json=MESSAGE, headers=keyed("x" * 300))
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_replay_not_rate_limited(self, async_client):
+        """Test that replays do not use up the LLM rate-limit allowance."""
+        from app.utils.rate_limit import RateLimitPolicy, rate_limiter
+
+        with (
+            patch.dict(
+                rate_limiter.policies, {"llm": RateLimitPolicy("llm", 1, 0.001)}
+            ),
+            patch("app.api.v1.chat.chat_service.create_message_async") as create,
+        ):
+            create.return_value = {"id": 7, "content": "Hi there"}
+
+            first = await async_client.post(URL, json=MESSAGE, headers=keyed("k9"))
+            replay = await async_client.post(URL, json=MESSAGE, headers=keyed("k9"))
+            fresh = await async_client.post(URL, json=MESSAGE, headers=keyed("k10"))
+
+        assert first.status_code == replay.status_code == 200
+        assert replay.headers["idempotent-replayed"] == "true"
+        assert fresh.status_code == 429
+        assert create.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_replay_keeps_job_location(self, async_client):
+        """Test that a replayed async submission still points at its job."""
+        with (
+            patch("app.api.v1.chat.chat_service.enqueue_message_async") as enqueue,
+            patch("app.api.v1.chat.job_workers.notify"),
+        ):
+            enqueue.return_value = {"id": "job-1", "status": "queued"}
+
+            first = await async_client.post(
+                f"{URL}?mode=async", json=MESSAGE, headers=keyed("k11")
+            )
+            replay = await async_client.post(
+                f"{URL}?mode=async", json=MESSAGE, headers=keyed("k11")
+            )
+
+        assert enqueue.call_count == 1
+        assert first.status_code == replay.status_code == 202
+        assert replay.headers["idempotent-replayed"] == "true"
+        assert replay.headers["location"] == "/api/v1/chat/jobs/job-1"
+        assert replay.headers["preference-applied"] == "respond-async"
@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+from app.external.openai_client import LLMCompletion
 from app.services.llm_service import generate_response_async, get_response
 from app.models.chat import Agent
 
@@ -19,9 +20,11 @@ class TestLLMService:
         user_message = "How are you?"
 
         with patch(
-            "app.services.llm_service.get_openai_response_with_messages_async"
+            "app.services.llm_service.get_openai_completion_with_messages_async"
         ) as mock_openai:
-            mock_openai.return_value = "I'm doing well, thank you for asking!"
+            mock_openai.return_value = LLMCompletion(
+                content="I'm doing well, thank you for asking!"
+            )
 
             # Execute
             result = await generate_response_async(mock_agent, context, user_message)
@@ -51,9 +54,11 @@ class TestLLMService:
         user_message = "Write a function"
 
         with patch(
-            "app.services.llm_service.get_openai_response_with_messages_async"
+            "app.services.llm_service.get_openai_completion_with_messages_async"
         ) as mock_openai:
-            mock_openai.return_value = "Here's a function for you"
+            mock_openai.return_value = LLMCompletion(
+                content="Here's a function for you"
+            )
 
             # Execute
             result = await generate_response_async(mock_agent, context, user_message)
@@ -79,9 +84,9 @@ class TestLLMService:
         user_message = "Current message"
 
         with patch(
-            "app.services.llm_service.get_openai_response_with_messages_async"
+            "app.services.llm_service.get_openai_completion_with_messages_async"
         ) as mock_openai:
-            mock_openai.return_value = "Response"
+            mock_openai.return_value = LLMCompletion(content="Response")
 
             # Execute
             await generate_response_async(mock_agent, context, user_message)
@@ -103,7 +108,7 @@ class TestLLMService:
         user_message = "Hello"
 
         with patch(
-            "app.services.llm_service.get_openai_response_with_messages_async"
+            "app.services.llm_service.get_openai_completion_with_messages_async"
         ) as mock_openai:
             mock_openai.side_effect = Exception("API Error")
 
@@ -135,9 +140,9 @@ class TestLLMService:
         user_message = "Continue"
 
         with patch(
-            "app.services.llm_service.get_openai_response_with_messages_async"
+            "app.services.llm_service.get_openai_completion_with_messages_async"
         ) as mock_openai:
-            mock_openai.return_value = "Continuing..."
+            mock_openai.return_value = LLMCompletion(content="Continuing...")
 
             # Execute
             await generate_response_async(mock_agent, context, user_message)
@@ -185,9 +190,9 @@ class TestLLMService:
         user_message = "Write a story"
 
         with patch(
-            "app.services.llm_service.get_openai_response_with_messages_async"
+            "app.services.llm_service.get_openai_completion_with_messages_async"
         ) as mock_openai:
-            mock_openai.return_value = "Once upon a time..."
+            mock_openai.return_value = LLMCompletion(content="Once upon a time...")
 
             # Execute
             result = await generate_response_async(mock_agent, context, user_message)
@@ -200,3 +205,21 @@ class TestLLMService:
             assert len(call_args) == 2
             assert call_args[0]["role"] == "system"
             assert call_args[1]["role"] == "user"
+
+    @pytest.mark.asyncio
+    async def test_generate_response_async_propagates_overload(self):
+        """Test that admission rejection is not swallowed by the fallback."""
+        from app.utils.admission import AdmissionRejectedError
+
+        mock_agent = MagicMock(spec=Agent)
+        mock_agent.name = "Writer"
+        mock_agent.description = "Creative writer"
+        mock_agent.system_prompt = None
+
+        with patch(
+            "app.services.llm_service.get_openai_completion_with_messages_async"
+        ) as mock_openai:
+            mock_openai.side_effect = AdmissionRejectedError("llm", "queue full", 1)
+
+            with pytest.raises(AdmissionRejectedError):
+                await generate_response_async(mock_agent, [], "Write a story")
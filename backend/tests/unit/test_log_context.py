@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.utils.log_context import (
+    RequestContextMiddleware,
+    bind_session,
+    loggable_content,
+    request_id_var,
+    session_id_var,
+)
+
+
+class TestLoggableContent:
+
+    def test_truncate(self):
+        """Test that long content is truncated with the remaining length."""
+        with patch("app.utils.log_context.settings.log_content_max_chars", 5):
+            assert str(loggable_content("hello world")) == "hello... (+6 chars)"
+            assert str(loggable_content("short")) == "short"
+
+    def test_redact_and_full(self):
+        """Test the redact and full modes."""
+        with patch("app.utils.log_context.settings.log_message_content", "redact"):
+            assert str(loggable_content("secret")) == "<redacted 6 chars>"
+        with patch("app.utils.log_context.settings.log_message_content", "full"):
+            assert str(loggable_content("x" * 500)) == "x" * 500
+
+    def test_rendered_lazily(self):
+        """Test that content is only rendered when the record is formatted."""
+        content = loggable_content("hello")
+        with patch("app.utils.log_context.settings.log_message_content", "redact"):
+            rendered = "%s" % content
+
+        assert rendered == "<redacted 5 chars>"
+
+
+class TestRequestContextMiddleware:
+
+    @pytest.fixture
+    def app(self):
+        async def endpoint(request):
+            bind_session("s-1")
+            return JSONResponse(
+                {"request_id": request_id_var.get(), "session_id": session_id_var.get()}
+            )
+
+        app = Starlette(routes=[Route("/", endpoint)])
+        app.add_middleware(RequestContextMiddleware)
+        return app
+
+    @pytest.mark.asyncio
+    async def test_generates_request_id(self, app):
+        """Test that requests get a fresh id echoed in X-Request-ID."""
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            first = await client.get("/")
+            second = await client.get("/")
+
+        assert first.json()["request_id"] == first.headers["x-request-id"]
+        assert first.json()["session_id"] == "s-1"
+        assert first.headers["x-request-id"] != second.headers["x-request-id"]
+
+    @pytest.mark.asyncio
+    async def test_propagates_caller_request_id(self, app):
+        """Test that an incoming X-Request-ID is reused."""
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/", headers={"X-Request-ID": "abc-123"})
+
+        assert response.json()["request_id"] == "abc-123"
+        assert response.headers["x-request-id"] == "abc-123"
+        assert request_id_var.get() is None
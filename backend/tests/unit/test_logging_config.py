@@ -0,0 +1,182 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from app import logging_config
+from app.logging_config import (
+    AccessLogFilter,
+    BoundedQueueHandler,
+    ContextFilter,
+    JsonFormatter,
+    SamplingFilter,
+    setup_logging,
+    shutdown_logging,
+)
+from app.utils.log_context import bind_session, request_id_var
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+
+@pytest.fixture
+def restore_root_logger():
+    yield logging.getLogger()
+    # Put back the application's own logging setup
+    logging_config.init_logging()
+
+
+class TestBoundedQueueHandler:
+
+    def test_drop_new(self):
+        """Test that a full queue discards incoming records."""
+        handler = BoundedQueueHandler(queue.Queue(2), "drop_new")
+
+        for message in ("a", "b", "c"):
+            handler.handle(make_record(message))
+
+        assert handler.dropped == 1
+        assert [handler.queue.get_nowait().msg for _ in range(2)] == ["a", "b"]
+
+    def test_drop_oldest(self):
+        """Test that a full queue makes room for the newest record."""
+        handler = BoundedQueueHandler(queue.Queue(2), "drop_oldest")
+
+        for message in ("a", "b", "c"):
+            handler.handle(make_record(message))
+
+        assert handler.dropped == 1
+        assert [handler.queue.get_nowait().msg for _ in range(2)] == ["b", "c"]
+
+    def test_formatting_deferred(self):
+        """Test that message arguments are not rendered on the caller's thread."""
+        handler = BoundedQueueHandler(queue.Queue(1))
+        record = logging.LogRecord(
+            "test", logging.INFO, __file__, 1, "hello %s", ("world",), None
+        )
+
+        handler.handle(record)
+
+        queued = handler.queue.get_nowait()
+        assert queued.msg == "hello %s"
+        assert queued.getMessage() == "hello world"
+
+    def test_unknown_policy(self):
+        """Test that invalid policies are rejected."""
+        with pytest.raises(ValueError):
+            BoundedQueueHandler(queue.Queue(1), "drop_everything")
+
+
+class TestQueuedLogging:
+
+    def test_records_written_by_listener(self, tmp_path, restore_root_logger):
+        """Test that queued records reach the log file once flushed."""
+        setup_logging(log_dir=str(tmp_path), enable_console=False)
+        root = restore_root_logger
+
+        assert [type(h) for h in root.handlers] == [BoundedQueueHandler]
+
+        logging.getLogger("queued.test").info("written %d", 42)
+        shutdown_logging()
+
+        log_file = next(tmp_path.glob("multimind_*.log"))
+        assert "written 42" in log_file.read_text()
+
+        # Later records are written directly
+        logging.getLogger("queued.test").info("after shutdown")
+        assert "after shutdown" in log_file.read_text()
+
+    def test_direct_handlers_without_queue(self, tmp_path, restore_root_logger):
+        """Test that the queue can be disabled."""
+        setup_logging(log_dir=str(tmp_path), enable_console=False, use_queue=False)
+
+        handlers = restore_root_logger.handlers
+        assert len(handlers) == 1
+        assert not isinstance(handlers[0], BoundedQueueHandler)
+        assert logging_config.dropped_log_records() == 0
+
+
+class TestStructuredLogging:
+
+    def test_json_formatter(self):
+        """Test that JSON lines carry context ids, extras and exceptions."""
+        record = make_record("hello %s")
+        record.args = ("world",)
+        record.request_id = "req-1"
+        record.session_id = "sess-1"
+        record.trace_id = None
+        record.agent = "Echo"
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            record.exc_info = sys.exc_info()
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "hello world"
+        assert entry["level"] == "INFO"
+        assert entry["request_id"] == "req-1"
+        assert entry["session_id"] == "sess-1"
+        assert "trace_id" not in entry
+        assert entry["agent"] == "Echo"
+        assert "RuntimeError: boom" in entry["exception"]
+        assert entry["timestamp"].endswith("Z")
+
+    def test_context_filter(self):
+        """Test that bound request and session ids are copied to records."""
+        record = make_record("x")
+        token = request_id_var.set("req-2")
+        bind_session("sess-2")
+        try:
+            ContextFilter().filter(record)
+        finally:
+            request_id_var.reset(token)
+            bind_session(None)
+
+        assert (record.request_id, record.session_id) == ("req-2", "sess-2")
+
+    def test_sampling_filter(self):
+        """Test per-logger sampling by longest prefix, sparing warnings."""
+        sampler = SamplingFilter({"app": 1.0, "app.api.v1.health": 0.0})
+
+        def record(name, level=logging.INFO):
+            r = make_record("x")
+            r.name, r.levelno = name, level
+            return r
+
+        assert sampler.filter(record("app.api.v1.health")) is False
+        assert sampler.filter(record("app.api.v1.health", logging.WARNING)) is True
+        assert sampler.filter(record("app.api.v1.chat")) is True
+        assert sampler.filter(record("app.api.v1.healthcheck")) is True
+        assert sampler.filter(record("uvicorn")) is True
+
+    def test_access_log_filter(self):
+        """Test that excluded paths are left out of the access log."""
+        access = AccessLogFilter(["/api/v1/health"])
+
+        def record(path):
+            r = make_record('%s - "%s %s HTTP/%s" %d')
+            r.args = ("127.0.0.1:5000", "GET", path, "1.1", 200)
+            return r
+
+        assert access.filter(record("/api/v1/health?probe=1")) is False
+        assert access.filter(record("/api/v1/agents")) is True
+
+    def test_json_output_through_queue(self, tmp_path, restore_root_logger):
+        """Test JSON output end to end through the queue listener."""
+        setup_logging(log_dir=str(tmp_path), enable_console=False, log_format="json")
+
+        token = request_id_var.set("req-3")
+        try:
+            logging.getLogger("json.test").info("queued %d", 7)
+        finally:
+            request_id_var.reset(token)
+        shutdown_logging()
+
+        line = next(tmp_path.glob("multimind_*.log")).read_text().splitlines()[-1]
+        entry = json.loads(line)
+        assert entry["message"] == "queued 7"
+        assert entry["request_id"] == "req-3"
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils import metrics
+from app.utils.loop_monitor import LoopMonitor
+
+
+def blocking_call(seconds):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_lag_recorded():
+    """Test that a blocked loop shows up as lag in the metric."""
+    before = metrics.event_loop_lag.render()
+    monitor = LoopMonitor(interval=0.01)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.02)
+        blocking_call(0.15)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert monitor.max_lag >= 0.1
+    assert metrics.event_loop_lag.render() != before
+    assert monitor.last_block_stack is None
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_stack_captured():
+    """Test that the watchdog logs the stack of the call blocking the loop."""
+    blocks = metrics.event_loop_blocks.value()
+    monitor = LoopMonitor(interval=0.5, block_detection=True, block_threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        blocking_call(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert "blocking_call" in monitor.last_block_stack
+    assert metrics.event_loop_blocks.value() == blocks + 1
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_not_reported():
+    """Test that a healthy loop never triggers the watchdog."""
+    monitor = LoopMonitor(block_detection=True, block_threshold=0.25)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.2)
+    finally:
+        await monitor.stop()
+
+    assert monitor.last_block_stack is None
+    assert not monitor.running
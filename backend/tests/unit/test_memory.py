@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import debug
+from app.utils import memory
+from app.utils.memory import MemoryTracker, rss_bytes, tracking_active
+
+AUTH = {"Authorization": "Bearer secret"}
+
+retained = []
+
+
+def allocate_blocks(count):
+    retained.extend(bytearray(1024) for _ in range(count))
+
+
+@pytest.fixture
+def tracker():
+    tracker = MemoryTracker(frames=1)
+    tracker.start()
+    yield tracker
+    tracker.stop()
+    retained.clear()
+
+
+@pytest.fixture
+def debug_client():
+    app = FastAPI()
+    app.include_router(debug.router, prefix="/api/v1/debug")
+    with patch.object(memory.settings, "memory_token", "secret"):
+        yield TestClient(app)
+
+
+class TestMemoryTracker:
+
+    def test_inactive_by_default(self):
+        """Test that tracking needs opt-in and never runs in production."""
+        assert tracking_active() is False
+        with patch.object(memory.settings, "memory_tracking_enabled", True):
+            assert tracking_active() is True
+            with patch.object(memory.settings, "environment", "production"):
+                assert tracking_active() is False
+
+    def test_rss_reported(self):
+        """Test that resident memory is read where /proc exists."""
+        rss = rss_bytes()
+        assert rss is None or rss > 0
+
+    def test_growth_names_the_allocating_line(self, tracker):
+        """Test that growth since the baseline points at the allocation site."""
+        baseline = tracker.snapshot()
+        allocate_blocks(200)
+
+        growth = tracker.growth(tracker.snapshot(), baseline, limit=5)
+
+        assert "test_memory.py" in growth[0]["site"]
+        assert growth[0]["size_diff_bytes"] >= 200 * 1024
+        assert growth[0]["count_diff"] >= 200
+
+    def test_report_resets_baseline(self, tracker):
+        """Test that a reset report makes later growth relative to itself."""
+        allocate_blocks(100)
+        first = tracker.report(limit=5, reset_baseline=True)
+        second = tracker.report(limit=5)
+
+        assert first["traced_bytes"] > 0
+        assert any("test_memory.py" in site["site"] for site in first["growth"])
+        assert not any("test_memory.py" in site["site"] for site in second["growth"])
+        assert any("test_memory.py" in site["site"] for site in second["top"])
+
+
+class TestMemoryEndpoint:
+
+    def test_disabled_without_tracking(self, debug_client):
+        """Test that the endpoint is 404 unless tracemalloc is running."""
+        response = debug_client.get("/api/v1/debug/memory", headers=AUTH)
+
+        assert response.status_code == 404
+
+    def test_requires_token(self, debug_client, tracker):
+        """Test that the endpoint needs the debug token."""
+        response = debug_client.get("/api/v1/debug/memory")
+
+        assert response.status_code == 401
+
+    def test_profiling_token_not_accepted(self, debug_client, tracker):
+        """Test that the memory report has its own token."""
+        with patch.object(debug.profiling.settings, "profiling_token", "profile"):
+            response = debug_client.get(
+                "/api/v1/debug/memory", headers={"Authorization": "Bearer profile"}
+            )
+
+        assert response.status_code == 401
+
+    def test_mounted_without_profiling(self):
+        """Test that memory tracking alone is enough to mount the debug routes."""
+        assert debug.debug_routes_active() is False
+        with patch.object(memory.settings, "memory_tracking_enabled", True):
+            assert debug.debug_routes_active() is True
+
+    def test_top_allocators(self, debug_client, tracker):
+        """Test that the live report lists top sites and growth."""
+        allocate_blocks(100)
+
+        response = debug_client.get("/api/v1/debug/memory?limit=3", headers=AUTH)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["top"]) <= 3
+        assert {"rss_bytes", "traced_bytes", "traced_peak_bytes", "growth"} <= set(
+            body
+        )
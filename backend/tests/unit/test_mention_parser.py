@@ -1,5 +1,25 @@
 import pytest
-from app.utils.mention_parser import parse_mention
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.utils.mention_parser import (
+    Mention,
+    MentionIndex,
+    MentionMatcher,
+    parse_mention,
+)
+
+
+def make_agent(agent_id, name, display_name=None):
+    return SimpleNamespace(id=agent_id, name=name, display_name=display_name)
+
+
+AGENTS = [
+    make_agent(1, "Assistant", "Assistant"),
+    make_agent(2, "Coder", "Code Helper"),
+    make_agent(3, "Code", None),
+    make_agent(4, "Writer", "Writer"),
+]
 
 
 class TestMentionParser:
@@ -140,3 +160,102 @@ class TestMentionParser:
         # Create a large text with mention at the beginning
         large_text_start = "@Agent " + "lorem ipsum " * 1000
         assert parse_mention(large_text_start) == "Agent"
+
+
+class TestMentionMatcher:
+
+    def setup_method(self):
+        self.matcher = MentionMatcher.from_agents(AGENTS)
+
+    def test_all_mentions_with_spans(self):
+        """Test that every known mention is returned with its span."""
+        content = "@Coder and @Writer, then @Assistant"
+
+        mentions = self.matcher.find(content)
+
+        assert [m.name for m in mentions] == ["Coder", "Writer", "Assistant"]
+        assert mentions[0] == Mention(2, "Coder", "Coder", 0, 6)
+        for mention in mentions:
+            assert content[mention.start : mention.end] == f"@{mention.text}"
+
+    def test_case_insensitive(self):
+        """Test that mentions resolve to the canonical name in any case."""
+        mentions = self.matcher.find("@assistant and @WRITER")
+
+        assert [(m.name, m.text) for m in mentions] == [
+            ("Assistant", "assistant"),
+            ("Writer", "WRITER"),
+        ]
+
+    def test_display_name_alias(self):
+        """Test that display names, spaces included, resolve to the agent."""
+        mentions = self.matcher.find("@code helper please review")
+
+        assert [(m.agent_id, m.name, m.text) for m in mentions] == [
+            (2, "Coder", "code helper")
+        ]
+
+    def test_longest_name_at_word_boundary(self):
+        """Test that a name only matches as a whole word, longest first."""
+        assert [m.name for m in self.matcher.find("@Coder")] == ["Coder"]
+        assert [m.name for m in self.matcher.find("@Code!")] == ["Code"]
+        assert self.matcher.find("@Codex help") == []
+        assert self.matcher.find("@Code_1 help") == []
+
+    def test_unknown_and_invalid_mentions_skipped(self):
+        """Test that unknown names, emails and @@ are not mentions."""
+        assert self.matcher.find("@Nobody and someone@Coder.com @@Writer") == []
+        assert [m.name for m in self.matcher.find("@Nobody @Writer")] == ["Writer"]
+
+    def test_alias_never_shadows_a_name(self):
+        """Test that one agent's alias cannot take over another's name."""
+        matcher = MentionMatcher.from_agents(
+            [make_agent(1, "Writer", "Coder"), make_agent(2, "Coder")]
+        )
+
+        assert [m.agent_id for m in matcher.find("@coder")] == [2]
+
+    def test_empty(self):
+        """Test empty content and an empty agent set."""
+        assert self.matcher.find("") == []
+        assert MentionMatcher().find("@Assistant") == []
+
+
+class TestMentionIndex:
+
+    @pytest.mark.asyncio
+    async def test_reloads_after_ttl_and_rebuilds_on_change(self):
+        """Test that agents are re-read on expiry and rebuilt only on change."""
+        index = MentionIndex(ttl=60)
+        load = AsyncMock(return_value=AGENTS[:1])
+
+        first = await index.matcher(None, load)
+        assert await index.matcher(None, load) is first
+        assert load.await_count == 1
+
+        index.invalidate()
+        assert await index.matcher(None, load) is first  # Same agents
+        assert load.await_count == 2
+
+        load.return_value = AGENTS
+        with patch("app.utils.mention_parser.time.monotonic", return_value=1e12):
+            rebuilt = await index.matcher(None, load)
+        assert rebuilt is not first
+        assert [m.name for m in rebuilt.find("@Writer")] == ["Writer"]
+
+    @pytest.mark.asyncio
+    async def test_agent_rows_follow_each_reload(self):
+        """Test that matched mentions resolve to the rows of the last load."""
+        index = MentionIndex(ttl=60)
+        edited = make_agent(1, "Assistant", "Assistant")
+        load = AsyncMock(return_value=AGENTS[:1])
+
+        matcher = await index.matcher(None, load)
+        mention = matcher.find("@assistant hi")[0]
+        assert index.agent(mention.agent_id) is AGENTS[0]
+
+        load.return_value = [edited]
+        index.invalidate()
+        assert await index.matcher(None, load) is matcher  # Names unchanged
+        assert index.agent(mention.agent_id) is edited
+        assert index.agent(99) is None
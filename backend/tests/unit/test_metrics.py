@@ -0,0 +1,172 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.external.openai_client import get_openai_response_with_messages_async
+from app.utils import metrics
+from app.utils.metrics import MetricFamily, MetricsRegistry
+
+
+class TestMetricsRegistry:
+
+    @pytest.mark.asyncio
+    async def test_counter_and_gauge(self):
+        """Test counter and gauge exposition."""
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests", ["route"])
+        in_flight = registry.gauge("in_flight", "In flight")
+
+        requests.inc("/a")
+        requests.inc("/a", amount=2)
+        in_flight.inc()
+        in_flight.inc()
+        in_flight.dec()
+
+        output = await registry.render()
+
+        assert "# TYPE requests_total counter" in output
+        assert 'requests_total{route="/a"} 3' in output
+        assert "in_flight 1" in output
+
+    def test_counter_rejects_decrease(self):
+        """Test that counters cannot go down."""
+        counter = MetricsRegistry().counter("c_total", "C")
+
+        with pytest.raises(ValueError):
+            counter.inc(amount=-1)
+
+    def test_label_count_checked(self):
+        """Test that label values must match the label names."""
+        counter = MetricsRegistry().counter("c_total", "C", ["a", "b"])
+
+        with pytest.raises(ValueError):
+            counter.inc("only-one")
+
+    @pytest.mark.asyncio
+    async def test_histogram_buckets_are_cumulative(self):
+        """Test histogram bucket, sum and count lines."""
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.5, 0.7, 3.0):
+            latency.observe(value)
+
+        output = await registry.render()
+
+        assert 'latency_seconds_bucket{le="0.1"} 1' in output
+        assert 'latency_seconds_bucket{le="1"} 3' in output
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in output
+        assert "latency_seconds_sum 4.25" in output
+        assert "latency_seconds_count 4" in output
+
+    @pytest.mark.asyncio
+    async def test_label_values_escaped(self):
+        """Test that quotes and newlines in label values are escaped."""
+        registry = MetricsRegistry()
+        registry.counter("c_total", "C", ["v"]).inc('a"b\nc')
+
+        output = await registry.render()
+
+        assert 'c_total{v="a\\"b\\nc"} 1' in output
+
+    @pytest.mark.asyncio
+    async def test_collectors(self):
+        """Test sync and async collectors, and that failures are contained."""
+        registry = MetricsRegistry()
+
+        @registry.collector
+        def depth():
+            return [MetricFamily("queue_depth", "gauge", "Depth").add(4)]
+
+        @registry.collector
+        async def jobs():
+            return [MetricFamily("jobs", "gauge", "Jobs", ("status",)).add(2, "queued")]
+
+        @registry.collector
+        def broken():
+            raise RuntimeError("boom")
+
+        output = await registry.render()
+
+        assert "queue_depth 4" in output
+        assert 'jobs{status="queued"} 2' in output
+
+
+class TestMetricsEndpoint:
+
+    def test_metrics_endpoint(self, client):
+        """Test that scrapes include route, admission, job and pool metrics."""
+        client.get("/api/v1/agents")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert (
+            'http_requests_total{method="GET",route="/api/v1/agents",status="200"}'
+            in body
+        )
+        assert "llm_admission_queue_depth" in body
+        assert 'chat_jobs{status="queued"} 0' in body
+        assert "db_pool_checked_out" in body
+
+    def test_route_template_used_for_labels(self, client):
+        """Test that path parameters do not become label values."""
+        client.get("/api/v1/chat/sessions/abc123/messages")
+
+        body = client.get("/metrics").text
+
+        assert 'route="/api/v1/chat/sessions/{session_id}/messages"' in body
+        assert "abc123" not in body
+
+    def test_metrics_token(self, client):
+        """Test that a configured token protects the endpoint."""
+        with patch("app.api.v1.metrics.settings.metrics_token", "secret"):
+            denied = client.get("/metrics")
+            allowed = client.get(
+                "/metrics", headers={"Authorization": "Bearer secret"}
+            )
+
+        assert denied.status_code == 401
+        assert allowed.status_code == 200
+
+
+class TestLLMMetrics:
+
+    @pytest.mark.asyncio
+    async def test_llm_latency_and_tokens(self):
+        """Test that provider calls record latency per agent and token usage."""
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Hi"
+        mock_response.usage.prompt_tokens = 12
+        mock_response.usage.completion_tokens = 5
+
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create.return_value = mock_response
+
+        prompt_before = metrics.llm_tokens.value("metrics-model", "prompt")
+        calls_before = metrics.llm_request_duration.count(
+            "Echo", "metrics-model", "complete", "ok"
+        )
+
+        with (
+            patch(
+                "app.external.openai_client.get_async_openai_client",
+                return_value=mock_client,
+            ),
+            patch(
+                "app.external.openai_client.get_model_name",
+                return_value="metrics-model",
+            ),
+        ):
+            await get_openai_response_with_messages_async([], agent_name="Echo")
+
+        assert metrics.llm_tokens.value("metrics-model", "prompt") == prompt_before + 12
+        assert (
+            metrics.llm_request_duration.count(
+                "Echo", "metrics-model", "complete", "ok"
+            )
+            == calls_before + 1
+        )
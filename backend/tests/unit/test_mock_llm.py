@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.external.mock_llm import MODEL_NAME, reply_tokens
+from app.external.openai_client import (
+    LLMCompletion,
+    get_openai_completion_with_messages_async,
+    stream_openai_response_with_messages_async,
+)
+
+MESSAGES = [
+    {"role": "system", "content": "You are Echo"},
+    {"role": "user", "content": "say something"},
+]
+
+
+@pytest.fixture
+def mock_provider():
+    with (
+        patch.object(settings, "llm_provider", "mock"),
+        patch.object(settings, "mock_llm_latency", 0.01),
+        patch.object(settings, "mock_llm_token_interval", 0.001),
+        patch.object(settings, "mock_llm_reply_tokens", 5),
+        patch.object(settings, "mock_llm_error_rate", 0.0),
+    ):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_completion(mock_provider):
+    """Test that the mock answers like the provider, with usage and latency."""
+    completion = await get_openai_completion_with_messages_async(MESSAGES)
+
+    assert completion.outcome == "ok"
+    assert completion.model == MODEL_NAME
+    assert completion.content == "".join(reply_tokens(5))
+    assert (completion.prompt_tokens, completion.completion_tokens) == (5, 5)
+    assert completion.latency_ms >= 10
+
+
+@pytest.mark.asyncio
+async def test_stream(mock_provider):
+    """Test that streams yield one delta per token and report usage."""
+    completion = LLMCompletion(content="")
+
+    deltas = [
+        d
+        async for d in stream_openai_response_with_messages_async(
+            MESSAGES, completion=completion
+        )
+    ]
+
+    assert deltas == reply_tokens(5)
+    assert completion.outcome == "ok"
+    assert completion.ttft_ms >= 10
+    assert completion.completion_tokens == 5
+
+
+@pytest.mark.asyncio
+async def test_errors(mock_provider):
+    """Test that injected failures take the provider error path."""
+    with patch.object(settings, "mock_llm_error_rate", 1.0):
+        completion = await get_openai_completion_with_messages_async(MESSAGES)
+
+    assert completion.outcome == "error"
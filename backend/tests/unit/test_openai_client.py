@@ -2,11 +2,13 @@ import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 from app.external.openai_client import (
     get_openai_client,
+    close_async_openai_client,
     get_async_openai_client,
     get_model_name,
     get_openai_response,
     get_openai_response_async,
     get_openai_response_with_messages_async,
+    stream_openai_response_with_messages_async,
 )
 
 
@@ -84,6 +86,29 @@ class TestOpenAIClient:
             # Verify
             mock_async_openai.assert_called_once_with(api_key="sk-test-key")
 
+    @pytest.mark.asyncio
+    @patch("app.external.openai_client.settings")
+    async def test_async_client_shared_per_loop(self, mock_settings):
+        """Test that calls on one event loop reuse a client until shutdown."""
+        mock_settings.llm_provider = "openai"
+        mock_settings.is_using_azure_openai = False
+        mock_settings.effective_openai_api_key = "sk-test-key"
+
+        with patch(
+            "app.external.openai_client.openai.AsyncOpenAI"
+        ) as mock_async_openai:
+            mock_async_openai.return_value.close = AsyncMock()
+            first = get_async_openai_client()
+            second = get_async_openai_client()
+            await close_async_openai_client()
+            third = get_async_openai_client()
+
+        assert first is second
+        first.close.assert_awaited_once()
+        assert mock_async_openai.call_count == 2
+        assert third is mock_async_openai.return_value
+        await close_async_openai_client()
+
     @patch("app.external.openai_client.settings")
     def test_get_model_name_azure(self, mock_settings):
         """Test getting model name for Azure OpenAI."""
@@ -320,3 +345,61 @@ class TestOpenAIClient:
 
             # Verify content is stripped
             assert result == "Response with whitespace"
+
+    @pytest.mark.asyncio
+    async def test_stream_openai_response_with_messages_async(self):
+        """Test that streamed deltas are yielded in order."""
+        messages = [{"role": "user", "content": "Hello"}]
+
+        def make_chunk(content):
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = content
+            return chunk
+
+        async def fake_stream():
+            for content in ["Hel", None, "lo"]:
+                yield make_chunk(content)
+
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create.return_value = fake_stream()
+
+        with (
+            patch(
+                "app.external.openai_client.get_async_openai_client"
+            ) as mock_get_client,
+            patch("app.external.openai_client.get_model_name") as mock_get_model,
+        ):
+            mock_get_client.return_value = mock_client
+            mock_get_model.return_value = "gpt-4"
+
+            deltas = [
+                delta
+                async for delta in stream_openai_response_with_messages_async(messages)
+            ]
+
+            assert deltas == ["Hel", "lo"]
+            assert mock_client.chat.completions.create.call_args.kwargs["stream"]
+
+    @pytest.mark.asyncio
+    async def test_stream_openai_response_error_fallback(self):
+        """Test that a failed stream yields the fallback apology."""
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create.side_effect = Exception("Stream Error")
+
+        with (
+            patch(
+                "app.external.openai_client.get_async_openai_client"
+            ) as mock_get_client,
+            patch("app.external.openai_client.get_model_name") as mock_get_model,
+        ):
+            mock_get_client.return_value = mock_client
+            mock_get_model.return_value = "gpt-4"
+
+            deltas = [
+                delta
+                async for delta in stream_openai_response_with_messages_async([])
+            ]
+
+            assert len(deltas) == 1
+            assert "technical difficulties" in deltas[0]
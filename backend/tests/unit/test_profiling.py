@@ -0,0 +1,109 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import debug
+from app.utils import profiling
+from app.utils.profiling import (
+    ProfilingMiddleware,
+    profile_sync_endpoints,
+    profiling_active,
+)
+
+AUTH = {"Authorization": "Bearer secret"}
+
+
+@pytest.fixture
+def profiled_client(tmp_path):
+    app = FastAPI()
+
+    @app.get("/work")
+    def work():
+        return {"total": sum(i * i for i in range(10000))}
+
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(debug.router, prefix="/api/v1/debug")
+    profile_sync_endpoints(app)
+
+    with (
+        patch.object(profiling.settings, "profiling_token", "secret"),
+        patch.object(profiling.settings, "profiling_dir", str(tmp_path)),
+        patch.object(profiling.settings, "profiling_sample_rate", 0.0),
+        patch("app.utils.profiling.has_pyinstrument", return_value=False),
+    ):
+        yield TestClient(app)
+
+
+class TestProfiling:
+
+    def test_inactive_by_default(self):
+        """Test that profiling needs opt-in, a token and a non-production env."""
+        with (
+            patch.object(profiling.settings, "profiling_enabled", True),
+            patch.object(profiling.settings, "profiling_token", "secret"),
+        ):
+            assert profiling_active() is True
+            with patch.object(profiling.settings, "environment", "production"):
+                assert profiling_active() is False
+        with patch.object(profiling.settings, "profiling_enabled", False):
+            assert profiling_active() is False
+
+    def test_profile_header(self, profiled_client, tmp_path):
+        """Test that requests with the token are profiled and saved."""
+        plain = profiled_client.get("/work")
+        profiled = profiled_client.get("/work", headers={"X-Profile": "secret"})
+
+        assert "x-profile-id" not in plain.headers
+        name = profiled.headers["x-profile-id"]
+        assert name.endswith(".prof")
+        assert (tmp_path / name).exists()
+        summary = (tmp_path / name.replace(".prof", ".txt")).read_text()
+        assert "cumulative" in summary
+
+    def test_sync_endpoint_profiled_in_its_thread(self, profiled_client, tmp_path):
+        """Test that a threadpool endpoint's own calls reach the report."""
+        profiled = profiled_client.get("/work", headers={"X-Profile": "secret"})
+        name = profiled.headers["x-profile-id"]
+
+        summary = (tmp_path / name.replace(".prof", ".txt")).read_text()
+        assert "(work)" in summary
+        assert "<genexpr>" in summary
+
+    def test_wrong_token_not_profiled(self, profiled_client, tmp_path):
+        """Test that an invalid X-Profile value is ignored."""
+        response = profiled_client.get("/work", headers={"X-Profile": "guess"})
+
+        assert "x-profile-id" not in response.headers
+        assert list(tmp_path.iterdir()) == []
+
+    def test_sampled_requests(self, profiled_client):
+        """Test that a sample rate profiles requests without the header."""
+        with patch.object(profiling.settings, "profiling_sample_rate", 1.0):
+            response = profiled_client.get("/work")
+
+        assert "x-profile-id" in response.headers
+
+    def test_list_and_download(self, profiled_client):
+        """Test the authenticated listing and download endpoints."""
+        name = profiled_client.get("/work", headers={"X-Profile": "secret"}).headers[
+            "x-profile-id"
+        ]
+
+        assert profiled_client.get("/api/v1/debug/profiles").status_code == 401
+        listing = profiled_client.get("/api/v1/debug/profiles", headers=AUTH).json()
+        assert name in [entry["name"] for entry in listing["profiles"]]
+
+        download = profiled_client.get(f"/api/v1/debug/profiles/{name}", headers=AUTH)
+        assert download.status_code == 200
+        missing = profiled_client.get("/api/v1/debug/profiles/nope.prof", headers=AUTH)
+        assert missing.status_code == 404
+
+    def test_old_profiles_pruned(self, profiled_client, tmp_path):
+        """Test that only the newest reports are kept."""
+        with patch.object(profiling.settings, "profiling_max_files", 2):
+            for _ in range(3):
+                profiled_client.get("/work", headers={"X-Profile": "secret"})
+
+        assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,175 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.utils.rate_limit import (
+    InMemoryRateLimitBackend,
+    RateLimiter,
+    RateLimitHeadersMiddleware,
+    RateLimitPolicy,
+    RateLimitResult,
+    rate_limit,
+)
+from app.utils.serialization import json_response
+
+POLICY = RateLimitPolicy("llm", capacity=2, refill_rate=0.5)
+
+
+class TestInMemoryBackend:
+
+    @pytest.mark.asyncio
+    async def test_consume_until_empty(self):
+        """Test that a bucket denies once its tokens are spent."""
+        backend = InMemoryRateLimitBackend()
+
+        first = await backend.consume("k", POLICY)
+        second = await backend.consume("k", POLICY)
+        third = await backend.consume("k", POLICY)
+
+        assert first.allowed and first.remaining == 1
+        assert second.allowed and second.remaining == 0
+        assert not third.allowed
+        assert third.retry_after == pytest.approx(2.0, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_refill_over_time(self):
+        """Test that tokens refill at the configured rate."""
+        backend = InMemoryRateLimitBackend()
+
+        with patch("app.utils.rate_limit.time.monotonic", return_value=100.0):
+            await backend.consume("k", POLICY)
+            await backend.consume("k", POLICY)
+        with patch("app.utils.rate_limit.time.monotonic", return_value=102.0):
+            result = await backend.consume("k", POLICY)
+
+        assert result.allowed
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self):
+        """Test that buckets for different keys do not interact."""
+        backend = InMemoryRateLimitBackend()
+        for _ in range(2):
+            await backend.consume("a", POLICY)
+
+        result = await backend.consume("b", POLICY)
+
+        assert result.allowed
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        """Test that the key table stays bounded."""
+        backend = InMemoryRateLimitBackend(max_keys=2)
+        for key in ("a", "b", "c"):
+            await backend.consume(key, POLICY)
+
+        assert list(backend._buckets) == ["b", "c"]
+
+
+class TestRateLimiter:
+
+    @pytest.mark.asyncio
+    async def test_most_restrictive_identity_wins(self):
+        """Test that one exhausted identity denies the request."""
+        limiter = RateLimiter(InMemoryRateLimitBackend(), {"llm": POLICY})
+        for _ in range(2):
+            await limiter.hit("llm", {"session": "s1", "ip": "1.1.1.1"})
+
+        result = await limiter.hit("llm", {"session": "s2", "ip": "1.1.1.1"})
+
+        assert not result.allowed
+
+    @pytest.mark.asyncio
+    async def test_denied_hit_consumes_nothing(self):
+        """Test that a denial leaves the other identities' buckets untouched."""
+        limiter = RateLimiter(InMemoryRateLimitBackend(), {"llm": POLICY})
+        for _ in range(2):
+            await limiter.hit("llm", {"session": "s1", "ip": "1.1.1.1"})
+
+        for _ in range(3):
+            denied = await limiter.hit("llm", {"session": "s2", "ip": "1.1.1.1"})
+        allowed = await limiter.hit("llm", {"session": "s2", "ip": "2.2.2.2"})
+
+        assert not denied.allowed
+        assert allowed.allowed and allowed.remaining == 1
+
+    @pytest.mark.asyncio
+    async def test_hit_all_charges_every_policy_or_none(self):
+        """Test that a denial by one policy leaves the other's buckets alone."""
+        wide = RateLimitPolicy("batch", capacity=5, refill_rate=0.001)
+        limiter = RateLimiter(
+            InMemoryRateLimitBackend(), {"llm": POLICY, "batch": wide}
+        )
+        identity = {"ip": "1.1.1.1"}
+        for _ in range(3):
+            result = await limiter.hit_all(["batch", "llm"], identity)
+
+        batch = await limiter.hit("batch", identity)
+
+        assert not result.allowed
+        assert batch.allowed and batch.remaining == 2
+
+    @pytest.mark.asyncio
+    async def test_missing_identities_skipped(self):
+        """Test that absent identities do not create buckets."""
+        backend = InMemoryRateLimitBackend()
+        limiter = RateLimiter(backend, {"llm": POLICY})
+
+        await limiter.hit("llm", {"session": None, "ip": "1.1.1.1", "user": None})
+
+        assert list(backend._buckets) == ["llm:ip:1.1.1.1"]
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        """Test that a disabled limiter allows everything."""
+        limiter = RateLimiter(InMemoryRateLimitBackend(), {"llm": POLICY}, False)
+
+        assert await limiter.hit("llm", {"ip": "1.1.1.1"}) is None
+
+    def test_headers(self):
+        """Test standard rate-limit header rendering."""
+        result = RateLimitResult(
+            allowed=False, limit=2, remaining=0, reset_after=3.2, retry_after=1.5
+        )
+
+        assert result.headers() == {
+            "RateLimit-Limit": "2",
+            "RateLimit-Remaining": "0",
+            "RateLimit-Reset": "4",
+            "Retry-After": "2",
+        }
+
+
+class TestRateLimitDependency:
+
+    @pytest.fixture
+    def limited_client(self):
+        limiter = RateLimiter(InMemoryRateLimitBackend(), {"llm": POLICY})
+        app = FastAPI()
+        app.add_middleware(RateLimitHeadersMiddleware)
+
+        @app.post("/messages", dependencies=[Depends(rate_limit("llm"))])
+        async def send():
+            return json_response({"ok": True})
+
+        with patch("app.utils.rate_limit.rate_limiter", limiter):
+            yield TestClient(app)
+
+    def test_headers_on_success(self, limited_client):
+        """Test that allowed responses carry RateLimit headers."""
+        response = limited_client.post("/messages", json={"session_id": "s1"})
+
+        assert response.status_code == 200
+        assert response.headers["ratelimit-limit"] == "2"
+        assert response.headers["ratelimit-remaining"] == "1"
+
+    def test_429_with_retry_after(self, limited_client):
+        """Test that exhausted buckets return 429 with Retry-After."""
+        for _ in range(2):
+            limited_client.post("/messages", json={"session_id": "s1"})
+
+        response = limited_client.post("/messages", json={"session_id": "s1"})
+
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+        assert response.headers["ratelimit-remaining"] == "0"
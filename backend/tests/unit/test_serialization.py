@@ -0,0 +1,113 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from app.schemas.agent import Agent
+from app.schemas.chat import Message
+from app.utils.serialization import (
+    json_response,
+    serialize_agent,
+    serialize_agents,
+    serialize_message,
+    serialize_messages,
+)
+
+
+def make_message_row(**overrides):
+    data = {
+        "id": 1,
+        "content": "Hello",
+        "session_id": "session-1",
+        "agent_id": None,
+        "created_at": datetime(2024, 1, 1, 12, 0, 0),
+    }
+    data.update(overrides)
+    return SimpleNamespace(**data)
+
+
+class TestSerializeMessage:
+
+    def test_user_message(self):
+        """Test serializing a user message row."""
+        result = serialize_message(make_message_row())
+
+        assert result == {
+            "content": "Hello",
+            "session_id": "session-1",
+            "id": 1,
+            "agent_id": None,
+            "is_user": True,
+            "timestamp": "2024-01-01T12:00:00",
+        }
+
+    def test_agent_message(self):
+        """Test serializing an agent message row."""
+        result = serialize_message(make_message_row(agent_id=3))
+
+        assert result["agent_id"] == 3
+        assert result["is_user"] is False
+
+    def test_missing_timestamp(self):
+        """Test that rows without created_at serialize a null timestamp."""
+        result = serialize_message(make_message_row(created_at=None))
+
+        assert result["timestamp"] is None
+
+    def test_matches_schema(self):
+        """Test the fast path matches the schema's own ORM conversion."""
+        row = make_message_row(agent_id=2)
+
+        assert serialize_message(row) == Message.model_validate(row).model_dump()
+
+    def test_mapping_is_validated(self):
+        """Test that dict input goes through pydantic validation."""
+        result = serialize_message(
+            {"id": 5, "content": "Hi", "session_id": "s", "agent_id": 1}
+        )
+
+        assert result["id"] == 5
+        assert result["timestamp"] is None
+
+    def test_serialize_messages(self):
+        """Test serializing a list of rows."""
+        rows = [make_message_row(id=i) for i in range(3)]
+
+        assert [m["id"] for m in serialize_messages(rows)] == [0, 1, 2]
+
+
+class TestSerializeAgent:
+
+    def test_agent_row(self):
+        """Test serializing an agent row."""
+        row = SimpleNamespace(
+            id=1,
+            name="Assistant",
+            description="Helpful",
+            system_prompt=None,
+            display_name="AI Assistant",
+            avatar="AI",
+            color="from-blue-500 to-blue-600",
+        )
+
+        result = serialize_agent(row)
+
+        assert result == Agent.model_validate(row, from_attributes=True).model_dump()
+
+    def test_agent_mapping(self):
+        """Test serializing agent dicts through the schema."""
+        result = serialize_agents([{"id": 1, "name": "Coder", "description": "Dev"}])
+
+        assert result[0]["name"] == "Coder"
+        assert result[0]["display_name"] is None
+
+
+class TestJsonResponse:
+
+    def test_json_response(self):
+        """Test that responses are rendered with orjson."""
+        response = json_response(serialize_messages([make_message_row()]))
+
+        assert isinstance(response, ORJSONResponse)
+        assert orjson.loads(response.body)[0]["content"] == "Hello"
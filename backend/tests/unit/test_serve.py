@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+from app import serve
+
+
+class TestServe:
+
+    def test_worker_count_defaults_to_cpus(self):
+        """Test that workers are sized to the available CPUs."""
+        with (
+            patch("app.serve.settings.web_workers", 0),
+            patch("app.serve.available_cpus", return_value=6),
+        ):
+            assert serve.worker_count() == 6
+
+    def test_worker_count_explicit(self):
+        """Test that an explicit worker count wins over settings."""
+        with patch("app.serve.settings.web_workers", 3):
+            assert serve.worker_count() == 3
+            assert serve.worker_count(5) == 5
+
+    def test_available_cpus_honours_cgroup_quota(self, tmp_path):
+        """Test that a container CPU quota caps the worker count."""
+        cpu_max = tmp_path / "cpu.max"
+        cpu_max.write_text("150000 100000\n")
+        real_open = open
+
+        def fake_open(path, *args, **kwargs):
+            if path == "/sys/fs/cgroup/cpu.max":
+                return real_open(cpu_max, *args, **kwargs)
+            return real_open(path, *args, **kwargs)
+
+        with (
+            patch("app.serve.os.sched_getaffinity", return_value=set(range(8))),
+            patch("builtins.open", fake_open),
+        ):
+            assert serve.available_cpus() == 2
+
+    def test_gunicorn_options(self):
+        """Test gunicorn settings for uvicorn workers and recycling."""
+        options = serve.gunicorn_options("0.0.0.0", 9000, 4)
+
+        assert options["bind"] == "0.0.0.0:9000"
+        assert options["workers"] == 4
+        assert options["worker_class"] == "uvicorn.workers.UvicornWorker"
+        assert options["max_requests"] == serve.settings.web_max_requests
+        assert options["graceful_timeout"] == serve.settings.web_graceful_timeout
+
+    def test_falls_back_to_uvicorn(self, capsys):
+        """Test that uvicorn runs the workers when gunicorn is missing."""
+        with patch("app.serve._has_module", return_value=False):
+            serve.main(["--workers", "2", "--port", "9001", "--print-config"])
+
+        output = capsys.readouterr().out
+        assert "server: uvicorn" in output
+        assert "workers: 2" in output
+        assert "loop: asyncio" in output
+
+    def test_runs_selected_server(self):
+        """Test that the chosen server is started with resolved options."""
+        with patch("app.serve.run_uvicorn") as run_uvicorn:
+            serve.main(["--server", "uvicorn", "--workers", "2"])
+
+        options = run_uvicorn.call_args.args[0]
+        assert options["workers"] == 2
+        assert options["timeout_keep_alive"] == serve.settings.web_keepalive
+
+    def test_warns_about_per_worker_metrics(self, capsys):
+        """Test that several workers with /metrics enabled print a warning."""
+        with patch("app.serve.run_uvicorn"):
+            serve.main(["--server", "uvicorn", "--workers", "2"])
+            assert "/metrics" in capsys.readouterr().err
+
+            serve.main(["--server", "uvicorn", "--workers", "1"])
+            assert capsys.readouterr().err == ""
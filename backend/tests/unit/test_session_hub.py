@@ -0,0 +1,86 @@
+import orjson
+import pytest
+
+from app.services.session_hub import SessionHub, Subscriber
+
+
+class TestSessionHub:
+
+    @pytest.mark.asyncio
+    async def test_publish_to_subscribers(self):
+        """Test that events reach every subscriber of the session."""
+        hub = SessionHub()
+        first, second = Subscriber(10), Subscriber(10)
+        hub.subscribe("s1", first)
+        hub.subscribe("s1", second)
+
+        delivered = hub.publish("s1", {"type": "message", "id": 1})
+
+        assert delivered == 2
+        assert orjson.loads(first.queue.get_nowait()) == {"type": "message", "id": 1}
+        assert second.queue.qsize() == 1
+
+    @pytest.mark.asyncio
+    async def test_publish_other_session(self):
+        """Test that sessions are isolated."""
+        hub = SessionHub()
+        subscriber = Subscriber(10)
+        hub.subscribe("s1", subscriber)
+
+        assert hub.publish("s2", {"type": "message"}) == 0
+        assert subscriber.queue.empty()
+
+    @pytest.mark.asyncio
+    async def test_exclude_sender(self):
+        """Test that the publishing subscriber can be excluded."""
+        hub = SessionHub()
+        sender, other = Subscriber(10), Subscriber(10)
+        hub.subscribe("s1", sender)
+        hub.subscribe("s1", other)
+
+        hub.publish("s1", {"type": "typing"}, droppable=True, exclude=sender)
+
+        assert sender.queue.empty()
+        assert other.queue.qsize() == 1
+
+    @pytest.mark.asyncio
+    async def test_droppable_events_do_not_overflow(self):
+        """Test that full queues drop typing events silently."""
+        hub = SessionHub()
+        subscriber = Subscriber(1)
+        hub.subscribe("s1", subscriber)
+
+        hub.publish("s1", {"type": "typing"}, droppable=True)
+        hub.publish("s1", {"type": "typing"}, droppable=True)
+
+        assert subscriber.dropped == 1
+        assert not subscriber.overflowed.is_set()
+
+    @pytest.mark.asyncio
+    async def test_lost_message_marks_overflow(self):
+        """Test that losing a message flags the subscriber as overflowed."""
+        hub = SessionHub()
+        subscriber = Subscriber(1)
+        hub.subscribe("s1", subscriber)
+
+        hub.publish("s1", {"type": "message", "id": 1})
+        hub.publish("s1", {"type": "message", "id": 2})
+
+        assert subscriber.overflowed.is_set()
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_all(self):
+        """Test that a subscriber can leave all sessions at once."""
+        hub = SessionHub()
+        subscriber = Subscriber(10)
+        hub.subscribe("s1", subscriber)
+        hub.subscribe("s2", subscriber)
+        other = Subscriber(10)
+        hub.subscribe("s2", other)
+
+        hub.unsubscribe_all(subscriber)
+
+        assert not hub.has_subscribers("s1")
+        assert subscriber.sessions == set()
+        assert hub.subscriber_count() == 1
+        assert other.sessions == {"s2"}
@@ -0,0 +1,227 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.external.openai_client import get_openai_response_with_messages_async
+from app.schemas.chat import MessageCreate
+from app.services import chat_service
+from app.utils.db import async_session_scope
+from app.utils.tracing import (
+    BatchSpanProcessor,
+    FileExporter,
+    InMemoryExporter,
+    OTLPHttpExporter,
+    SimpleSpanProcessor,
+    Tracer,
+    TracingMiddleware,
+    current_span,
+    parse_traceparent,
+    tracer,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def memory_tracer():
+    """Enable the global tracer with synchronous in-memory export."""
+    exporter = InMemoryExporter()
+    with (
+        patch.object(tracer, "enabled", True),
+        patch.object(tracer, "sample_rate", 1.0),
+        patch.object(tracer, "processor", SimpleSpanProcessor(exporter)),
+    ):
+        yield exporter
+
+
+class TestTracer:
+
+    def test_parse_traceparent(self):
+        """Test W3C traceparent parsing and rejection of invalid headers."""
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (
+            TRACE_ID,
+            PARENT_ID,
+            True,
+        )
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+        assert parse_traceparent("00-" + "0" * 32 + f"-{PARENT_ID}-01") is None
+        assert parse_traceparent("garbage") is None
+        assert parse_traceparent(None) is None
+
+    def test_nested_spans(self):
+        """Test that child spans share the trace and point at their parent."""
+        exporter = InMemoryExporter()
+        local = Tracer(True, 1.0, SimpleSpanProcessor(exporter))
+
+        with local.span("outer") as outer:
+            with local.span("inner", {"k": "v"}) as inner:
+                assert current_span() is inner
+            assert current_span() is outer
+        assert current_span() is None
+
+        assert exporter.names() == ["inner", "outer"]
+        assert inner.trace_id == outer.trace_id
+        assert inner.parent_id == outer.span_id
+        assert inner.attributes == {"k": "v"}
+        assert inner.duration_ms >= 0
+
+    def test_remote_parent_and_sampling(self):
+        """Test that a remote sampling decision wins over the local rate."""
+        exporter = InMemoryExporter()
+        local = Tracer(True, 0.0, SimpleSpanProcessor(exporter))
+
+        with local.span("unsampled") as span:
+            assert span.traceparent.endswith("-00")
+        with local.span("remote", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01") as span:
+            pass
+
+        assert exporter.names() == ["remote"]
+        assert span.trace_id == TRACE_ID
+        assert span.parent_id == PARENT_ID
+
+    def test_exception_recorded(self):
+        """Test that exceptions mark the span and still propagate."""
+        exporter = InMemoryExporter()
+        local = Tracer(True, 1.0, SimpleSpanProcessor(exporter))
+
+        with pytest.raises(ValueError):
+            with local.span("failing"):
+                raise ValueError("bad input")
+
+        assert exporter.spans[0].error == "ValueError: bad input"
+
+    def test_disabled_tracer_is_noop(self):
+        """Test that a disabled tracer neither sets context nor exports."""
+        local = Tracer(False)
+
+        with local.span("ignored") as span:
+            span.set_attribute("k", "v")
+            assert current_span() is None
+        assert local.inject({}) == {}
+
+
+class TestExport:
+
+    def test_batch_processor_flushes_to_file(self, tmp_path):
+        """Test that queued spans are written out on shutdown."""
+        path = tmp_path / "traces.jsonl"
+        processor = BatchSpanProcessor(FileExporter(str(path)), interval=60)
+        local = Tracer(True, 1.0, processor)
+
+        for name in ("a", "b"):
+            with local.span(name):
+                pass
+        processor.shutdown()
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["name"] for r in records] == ["a", "b"]
+        assert records[0]["trace_id"] != records[1]["trace_id"]
+
+    def test_batch_processor_drops_when_full(self):
+        """Test that a full queue drops spans instead of blocking."""
+        processor = BatchSpanProcessor(InMemoryExporter(), max_queue_size=1)
+        processor._ensure_thread = lambda: None  # keep the queue from draining
+        local = Tracer(True, 1.0, processor)
+
+        for name in ("a", "b", "c"):
+            with local.span(name):
+                pass
+
+        assert processor.dropped == 2
+
+    def test_otlp_payload(self):
+        """Test the OTLP/JSON shape sent to collectors."""
+        exporter = InMemoryExporter()
+        local = Tracer(True, 1.0, SimpleSpanProcessor(exporter))
+        with local.span("parent"):
+            with local.span("child", {"n": 3, "ok": True}):
+                pass
+
+        otlp = OTLPHttpExporter("http://collector/v1/traces", "svc")
+        payload = otlp.payload(exporter.spans)
+        otlp.shutdown()
+
+        resource = payload["resourceSpans"][0]
+        assert resource["resource"]["attributes"][0]["value"] == {"stringValue": "svc"}
+        child = resource["scopeSpans"][0]["spans"][0]
+        assert child["parentSpanId"] == exporter.spans[1].span_id
+        assert {"key": "n", "value": {"intValue": "3"}} in child["attributes"]
+        assert {"key": "ok", "value": {"boolValue": True}} in child["attributes"]
+
+
+class TestPropagation:
+
+    @pytest.mark.asyncio
+    async def test_middleware_continues_trace(self, memory_tracer):
+        """Test that incoming traceparent headers continue the caller's trace."""
+
+        async def endpoint(request):
+            return PlainTextResponse(current_span().trace_id)
+
+        app = Starlette(routes=[Route("/items/{item_id}", endpoint)])
+        app.add_middleware(TracingMiddleware)
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get(
+                "/items/7", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+            )
+
+        assert response.text == TRACE_ID
+        assert response.headers["traceresponse"].startswith(f"00-{TRACE_ID}-")
+        span = memory_tracer.spans[0]
+        assert span.parent_id == PARENT_ID
+        assert span.attributes["http.status_code"] == 200
+
+    @pytest.mark.asyncio
+    async def test_provider_request_carries_traceparent(self, memory_tracer):
+        """Test that provider calls get a span and an outgoing traceparent."""
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Hi"
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create.return_value = mock_response
+
+        with patch(
+            "app.external.openai_client.get_async_openai_client",
+            return_value=mock_client,
+        ):
+            await get_openai_response_with_messages_async([], agent_name="Echo")
+
+        span = memory_tracer.spans[0]
+        assert span.name == "llm.chat_completion"
+        assert span.attributes["llm.outcome"] == "ok"
+        headers = mock_client.chat.completions.create.call_args.kwargs["extra_headers"]
+        assert headers["traceparent"] == span.traceparent
+
+    @pytest.mark.asyncio
+    async def test_chat_pipeline_spans(
+        self, async_client, async_test_agents, mock_llm_service, memory_tracer
+    ):
+        """Test that each chat stage and repository query gets a span."""
+        async with async_session_scope() as db:
+            await chat_service.create_message_async(
+                db, MessageCreate(content="@Echo hi", session_id="traced")
+            )
+
+        names = memory_tracer.names()
+        for expected in (
+            "chat.create_message",
+            "chat.resolve_agent",
+            "agent_repo.get_agents_async",
+            "chat.build_context",
+            "chat_repo.get_messages_by_session_async",
+            "chat.generate",
+            "chat.save_exchange",
+            "chat_repo.create_message_async",
+        ):
+            assert expected in names
+        assert len({span.trace_id for span in memory_tracer.spans}) == 1
+        root = memory_tracer.spans[-1]
+        assert root.name == "chat.create_message"
+        assert root.attributes["chat.agent"] == "Echo"
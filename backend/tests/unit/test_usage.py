@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.external.openai_client import (
+    LLMCompletion,
+    get_openai_completion_with_messages_async,
+    stream_openai_response_with_messages_async,
+)
+from app.repositories import usage_repo
+from app.services import llm_service
+from app.services.job_worker import JobWorkerPool
+from app.utils.db import async_session_scope
+
+URL = "/api/v1/chat/messages"
+
+
+def usage(prompt_tokens=10, completion_tokens=5, cached_tokens=0):
+    return MagicMock(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        prompt_tokens_details=MagicMock(cached_tokens=cached_tokens),
+    )
+
+
+@pytest.fixture
+def metered_llm():
+    """Replies that report usage and latency, like the real provider."""
+
+    async def completion(agent, context, user_message):
+        return LLMCompletion(
+            content=f"Reply from {agent.name}",
+            model="gpt-test",
+            prompt_tokens=100,
+            completion_tokens=20,
+            cached_tokens=64,
+            latency_ms=250.0,
+        )
+
+    with patch.object(llm_service, "generate_completion_async", completion):
+        yield
+
+
+class TestProviderUsage:
+
+    @pytest.mark.asyncio
+    async def test_completion_carries_usage(self):
+        """Test that provider usage, cache hits and latency are returned."""
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = " Hi "
+        response.usage = usage(12, 3, cached_tokens=8)
+        client = AsyncMock()
+        client.chat.completions.create.return_value = response
+
+        with (
+            patch(
+                "app.external.openai_client.get_async_openai_client",
+                return_value=client,
+            ),
+            patch(
+                "app.external.openai_client.get_model_name", return_value="gpt-test"
+            ),
+        ):
+            completion = await get_openai_completion_with_messages_async([])
+
+        assert completion.content == "Hi"
+        assert completion.model == "gpt-test"
+        assert (completion.prompt_tokens, completion.completion_tokens) == (12, 3)
+        assert completion.cache_hit is True
+        assert completion.latency_ms >= 0
+        assert "content" not in completion.usage_fields()
+
+    @pytest.mark.asyncio
+    async def test_stream_fills_completion(self):
+        """Test that streams report TTFT and the final usage chunk."""
+
+        def chunk(content=None, chunk_usage=None):
+            item = MagicMock()
+            item.choices = [MagicMock()] if content else []
+            if content:
+                item.choices[0].delta.content = content
+            item.usage = chunk_usage
+            return item
+
+        async def fake_stream():
+            yield chunk("Hel")
+            yield chunk("lo")
+            yield chunk(chunk_usage=usage(7, 2))
+
+        client = AsyncMock()
+        client.chat.completions.create.return_value = fake_stream()
+        completion = LLMCompletion(content="")
+
+        with patch(
+            "app.external.openai_client.get_async_openai_client", return_value=client
+        ):
+            deltas = [
+                d
+                async for d in stream_openai_response_with_messages_async(
+                    [], completion=completion
+                )
+            ]
+
+        assert deltas == ["Hel", "lo"]
+        assert completion.mode == "stream"
+        assert completion.outcome == "ok"
+        assert completion.ttft_ms is not None
+        assert (completion.prompt_tokens, completion.completion_tokens) == (7, 2)
+
+
+class TestUsageLedger:
+
+    @pytest.mark.asyncio
+    async def test_reply_usage_recorded(
+        self, async_client, async_test_agents, metered_llm
+    ):
+        """Test that each generated reply gets a ledger row."""
+        response = await async_client.post(
+            URL, json={"content": "@Echo hi", "session_id": "usage-1"}
+        )
+        reply_id = response.json()["id"]
+
+        async with async_session_scope() as db:
+            row = await usage_repo.get_message_usage_async(db, reply_id)
+            assert row.session_id == "usage-1"
+            assert row.model == "gpt-test"
+            assert (row.prompt_tokens, row.completion_tokens) == (100, 20)
+            assert row.latency_ms == 250.0
+            assert row.mode == "complete"
+
+    @pytest.mark.asyncio
+    async def test_job_reply_usage_recorded(
+        self, async_client, async_test_agents, metered_llm
+    ):
+        """Test that async-mode replies record usage with the job completion."""
+        response = await async_client.post(
+            f"{URL}?mode=async", json={"content": "@Echo hi", "session_id": "usage-2"}
+        )
+        job_id = response.json()["id"]
+
+        await JobWorkerPool(1).run_once()
+
+        job = (await async_client.get(f"/api/v1/chat/jobs/{job_id}")).json()
+        async with async_session_scope() as db:
+            row = await usage_repo.get_message_usage_async(
+                db, job["response_message_id"]
+            )
+            assert row.completion_tokens == 20
+
+    @pytest.mark.asyncio
+    async def test_session_rollup(self, async_client, async_test_agents, metered_llm):
+        """Test per-session totals split by agent."""
+        for content in ("@Echo one", "@Echo two", "@TestBot three"):
+            await async_client.post(
+                URL, json={"content": content, "session_id": "usage-3"}
+            )
+        await async_client.post(URL, json={"content": "@Echo x", "session_id": "other"})
+
+        response = await async_client.get("/api/v1/usage/sessions/usage-3")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["totals"]["messages"] == 3
+        assert data["totals"]["total_tokens"] == 360
+        assert data["totals"]["cached_tokens"] == 192
+        assert data["totals"]["avg_latency_ms"] == 250.0
+        assert data["totals"]["errors"] == 0
+        by_agent = {a["agent_name"]: a["messages"] for a in data["agents"]}
+        assert by_agent == {"Echo": 2, "TestBot": 1}
+
+    @pytest.mark.asyncio
+    async def test_agent_rollup(
+        self, async_client, async_test_agents, mock_llm_service
+    ):
+        """Test per-agent totals, error counts and the since filter."""
+        await async_client.post(URL, json={"content": "@Echo a", "session_id": "s"})
+        with patch.object(
+            llm_service,
+            "generate_completion_async",
+            AsyncMock(return_value=LLMCompletion(content="sorry", outcome="error")),
+        ):
+            await async_client.post(URL, json={"content": "@Echo b", "session_id": "s"})
+
+        agents = (await async_client.get("/api/v1/usage/agents")).json()
+        later = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+        none_since = await async_client.get(
+            "/api/v1/usage/agents", params={"since": later}
+        )
+
+        assert len(agents) == 1
+        assert agents[0]["agent_name"] == "Echo"
+        assert agents[0]["messages"] == 2
+        assert agents[0]["errors"] == 1
+        assert none_since.json() == []